@@ -0,0 +1,26 @@
+# Picked up with ``--config gunicorn.conf.py``, see docker-compose.yml
+import os
+
+bind = "0.0.0.0:8000"
+# Also the WEB_CONCURRENCY setting, more than one worker needs CACHE_URL
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+# Also the WEB_WORKER_CLASS setting. Uvicorn workers serve the ASGI app, so
+# event streams and long polls wait without holding a worker, and sync views
+# each run in a thread of their own
+worker_class = os.environ.get("WEB_WORKER_CLASS", "uvicorn.workers.UvicornWorker")
+# Also the WEB_THREADS setting, for the WSGI "sync" worker class only, which
+# runs as gthread above one thread. The order writer of ORDER_GROUP_COMMIT
+# groups the writes of concurrent requests, so with a single thread per
+# worker it only adds its wait
+threads = int(os.environ.get("WEB_THREADS", 1))
+
+
+def post_worker_init(worker):
+    # Runs in each worker once the application is loaded and before it
+    # accepts connections, so the first requests don't pay for cold caches
+    from django.conf import settings
+
+    if settings.WORKER_WARM_UP:
+        from pizza.startup import warm_up
+
+        warm_up()
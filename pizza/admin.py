@@ -1,8 +1,25 @@
 from django.contrib import admin
 
-from pizza.models import Pizza, Extra, Ingredient, Order
+from pizza.models import (
+    Pizza,
+    Extra,
+    Ingredient,
+    Cart,
+    Order,
+    ArchivedOrder,
+    StockShard,
+    IdempotencyKey,
+    DailyPizzaSales,
+    DailyExtraSales,
+)
 
 admin.site.register(Pizza)
 admin.site.register(Extra)
+admin.site.register(Cart)
 admin.site.register(Order)
+admin.site.register(ArchivedOrder)
 admin.site.register(Ingredient)
+admin.site.register(StockShard)
+admin.site.register(IdempotencyKey)
+admin.site.register(DailyPizzaSales)
+admin.site.register(DailyExtraSales)
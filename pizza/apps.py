@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PizzaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pizza"
+
+    def ready(self):
+        from pizza import checks, signals  # noqa: F401
@@ -0,0 +1,80 @@
+from django.db import connection, transaction
+
+from pizza.models import ArchivedOrder, ArchivedOrderExtra, Order
+from pizza.snapshots import snapshots_of
+from pizza.transitions import TERMINAL_STATUSES
+
+# Order columns copied to ArchivedOrder as they are
+ARCHIVED_COLUMNS = [
+    field.attname
+    for field in ArchivedOrder._meta.concrete_fields
+    if field.name != "archived_at"
+]
+
+
+def archive_orders(before, batch_size=1000):
+    """Move delivered and cancelled orders created before ``before`` out of ``Order``.
+
+    Each batch of orders and their extras is copied to the archive tables and
+    deleted from the hot ones in its own transaction, so an interrupted run
+    loses at most the batch in flight and the next run carries on. Orders in
+    a terminal status never change again and new orders are neither old nor
+    terminal, so archiving does not race with the order endpoints; rows
+    locked by another transaction are skipped until the next run.
+
+    Yields the number of orders and order extras moved so far after each batch.
+    """
+    candidates = Order.objects.filter(
+        status__in=TERMINAL_STATUSES, created_at__lt=before
+    ).order_by("pk")
+    last_id, orders_moved, extras_moved = 0, 0, 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                candidates.select_for_update(skip_locked=True)
+                .filter(pk__gt=last_id)
+                .values(*ARCHIVED_COLUMNS)[:batch_size]
+            )
+            if not rows:
+                return
+            order_ids = [row["id"] for row in rows]
+            missing = [row["id"] for row in rows if row["snapshot"] is None]
+            if missing:
+                snapshots = snapshots_of(missing)
+                for row in rows:
+                    if row["snapshot"] is None:
+                        row["snapshot"] = snapshots[row["id"]]
+
+            order_extras = Order.extras.through.objects.filter(order_id__in=order_ids)
+            extras = [
+                ArchivedOrderExtra(order_id=order_id, extra_id=extra_id)
+                for order_id, extra_id in order_extras.values_list("order_id", "extra_id")
+            ]
+            ArchivedOrder.objects.bulk_create([ArchivedOrder(**row) for row in rows])
+            ArchivedOrderExtra.objects.bulk_create(extras)
+            order_extras.delete()
+            Order.objects.filter(pk__in=order_ids).delete()
+
+        last_id = order_ids[-1]
+        orders_moved += len(rows)
+        extras_moved += len(extras)
+        yield orders_moved, extras_moved
+
+
+def compact_orders():
+    """Reclaim the space of archived rows and refresh the planner's statistics.
+
+    Runs outside of a transaction, as PostgreSQL's VACUUM requires. Returns
+    the tables compacted, none on backends without a per-table statement.
+    """
+    tables = [Order._meta.db_table, Order.extras.through._meta.db_table]
+    if connection.vendor == "postgresql":
+        statement = "VACUUM (ANALYZE) {}"
+    elif connection.vendor == "sqlite":
+        statement = "ANALYZE {}"
+    else:
+        return []
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(statement.format(connection.ops.quote_name(table)))
+    return tables
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from django.db import connection
+
+
+def percentile(samples, pct):
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def run_concurrently(func, threads, calls):
+    """Call ``func(n)`` ``calls`` times spread over ``threads`` threads.
+
+    Returns a summary with the wall time, throughput, error count and
+    p50/p95/p99 latencies in milliseconds.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(offset):
+        barrier.wait()
+        try:
+            for n in range(offset, calls, threads):
+                started = time.perf_counter()
+                try:
+                    func(n)
+                except Exception as exc:
+                    with lock:
+                        errors.append(exc)
+                    continue
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "calls": calls,
+        "threads": threads,
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def compare_runs(results, baseline, tolerance=0.1):
+    """Compare scenario summaries with a baseline run of the same scenarios.
+
+    Returns the relative throughput and p95 change per scenario found in
+    both, flagged as a regression when throughput dropped or p95 grew by more
+    than ``tolerance``.
+    """
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        throughput = _change(current["throughput"], previous["throughput"])
+        p95 = _change(current["p95_ms"], previous["p95_ms"])
+        comparison[name] = {
+            "throughput_change": throughput,
+            "p95_change": p95,
+            "regressed": throughput < -tolerance or p95 > tolerance,
+        }
+    return comparison
+
+
+def _change(current, previous):
+    if not previous:
+        return 0.0
+    return round((current - previous) / previous, 3)
@@ -0,0 +1,164 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+
+from pizza.exceptions import InsufficientStock
+from pizza.models import Cart, Extra, Order, Pizza
+from pizza.rollups import order_sales, record_sales
+from pizza.serializers import BulkOrderRowSerializer
+from pizza.signals import orders_placed
+from pizza.snapshots import order_snapshot
+from pizza.stock import reserve_stock, stock_levels
+
+
+def ingest_orders(rows, atomic=True):
+    """Validate and insert a batch of orders.
+
+    Every row is checked against one snapshot of pizza and extra stock,
+    stock is reserved with one aggregated update per model and the orders
+    and their extras are inserted with ``bulk_create``.
+
+    With ``atomic`` a single bad row rejects the whole batch, otherwise the
+    valid rows are created regardless. Returns one result per row, either
+    ``{"index": i, "id": pk}`` or ``{"index": i, "errors": {...}}``; rows of a
+    rejected batch have an ``id`` of ``None``.
+    """
+    results = [{"index": index, "id": None} for index in range(len(rows))]
+    orders = _validate(rows, results)
+    failed = any("errors" in result for result in results)
+    if not orders or (atomic and failed):
+        return results
+
+    try:
+        _insert(orders)
+    except InsufficientStock as exc:
+        # Stock moved since the snapshot was taken
+        if atomic:
+            for index, _ in orders:
+                results[index]["errors"] = {"non_field_errors": exc.detail}
+            return results
+        for index, (order, extras) in orders:
+            try:
+                order.save(extras=extras)
+            except InsufficientStock as exc:
+                results[index]["errors"] = {"non_field_errors": exc.detail}
+        orders = [(index, pair) for index, pair in orders if pair[0].pk]
+
+    for index, (order, _) in orders:
+        results[index]["id"] = order.pk
+    return results
+
+
+def create_cart(lines, customer_name, delivery_address):
+    """Create a Cart with one order per line of ``lines``, or none at all.
+
+    Lines are validated, priced and inserted like an atomic ``ingest_orders``
+    batch, so stock is read once for every line and reserved with one update
+    per model, and the cart is written with its total in the same transaction.
+
+    Returns ``(cart, results)`` with one ``ingest_orders`` result per line; the
+    cart is ``None`` when any line was rejected.
+    """
+    details = {"customer_name": customer_name, "delivery_address": delivery_address}
+    results = [{"index": index, "id": None} for index in range(len(lines))]
+    orders = _validate([{**line, **details} for line in lines], results)
+    if not orders or any("errors" in result for result in results):
+        return None, results
+
+    cart = Cart(total_price=sum(order.total_price for _, (order, _) in orders), **details)
+    try:
+        with transaction.atomic():
+            cart.save()
+            for _, (order, _) in orders:
+                order.cart = cart
+            _insert(orders)
+    except InsufficientStock as exc:
+        for result in results:
+            result["errors"] = {"non_field_errors": exc.detail}
+        return None, results
+
+    for index, (order, _) in orders:
+        results[index]["id"] = order.pk
+    return cart, results
+
+
+def _validate(rows, results):
+    serializers = [BulkOrderRowSerializer(data=row) for row in rows]
+    valid = [serializer.is_valid() for serializer in serializers]
+    pizza_ids = set()
+    extra_ids = set()
+    for serializer, is_valid in zip(serializers, valid):
+        if is_valid:
+            pizza_ids.add(serializer.validated_data["pizza"])
+            extra_ids.update(serializer.validated_data.get("extras", []))
+
+    pizzas = Pizza.objects.in_bulk(pizza_ids)
+    extras = Extra.objects.in_bulk(extra_ids)
+    pizza_stock = stock_levels(Pizza, pizzas.values())
+    extra_stock = stock_levels(Extra, extras.values())
+
+    orders = []
+    for index, (serializer, is_valid) in enumerate(zip(serializers, valid)):
+        if not is_valid:
+            results[index]["errors"] = serializer.errors
+            continue
+
+        data = dict(serializer.validated_data)
+        quantity = data["quantity"]
+        pizza = pizzas.get(data.pop("pizza"))
+        order_extras = [extras.get(pk) for pk in dict.fromkeys(data.pop("extras", []))]
+        errors = {}
+        if pizza is None or not pizza.is_available:
+            errors["pizza"] = ["This pizza is currently unavailable"]
+        elif pizza_stock[pizza.pk] < quantity:
+            errors["pizza"] = [f"Only {pizza_stock[pizza.pk]} pizzas left in stock."]
+        if any(extra is None or not extra.is_available for extra in order_extras):
+            errors["extras"] = ["Some extras are unavailable"]
+        else:
+            low = [e.name for e in order_extras if extra_stock[e.pk] < quantity]
+            if low:
+                errors["extras"] = [f"Insufficient stock for extras: {', '.join(low)}"]
+        if errors:
+            results[index]["errors"] = errors
+            continue
+
+        pizza_stock[pizza.pk] -= quantity
+        for extra in order_extras:
+            extra_stock[extra.pk] -= quantity
+        snapshot = order_snapshot(
+            pizza.pk, pizza, {extra.pk: extra for extra in order_extras}, quantity
+        )
+        order = Order(
+            pizza=pizza,
+            total_price=Decimal(snapshot["total_price"]),
+            snapshot=snapshot,
+            **data,
+        )
+        orders.append((index, (order, order_extras)))
+    return orders
+
+
+def _insert(orders):
+    pizza_units = Counter()
+    extra_units = Counter()
+    for _, (order, extras) in orders:
+        pizza_units[order.pizza_id] += order.quantity
+        for extra in extras:
+            extra_units[extra.pk] += order.quantity
+
+    through = Order.extras.through
+    with transaction.atomic():
+        reserve_stock(Pizza, pizza_units)
+        reserve_stock(Extra, extra_units)
+        Order.objects.bulk_create([order for _, (order, _) in orders])
+        through.objects.bulk_create(
+            [
+                through(order_id=order.pk, extra_id=extra.pk)
+                for _, (order, extras) in orders
+                for extra in extras
+            ]
+        )
+        record_sales(order_sales(order, extras) for _, (order, extras) in orders)
+        placed = [order for _, (order, _) in orders]
+        transaction.on_commit(lambda: orders_placed.send(sender=Order, orders=placed))
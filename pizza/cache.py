@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOG_VERSION_KEY = "pizza:catalog-version"
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe mapping bounded to ``max_entries`` items.
+
+    The least recently read or written entry is evicted first.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class _Flight:
+    """A build in progress that concurrent misses on the same key wait for."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+def read_version(key):
+    """Return the version counter stored under ``key`` in the default cache."""
+    version = cache.get(key)
+    if version is None:
+        # A fresh (or evicted) counter must not collide with any version
+        # that is still referenced by cached entries.
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+class MenuCache:
+    """Per-worker cache of rendered menu payloads.
+
+    Entries are keyed by the catalog version, which lives in Django's default
+    cache. With a shared cache (CACHE_URL) a change saved by any worker or
+    management command invalidates the entries of all of them; the local
+    memory fallback only reaches the process that saved the change, which is
+    why pizza/checks.py refuses it for more than one worker. Concurrent
+    misses on the same key are coalesced into a single build.
+    """
+
+    def __init__(self, max_entries=512):
+        self._entries = LRUCache(max_entries)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def version(self):
+        return read_version(CATALOG_VERSION_KEY)
+
+    def bump(self):
+        """Invalidate every cached payload, in this worker and the others."""
+        bump_version(CATALOG_VERSION_KEY)
+
+    def clear(self):
+        self._entries.clear()
+        with self._lock:
+            self.hits = self.misses = self.coalesced = 0
+            self._entries.evictions = 0
+
+    def get_or_build(self, key, build):
+        """Return the payload cached under ``key``, calling ``build`` on a miss."""
+        key = (self.version, key)
+        payload = self._entries.get(key, _MISSING)
+        if payload is not _MISSING:
+            self._count("hits")
+            return payload
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+
+        if not leader:
+            self._count("coalesced")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        self._count("misses")
+        try:
+            flight.value = build()
+            self._entries.set(key, flight.value)
+            return flight.value
+        except Exception as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self._entries.evictions,
+            "entries": len(self._entries),
+        }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+menu_cache = MenuCache(max_entries=getattr(settings, "MENU_CACHE_MAX_ENTRIES", 512))
+
+
+def invalidate_catalog():
+    """Bump the catalog version now and again once the transaction commits.
+
+    The second bump stops a reader that raced the transaction from caching
+    the pre-commit rows under the new version.
+    """
+    menu_cache.bump()
+    transaction.on_commit(menu_cache.bump)
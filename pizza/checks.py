@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Cache backends whose contents are private to one process
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Refuse a process-local default cache when several workers serve requests.
+
+    The catalog version in pizza/cache.py lives in the default cache, so with
+    a per-process cache a change saved by one worker never reaches the others.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if backend in PROCESS_LOCAL_CACHES and settings.WEB_CONCURRENCY > 1:
+        return [
+            Error(
+                f"{backend} is private to each process but WEB_CONCURRENCY is "
+                f"{settings.WEB_CONCURRENCY}.",
+                hint="Set CACHE_URL to a shared cache, e.g. redis://redis:6379/1.",
+                id="pizza.E001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_group_commit_threads(app_configs, **kwargs):
+    """Warn when the order writer is on but each worker serves one request at a time."""
+    single = settings.WEB_WORKER_CLASS == "sync" and settings.WEB_THREADS < 2
+    if settings.ORDER_GROUP_COMMIT and single:
+        return [
+            Warning(
+                "ORDER_GROUP_COMMIT is on with single threaded sync workers, every "
+                "group holds a single write and order creates only wait longer.",
+                hint="Set WEB_THREADS above 1, use the default uvicorn workers or "
+                "turn ORDER_GROUP_COMMIT off.",
+                id="pizza.W001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_shared_events(app_configs, **kwargs):
+    """Refuse the in-process event broker when several workers serve requests.
+
+    A status change saved by one worker would never reach the event streams
+    open on the others.
+    """
+    broker = settings.ORDER_EVENTS_BROKER
+    if broker == "pizza.events.InMemoryBroker" and settings.WEB_CONCURRENCY > 1:
+        return [
+            Error(
+                f"{broker} is private to each process but WEB_CONCURRENCY is "
+                f"{settings.WEB_CONCURRENCY}.",
+                hint="Set ORDER_EVENTS_BROKER to pizza.events.CacheBroker with CACHE_URL.",
+                id="pizza.E002",
+            )
+        ]
+    return []
@@ -10,3 +10,8 @@ class DeliveryStatus(models.TextChoices):
     READY = "ready", _("Ready")
     DELIVERED = "delivered", _("Delivered")
     CANCELLED = "cancelled", _("Cancelled")
+
+
+class StockKind(models.TextChoices):
+    PIZZA = "pizza", _("Pizza")
+    EXTRA = "extra", _("Extra")
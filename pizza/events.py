@@ -0,0 +1,296 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+
+from pizza.models import Order
+
+logger = logging.getLogger(__name__)
+
+# Most orders one stream or poll may watch
+MAX_WATCHED_ORDERS = 50
+
+
+class Subscription:
+    """Status events for a set of orders, consumed from one event loop."""
+
+    def __init__(self, broker, order_ids):
+        self.broker = broker
+        self.order_ids = frozenset(order_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, timeout=None):
+        """Return the next ``{"id", "status"}`` event, or None after ``timeout``."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def deliver(self, event):
+        # Called from any thread, the queue belongs to the subscriber's loop
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+        except RuntimeError:
+            # The subscriber's loop has gone away
+            self.close()
+
+
+class InMemoryBroker:
+    """Publish/subscribe hub for order status events within one process.
+
+    An idle subscriber costs one queue and one entry per watched order, so a
+    worker can hold thousands of them. A broker shared between workers, such
+    as ``CacheBroker``, only needs the same ``publish``, ``subscribe`` and
+    ``unsubscribe`` methods and is selected with the ``ORDER_EVENTS_BROKER``
+    setting.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, order_ids):
+        """Return a Subscription; must be called from the consuming event loop."""
+        subscription = Subscription(self, order_ids)
+        with self._lock:
+            for order_id in subscription.order_ids:
+                self._subscribers.setdefault(order_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for order_id in subscription.order_ids:
+                subscribers = self._subscribers.get(order_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[order_id]
+
+    def publish(self, order_id, status):
+        with self._lock:
+            subscribers = list(self._subscribers.get(order_id, ()))
+        for subscription in subscribers:
+            subscription.deliver({"id": order_id, "status": status})
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+
+class CacheBroker(InMemoryBroker):
+    """Order status events shared by every worker through the default cache.
+
+    Published events are stored under increasing sequence numbers for
+    ``event_timeout`` seconds. While a process has subscribers, a thread
+    reads the new ones every ``ORDER_EVENTS_POLL_INTERVAL`` seconds and
+    hands them to that process's subscribers, so events reach streams open
+    on any worker once the cache is shared (CACHE_URL).
+    """
+
+    key_prefix = "pizza:order-events"
+    event_timeout = 60
+    # Seconds to wait for an event whose number is taken but not yet stored
+    missing_grace = 1.0
+
+    def __init__(self):
+        super().__init__()
+        self.poll_interval = getattr(settings, "ORDER_EVENTS_POLL_INTERVAL", 0.2)
+        self._position = None
+        self._missing_since = None
+        self._poller = None
+
+    def subscribe(self, order_ids):
+        subscription = super().subscribe(order_ids)
+        with self._lock:
+            # Start from the latest event, the caller reads the current statuses
+            if self._position is None:
+                self._position = self._last_sequence()
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(
+                    target=self._run, name="order-events", daemon=True
+                )
+                self._poller.start()
+        return subscription
+
+    def publish(self, order_id, status):
+        sequence_key = f"{self.key_prefix}:sequence"
+        cache.add(sequence_key, 0, timeout=None)
+        sequence = cache.incr(sequence_key)
+        cache.set(
+            f"{self.key_prefix}:{sequence}",
+            {"id": order_id, "status": status},
+            timeout=self.event_timeout,
+        )
+
+    def poll(self):
+        """Deliver the events stored since the last poll, return how many."""
+        with self._lock:
+            position = self._position
+        if position is None:
+            return 0
+        last = self._last_sequence()
+        if last < position:
+            # The counter was evicted and started over
+            position = 0
+        keys = {f"{self.key_prefix}:{n}": n for n in range(position + 1, last + 1)}
+        events = cache.get_many(list(keys))
+        delivered = 0
+        for key, sequence in keys.items():
+            event = events.get(key)
+            if event is None:
+                now = time.monotonic()
+                if self._missing_since is None:
+                    self._missing_since = now
+                if now - self._missing_since < self.missing_grace:
+                    break
+            else:
+                super().publish(event["id"], event["status"])
+                delivered += 1
+            self._missing_since = None
+            position = sequence
+        with self._lock:
+            if self._position is not None:
+                self._position = position
+        return delivered
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._subscribers:
+                    # Idle, the next subscriber starts from the latest event
+                    self._position = None
+                    self._poller = None
+                    return
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Reading order events from the cache failed")
+
+    def _last_sequence(self):
+        return cache.get(f"{self.key_prefix}:sequence") or 0
+
+
+order_events = import_string(
+    getattr(settings, "ORDER_EVENTS_BROKER", "pizza.events.InMemoryBroker")
+)()
+
+
+def _terminal_statuses():
+    from pizza.transitions import TERMINAL_STATUSES
+
+    return TERMINAL_STATUSES
+
+
+def _parse_ids(value):
+    order_ids = sorted({int(pk) for pk in value.split(",") if pk.strip()})
+    if not order_ids or len(order_ids) > MAX_WATCHED_ORDERS:
+        raise ValueError
+    return order_ids
+
+
+def _parse_known(value):
+    """Parse ``1:pending,2:confirmed`` into ``{1: "pending", 2: "confirmed"}``."""
+    known = {}
+    for pair in filter(None, value.split(",")):
+        pk, _, status = pair.partition(":")
+        known[int(pk)] = status
+    return known
+
+
+def _current_statuses(order_ids):
+    return dict(Order.objects.filter(pk__in=order_ids).values_list("id", "status"))
+
+
+def _sse(event):
+    return f"event: status\ndata: {json.dumps(event)}\n\n"
+
+
+async def _stream(subscription, statuses):
+    terminal = _terminal_statuses()
+    try:
+        for pk, status in statuses.items():
+            yield _sse({"id": pk, "status": status})
+        watching = {pk for pk, status in statuses.items() if status not in terminal}
+        keepalive = getattr(settings, "ORDER_EVENTS_KEEPALIVE", 15)
+        while watching:
+            event = await subscription.get(timeout=keepalive)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse(event)
+            if event["status"] in terminal:
+                watching.discard(event["id"])
+    finally:
+        subscription.close()
+
+
+async def _long_poll(subscription, statuses, known, timeout):
+    try:
+        events = [
+            {"id": pk, "status": status}
+            for pk, status in statuses.items()
+            if known.get(pk) != status
+        ]
+        if not events:
+            event = await subscription.get(timeout=timeout)
+            if event is not None:
+                events.append(event)
+                # Pick up anything published alongside it
+                while (event := await subscription.get(timeout=0)) is not None:
+                    events.append(event)
+        return JsonResponse({"events": events})
+    finally:
+        subscription.close()
+
+
+async def order_events_view(request):
+    """Push status changes of ``?ids=1,2`` as server-sent events.
+
+    The stream starts with the current status of every order found and ends
+    once all of them are delivered or cancelled. Clients without SSE send
+    ``poll=1`` and the statuses they have seen as ``known=1:pending,...``;
+    the response returns as soon as one differs, or empty after ``timeout``
+    seconds.
+    """
+    try:
+        order_ids = _parse_ids(request.GET.get("ids", ""))
+        known = _parse_known(request.GET.get("known", ""))
+        timeout = min(float(request.GET.get("timeout", 25)), 60)
+    except ValueError:
+        return JsonResponse(
+            {"error": f"ids must be 1 to {MAX_WATCHED_ORDERS} comma separated order ids"},
+            status=400,
+        )
+
+    # Subscribe before reading so no change falls between the two
+    subscription = order_events.subscribe(order_ids)
+    handed_over = False
+    try:
+        statuses = await sync_to_async(_current_statuses)(order_ids)
+        if not statuses:
+            return JsonResponse({"error": "Orders not found"}, status=404)
+
+        # From here on _long_poll or _stream closes the subscription
+        handed_over = True
+        if request.GET.get("poll"):
+            return await _long_poll(subscription, statuses, known, max(timeout, 0))
+        return StreamingHttpResponse(
+            _stream(subscription, statuses),
+            content_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    finally:
+        if not handed_over:
+            subscription.close()
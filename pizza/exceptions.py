@@ -0,0 +1,17 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+
+class InsufficientStock(ValidationError):
+    """Raised when a stock reservation cannot be satisfied."""
+
+    default_detail = "Insufficient stock."
+    default_code = "insufficient_stock"
+
+
+class WriterUnavailable(APIException):
+    """Raised when the order writer thread doesn't complete a write in time."""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Orders cannot be written right now, please retry."
+    default_code = "writer_unavailable"
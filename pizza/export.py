@@ -0,0 +1,133 @@
+import csv
+import heapq
+import json
+from datetime import datetime, time
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from pizza.models import ArchivedOrder, Order
+
+EXPORT_FIELDS = [
+    "id",
+    "pizza_id",
+    "pizza_name",
+    "extras_ids",
+    "quantity",
+    "total_price",
+    "status",
+    "customer_name",
+    "created_at",
+    "updated_at",
+]
+
+_ORDER_COLUMNS = {
+    "id": "id",
+    "pizza_id": "pizza_id",
+    "pizza_name": "pizza__name",
+    "quantity": "quantity",
+    "total_price": "total_price",
+    "status": "status",
+    "customer_name": "customer_name",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+
+def parse_bound(value, end=False):
+    """Parse an ISO date or datetime export bound into an aware datetime.
+
+    A bare date used as the ``end`` bound includes that whole day.
+    """
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        moment = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_querysets(start=None, end=None):
+    """Return the live and the archived orders created between the bounds."""
+    querysets = []
+    for model in (Order, ArchivedOrder):
+        queryset = model.objects.order_by("created_at", "id")
+        if start:
+            queryset = queryset.filter(created_at__gte=start)
+        if end:
+            queryset = queryset.filter(created_at__lte=end)
+        querysets.append(queryset)
+    return querysets
+
+
+def iter_order_rows(querysets, chunk_size=2000):
+    """Yield one flat dict per order of ``querysets`` in constant memory.
+
+    Each queryset is ordered by creation, as ``export_querysets`` returns
+    them, and their rows are merged in that order.
+    """
+    return heapq.merge(
+        *(_iter_rows(queryset, chunk_size) for queryset in querysets),
+        key=lambda row: (row["created_at"], row["id"]),
+    )
+
+
+def _iter_rows(queryset, chunk_size):
+    """Yield the rows of one order table.
+
+    Orders are read through a server-side cursor where the database supports
+    one, and the extras of each chunk of orders are fetched with one query.
+    """
+    through = queryset.model.extras.through
+    columns = list(_ORDER_COLUMNS.values())
+    rows = queryset.values_list(*columns).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        extras = {}
+        for order_id, extra_id in (
+            through.objects.filter(order_id__in=[row[0] for row in chunk])
+            .order_by("order_id", "extra_id")
+            .values_list("order_id", "extra_id")
+        ):
+            extras.setdefault(order_id, []).append(extra_id)
+        for row in chunk:
+            order = dict(zip(_ORDER_COLUMNS, row))
+            order["extras_ids"] = extras.get(order["id"], [])
+            yield {field: order[field] for field in EXPORT_FIELDS}
+
+
+class _Echo:
+    """File-like object that hands back what csv.writer writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        row = dict(row, extras_ids=" ".join(str(pk) for pk in row["extras_ids"]))
+        row["created_at"] = row["created_at"].isoformat()
+        row["updated_at"] = row["updated_at"].isoformat()
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+FORMATS = {
+    "csv": (iter_csv, "text/csv"),
+    "ndjson": (iter_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from pizza.cache import LRUCache
+from pizza.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+
+
+class IdempotencyStore:
+    """Run a request once per ``Idempotency-Key`` and replay its response.
+
+    Completed responses live in the ``IdempotencyKey`` table for
+    ``IDEMPOTENCY_KEY_TTL`` seconds with an in-memory LRU in front of it.
+    A request whose key is already running, in this worker or another one,
+    waits for that request to finish and replays its response, for up to
+    ``IDEMPOTENCY_LOCK_TIMEOUT`` seconds. Past that the running request is
+    presumed dead and its key can be claimed again.
+    """
+
+    def __init__(self, max_entries=1024):
+        self._responses = LRUCache(max_entries)
+        self._running = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60)
+
+    @property
+    def lock_timeout(self):
+        return getattr(settings, "IDEMPOTENCY_LOCK_TIMEOUT", 30)
+
+    def clear(self):
+        self._responses.clear()
+
+    def respond(self, key, fingerprint, view):
+        """Return the response for ``key``, calling ``view()`` at most once."""
+        while True:
+            response = self._replay(key, fingerprint)
+            if response is not None:
+                return response
+
+            with self._lock:
+                running = self._running.get(key)
+                if running is None:
+                    running = self._running[key] = threading.Event()
+                    break
+            # Same key in flight in this worker, wait for it and replay
+            running.wait(self.lock_timeout)
+
+        try:
+            return self._run(key, fingerprint, view)
+        finally:
+            with self._lock:
+                del self._running[key]
+            running.set()
+
+    def _replay(self, key, fingerprint):
+        cached = self._responses.get(key)
+        if cached is None:
+            return None
+        stored_fingerprint, status_code, body, expires = cached
+        if expires < time.monotonic():
+            return None
+        return self._stored_response(fingerprint, stored_fingerprint, status_code, body)
+
+    def _run(self, key, fingerprint, view):
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            record = self._claim(key, fingerprint)
+            if record is None:
+                break
+            if record.status_code is not None:
+                self._remember(record)
+                return self._stored_response(
+                    fingerprint,
+                    record.fingerprint,
+                    record.status_code,
+                    record.response_body,
+                )
+            if time.monotonic() > deadline:
+                return Response(
+                    {"error": "A request with this Idempotency-Key is in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            # Claimed by another worker, poll until its response is stored
+            time.sleep(0.05)
+
+        try:
+            response = view()
+        except Exception:
+            IdempotencyKey.objects.filter(key=key, status_code=None).delete()
+            raise
+
+        if response.status_code >= 500:
+            # Let the client retry server errors
+            IdempotencyKey.objects.filter(key=key, status_code=None).delete()
+            return response
+
+        body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+        record = IdempotencyKey(
+            key=key,
+            fingerprint=fingerprint,
+            status_code=response.status_code,
+            response_body=body,
+        )
+        IdempotencyKey.objects.filter(key=key).update(
+            status_code=record.status_code, response_body=body
+        )
+        self._remember(record)
+        return response
+
+    def _claim(self, key, fingerprint):
+        """Insert the in-progress row for ``key``, or return the existing one.
+
+        An in-progress row older than ``IDEMPOTENCY_LOCK_TIMEOUT`` belongs to
+        a worker that died before storing its response, and is taken over.
+        """
+        now = timezone.now()
+        expired = Q(created_at__lt=now - timedelta(seconds=self.ttl))
+        abandoned = Q(
+            status_code=None, created_at__lt=now - timedelta(seconds=self.lock_timeout)
+        )
+        IdempotencyKey.objects.filter(expired | abandoned, key=key).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(key=key, fingerprint=fingerprint)
+            return None
+        except IntegrityError:
+            return IdempotencyKey.objects.filter(key=key).first() or self._claim(
+                key, fingerprint
+            )
+
+    def _remember(self, record):
+        expires = time.monotonic() + self.ttl
+        self._responses.set(
+            record.key,
+            (record.fingerprint, record.status_code, record.response_body, expires),
+        )
+
+    def _stored_response(self, fingerprint, stored_fingerprint, status_code, body):
+        if fingerprint != stored_fingerprint:
+            return Response(
+                {"error": "Idempotency-Key was already used with a different request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(body, status=status_code, headers={REPLAY_HEADER: "true"})
+
+
+idempotency_store = IdempotencyStore()
+
+
+def request_fingerprint(request):
+    payload = json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+    return hashlib.sha256(f"{request.path}:{payload}".encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """
+    Make ``create`` safe to retry by sending an Idempotency-Key header
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        return idempotency_store.respond(
+            key[:255],
+            request_fingerprint(request),
+            lambda: super(IdempotentCreateMixin, self).create(request, *args, **kwargs),
+        )
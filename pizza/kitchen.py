@@ -0,0 +1,254 @@
+import bisect
+import random
+import threading
+import time
+from collections import namedtuple
+from itertools import accumulate
+
+from django.conf import settings
+from django.db import transaction
+
+from pizza.benchmarks import percentile
+from pizza.choices import DeliveryStatus
+from pizza.models import Order
+from pizza.synthetic import QUANTITIES
+
+# Orders waiting for the kitchen
+QUEUED_STATUSES = (DeliveryStatus.PENDING, DeliveryStatus.CONFIRMED)
+
+QueuedOrder = namedtuple("QueuedOrder", ["id", "pizza_id", "quantity", "created_at"])
+Batch = namedtuple("Batch", ["pizza_id", "orders", "units"])
+
+
+class KitchenQueue:
+    """Waiting orders grouped by pizza, oldest first within each group.
+
+    ``created_at`` is any number that grows with time, epoch seconds for real
+    orders and simulated seconds in ``simulate``.
+    """
+
+    def __init__(self):
+        self._orders = {}
+        self._groups = {}
+        self._units = {}
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def add(self, order):
+        if order.id in self._orders:
+            return
+        self._orders[order.id] = order
+        bisect.insort(self._groups.setdefault(order.pizza_id, []), (order.created_at, order.id))
+        self._units[order.pizza_id] = self._units.get(order.pizza_id, 0) + order.quantity
+
+    def remove(self, order_id):
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return
+        group = self._groups[order.pizza_id]
+        group.pop(bisect.bisect_left(group, (order.created_at, order.id)))
+        self._units[order.pizza_id] -= order.quantity
+        if not group:
+            del self._groups[order.pizza_id]
+            del self._units[order.pizza_id]
+
+    def next_batch(self, now, capacity, max_wait, lead=0):
+        """Return the ``Batch`` to bake next, or None when nothing is waiting.
+
+        An order is due once it would wait more than ``max_wait`` by the end
+        of the next ``lead`` seconds, and the pizza of the oldest due order
+        goes first. Otherwise the pizza with the most units waiting fills the
+        oven best. Orders join the batch oldest first while they fit in
+        ``capacity`` units; an order larger than the oven is baked alone.
+        """
+        if not self._groups:
+            return None
+        oldest = min(self._groups, key=lambda pizza_id: self._groups[pizza_id][0])
+        if self._groups[oldest][0][0] + max_wait <= now + lead:
+            pizza_id = oldest
+        else:
+            pizza_id = max(
+                self._groups,
+                key=lambda pk: (min(self._units[pk], capacity), -self._groups[pk][0][0]),
+            )
+
+        orders, units = [], 0
+        for _, order_id in self._groups[pizza_id]:
+            order = self._orders[order_id]
+            if units + order.quantity <= capacity or not orders:
+                orders.append(order)
+                units += order.quantity
+            if units >= capacity:
+                break
+        return Batch(pizza_id, orders, units)
+
+    def oldest(self):
+        """Return the order that has waited longest, or None."""
+        if not self._groups:
+            return None
+        created_at, order_id = min(group[0] for group in self._groups.values())
+        return self._orders[order_id]
+
+
+class KitchenScheduler:
+    """The kitchen queue of this worker, kept in step with the order table.
+
+    The queue is loaded once, then new orders are picked up by id, status
+    changes through ``order_status_changed`` and orders created locally, one
+    by one or in bulk, through ``orders_placed`` as they commit. A full
+    reload every ``KITCHEN_QUEUE_RESYNC`` seconds repairs what another worker
+    changed behind its back, and orders that another worker claimed first
+    are dropped when a claim fails on them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queue = KitchenQueue()
+        self._loaded_at = None
+        self._last_id = 0
+
+    def clear(self):
+        with self._lock:
+            self.queue = KitchenQueue()
+            self._loaded_at = None
+            self._last_id = 0
+
+    def add(self, order):
+        """Queue a newly committed order, a no-op until the queue is loaded."""
+        with self._lock:
+            if self._loaded_at is not None and order.status in QUEUED_STATUSES:
+                self.queue.add(_queued(order.pk, order.pizza_id, order.quantity, order.created_at))
+
+    def discard(self, order_ids):
+        with self._lock:
+            for order_id in order_ids:
+                self.queue.remove(order_id)
+
+    def sync(self):
+        """Load the queue on first use or when due, else fetch newer orders."""
+        resync = getattr(settings, "KITCHEN_QUEUE_RESYNC", 60)
+        with self._lock:
+            orders = Order.objects.filter(status__in=QUEUED_STATUSES)
+            reload = self._loaded_at is None or time.monotonic() - self._loaded_at >= resync
+            if reload:
+                self.queue = KitchenQueue()
+                self._loaded_at = time.monotonic()
+            else:
+                orders = orders.filter(pk__gt=self._last_id)
+            for row in orders.values_list("pk", "pizza_id", "quantity", "created_at"):
+                self.queue.add(_queued(*row))
+                self._last_id = max(self._last_id, row[0])
+
+    def claim_next_batch(self, attempts=3):
+        """Move the next batch to preparing and return it, or None if idle.
+
+        Pending orders are confirmed on the way. The claim locks the orders'
+        rows, so two workers never claim the same order; when every order of
+        a batch was taken or cancelled elsewhere the next batch is tried.
+        """
+        from pizza.transitions import transition_orders
+
+        self.sync()
+        for _ in range(attempts):
+            with self._lock:
+                batch = self.queue.next_batch(
+                    time.time(),
+                    getattr(settings, "KITCHEN_OVEN_CAPACITY", 8),
+                    getattr(settings, "KITCHEN_MAX_WAIT", 20 * 60),
+                    lead=getattr(settings, "KITCHEN_OVEN_SECONDS", 8 * 60),
+                )
+            if batch is None:
+                return None
+
+            order_ids = [order.id for order in batch.orders]
+            with transaction.atomic():
+                transition_orders(order_ids, DeliveryStatus.CONFIRMED)
+                claimed, _ = transition_orders(order_ids, DeliveryStatus.PREPARING)
+            self.discard(order_ids)
+            if claimed:
+                orders = [order for order in batch.orders if order.id in claimed]
+                return Batch(batch.pizza_id, orders, sum(order.quantity for order in orders))
+        return None
+
+
+kitchen_scheduler = KitchenScheduler()
+
+
+def _queued(pk, pizza_id, quantity, created_at):
+    return QueuedOrder(pk, pizza_id, quantity, created_at.timestamp())
+
+
+def simulated_orders(hours, per_hour, pizzas, seed=None):
+    """Yield ``QueuedOrder`` arrivals over ``hours`` at ``per_hour`` on average.
+
+    Pizza popularity falls off like a Zipf distribution and quantities follow
+    the synthetic data generator's.
+    """
+    rng = random.Random(seed)
+    pizza_weights = list(accumulate(1 / rank for rank in range(1, pizzas + 1)))
+    quantities, quantity_weights = zip(*QUANTITIES.items())
+    quantity_weights = list(accumulate(quantity_weights))
+    now, order_id = 0.0, 0
+    while True:
+        now += rng.expovariate(per_hour / 3600)
+        if now >= hours * 3600:
+            return
+        order_id += 1
+        yield QueuedOrder(
+            order_id,
+            rng.choices(range(1, pizzas + 1), cum_weights=pizza_weights)[0],
+            rng.choices(quantities, cum_weights=quantity_weights)[0],
+            now,
+        )
+
+
+def simulate(orders, policy, capacity, oven_seconds, max_wait):
+    """Run one oven over the ``orders`` arrivals and return its statistics.
+
+    With the ``fifo`` policy the oven bakes the oldest order on its own, the
+    way orders used to be picked; ``batched`` uses ``KitchenQueue.next_batch``.
+    Waits run from arrival to the start of the order's oven run.
+    """
+    arrivals = sorted(orders, key=lambda order: order.created_at)
+    horizon = arrivals[-1].created_at if arrivals else 0
+    queue = KitchenQueue()
+    waits, runs, units, position, now = [], 0, 0, 0, 0.0
+    while position < len(arrivals) or len(queue):
+        while position < len(arrivals) and arrivals[position].created_at <= now:
+            queue.add(arrivals[position])
+            position += 1
+        if not len(queue):
+            now = arrivals[position].created_at
+            continue
+
+        if policy == "fifo":
+            oldest = queue.oldest()
+            batch = Batch(oldest.pizza_id, [oldest], oldest.quantity)
+        else:
+            batch = queue.next_batch(now, capacity, max_wait, lead=oven_seconds)
+        for order in batch.orders:
+            queue.remove(order.id)
+            waits.append(now - order.created_at)
+        runs += 1
+        units += batch.units
+        now += oven_seconds
+
+    return {
+        "policy": policy,
+        "orders": len(waits),
+        "pizzas": units,
+        "oven_runs": runs,
+        "avg_batch": units / runs if runs else 0,
+        "hours": now / 3600,
+        "pizzas_per_hour": units * 3600 / now if now else 0,
+        "wait_p50_min": percentile(waits, 50) / 60 if waits else 0,
+        "wait_p95_min": percentile(waits, 95) / 60 if waits else 0,
+        "wait_max_min": max(waits, default=0) / 60,
+        "late_orders": sum(1 for wait in waits if wait > max_wait),
+        # Time the oven kept going after the last order came in
+        "drain_hours": max(now - horizon, 0) / 3600,
+    }
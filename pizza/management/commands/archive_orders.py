@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pizza.archive import archive_orders, compact_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered and cancelled orders older than ORDER_ARCHIVE_AFTER_DAYS "
+        "to the archive tables in batches, then compact the order tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help="Archive orders created more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.ORDER_ARCHIVE_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between batches, to go easy on a busy database.",
+        )
+        parser.add_argument(
+            "--no-compact", action="store_true", help="Skip compacting the order tables."
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--days must not be negative and --batch-size must be positive.")
+
+        started = time.perf_counter()
+        before = timezone.now() - timedelta(days=options["days"])
+        orders, extras = 0, 0
+        for orders, extras in archive_orders(before, options["batch_size"]):
+            self.stdout.write(f"{orders} orders archived")
+            time.sleep(options["pause"])
+        archived = time.perf_counter() - started
+
+        if orders and not options["no_compact"]:
+            tables = compact_orders()
+            self.stdout.write(
+                f"Compacted {', '.join(tables) or 'nothing'} in "
+                f"{time.perf_counter() - started - archived:.1f}s"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {orders} orders and {extras} order extras in {archived:.1f}s."
+            )
+        )
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.snapshots import backfill_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the priced snapshot of every order placed before snapshots "
+        "existed, in batches. Safe to interrupt and run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        started = time.perf_counter()
+        updated = 0
+        for updated in backfill_snapshots(options["batch_size"]):
+            self.stdout.write(f"{updated} orders updated")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {updated} order snapshots in "
+                f"{time.perf_counter() - started:.1f}s."
+            )
+        )
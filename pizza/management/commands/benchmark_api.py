@@ -0,0 +1,184 @@
+import json
+import os
+import platform
+import tempfile
+import threading
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from pizza.benchmarks import compare_runs, run_concurrently
+from pizza.models import Extra, Ingredient, Order, Pizza
+
+SCENARIOS = [
+    "menu_list",
+    "menu_detail",
+    "calculate_price",
+    "order_create",
+    "order_list",
+    "order_contention",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and p50/p95/p99 latency of the main API endpoints "
+        "against a freshly created test database, optionally comparing the run "
+        "with a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=300)
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--pizzas", type=int, default=20)
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIOS,
+            help="Scenario to run, may be repeated. Runs all of them by default.",
+        )
+        parser.add_argument(
+            "--database",
+            default=os.path.join(tempfile.gettempdir(), "usersnack_benchmark.sqlite3"),
+            help="SQLite file for the test database, threads cannot share :memory:.",
+        )
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--baseline", help="Results file of an earlier run.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.1,
+            help="Relative throughput drop or p95 increase counted as a regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when a scenario regressed against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)["scenarios"]
+
+        if connection.vendor == "sqlite":
+            connection.settings_dict["TEST"]["NAME"] = options["database"]
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            catalog = self._seed(options["pizzas"], options["orders"])
+            scenarios = self._scenarios(catalog)
+            results = {}
+            for name in options["scenario"] or SCENARIOS:
+                self.stderr.write(f"Running {name}...")
+                results[name] = run_concurrently(
+                    scenarios[name], options["threads"], options["calls"]
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "calls": options["calls"],
+                "threads": options["threads"],
+            },
+            "scenarios": results,
+        }
+        if baseline is not None:
+            report["comparison"] = compare_runs(results, baseline, options["tolerance"])
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
+
+        regressed = [
+            name
+            for name, change in report.get("comparison", {}).items()
+            if change["regressed"]
+        ]
+        if regressed and options["fail_on_regression"]:
+            raise CommandError(f"Regressed against the baseline: {', '.join(regressed)}")
+        self.stdout.write(self.style.SUCCESS("Benchmark finished"))
+
+    def _seed(self, pizzas, orders):
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ingredient {i}") for i in range(10)
+        )
+        menu = Pizza.objects.bulk_create(
+            Pizza(name=f"Pizza {i}", base_price=8 + i % 7, quantity_in_stock=10**6)
+            for i in range(pizzas)
+        )
+        through = Pizza.ingredients.through
+        through.objects.bulk_create(
+            through(pizza_id=pizza.pk, ingredient_id=ingredients[(i + j) % 10].pk)
+            for i, pizza in enumerate(menu)
+            for j in range(3)
+        )
+        extras = Extra.objects.bulk_create(
+            Extra(name=f"Extra {i}", price=1 + i % 3, quantity_in_stock=10**6)
+            for i in range(5)
+        )
+        for i in range(orders):
+            order = Order(
+                pizza=menu[i % pizzas],
+                customer_name=f"Customer {i}",
+                delivery_address="Benchmark street",
+            )
+            order.save(extras=extras[: i % 3])
+        return menu, extras
+
+    def _scenarios(self, catalog):
+        menu, extras = catalog
+        extra_ids = [extra.pk for extra in extras[:2]]
+        clients = threading.local()
+
+        def request(method, url, expected, data=None):
+            if not hasattr(clients, "client"):
+                clients.client = APIClient()
+            response = getattr(clients.client, method)(url, data=data, format="json")
+            if response.status_code != expected:
+                raise RuntimeError(f"{method.upper()} {url}: {response.status_code}")
+
+        def order(pizza):
+            return {
+                "pizza": pizza.pk,
+                "extras": extra_ids,
+                "quantity": 1,
+                "customer_name": "Benchmark",
+                "delivery_address": "Benchmark street",
+            }
+
+        return {
+            "menu_list": lambda n: request("get", reverse("pizza-list"), 200),
+            "menu_detail": lambda n: request(
+                "get", reverse("pizza-detail", args=[menu[n % len(menu)].pk]), 200
+            ),
+            "calculate_price": lambda n: request(
+                "post",
+                reverse("pizza-calculate-price", args=[menu[n % len(menu)].pk]),
+                200,
+                {"extras": extra_ids, "quantity": 1 + n % 3},
+            ),
+            "order_create": lambda n: request(
+                "post", reverse("order-list"), 201, order(menu[n % len(menu)])
+            ),
+            "order_list": lambda n: request("get", reverse("order-list"), 200),
+            # Every thread orders the same pizza
+            "order_contention": lambda n: request(
+                "post", reverse("order-list"), 201, order(menu[0])
+            ),
+        }
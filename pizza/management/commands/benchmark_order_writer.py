@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from pizza.benchmarks import run_concurrently
+from pizza.models import Order, Pizza
+from pizza.serializers import OrderCreateSerializer
+from pizza.writer import GroupCommitWriter
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare order create throughput and latency with and without group "
+        "commit. Writes (and then removes) benchmark rows in the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--max-batch", type=int, default=32)
+        parser.add_argument("--max-wait-ms", type=float, default=5)
+
+    def handle(self, *args, **options):
+        pizza = Pizza.objects.create(
+            name="__benchmark__",
+            base_price=10,
+            quantity_in_stock=options["orders"] * 2,
+        )
+        writer = GroupCommitWriter(
+            max_batch=options["max_batch"], max_wait=options["max_wait_ms"] / 1000
+        )
+
+        def place(n, grouped):
+            serializer = OrderCreateSerializer(
+                data={
+                    "pizza": pizza.pk,
+                    "quantity": 1,
+                    "customer_name": f"Benchmark {n}",
+                    "delivery_address": "Nowhere",
+                }
+            )
+            serializer.is_valid(raise_exception=True)
+            if grouped:
+                writer.submit(serializer.save).result()
+            else:
+                serializer.save()
+
+        try:
+            results = {}
+            for mode, grouped in (("direct", False), ("grouped", True)):
+                results[mode] = run_concurrently(
+                    lambda n: place(n, grouped), options["threads"], options["orders"]
+                )
+            results["grouped"]["groups"] = writer.groups
+        finally:
+            Order.objects.filter(pizza=pizza).delete()
+            pizza.delete()
+
+        self.stdout.write(json.dumps(results, indent=2))
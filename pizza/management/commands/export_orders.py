@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.export import FORMATS, export_querysets, iter_order_rows, parse_bound
+
+
+class Command(BaseCommand):
+    help = "Stream orders created in a date range as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--start", help="ISO date or datetime, inclusive")
+        parser.add_argument("--end", help="ISO date or datetime, inclusive")
+        parser.add_argument("--output", help="File to write, defaults to stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            start = parse_bound(options["start"])
+            end = parse_bound(options["end"], end=True)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        render, _ = FORMATS[options["format"]]
+        rows = iter_order_rows(export_querysets(start, end), options["chunk_size"])
+        if not options["output"]:
+            for line in render(rows):
+                self.stdout.write(line, ending="")
+            return
+        with open(options["output"], "w", newline="") as output:
+            for line in render(rows):
+                output.write(line)
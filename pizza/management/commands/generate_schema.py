@@ -0,0 +1,32 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from usersnack.schema import SCHEMA_FORMATS, generate_schema
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema served by the API docs to OPENAPI_SCHEMA_DIR"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=settings.OPENAPI_SCHEMA_DIR,
+            help="Directory to write openapi.json and openapi.yaml to",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        output_dir = Path(options["output_dir"])
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, content in generate_schema().items():
+            (output_dir / SCHEMA_FORMATS[name][0]).write_bytes(content)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote the API schema to {output_dir} "
+                f"in {time.monotonic() - started:.1f}s."
+            )
+        )
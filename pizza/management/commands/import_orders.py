@@ -0,0 +1,76 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.bulk import ingest_orders
+
+
+class Command(BaseCommand):
+    help = "Import orders from an NDJSON file, one order object per line"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="NDJSON file to read, or - for stdin")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of orders validated and inserted together",
+        )
+        parser.add_argument(
+            "--best-effort",
+            action="store_true",
+            help="Create the valid orders of a batch even if some are invalid",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            source = (
+                sys.stdin if options["path"] == "-" else open(options["path"], "r")
+            )
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        created = failed = 0
+        with source:
+            batch = []
+            for line_number, line in enumerate(source, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    self._report(line_number, {"non_field_errors": [str(e)]})
+                    failed += 1
+                    continue
+                batch.append((line_number, row))
+                if len(batch) == batch_size:
+                    batch_created, batch_failed = self._import(batch, options)
+                    created += batch_created
+                    failed += batch_failed
+                    batch = []
+            if batch:
+                batch_created, batch_failed = self._import(batch, options)
+                created += batch_created
+                failed += batch_failed
+
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(style(f"Imported {created} orders, {failed} failed."))
+
+    def _import(self, batch, options):
+        rows = [row if isinstance(row, dict) else {} for _, row in batch]
+        results = ingest_orders(rows, atomic=not options["best_effort"])
+        created = 0
+        for (line_number, _), result in zip(batch, results):
+            if result["id"]:
+                created += 1
+            else:
+                self._report(line_number, result.get("errors") or "batch rejected")
+        return created, len(batch) - created
+
+    def _report(self, line_number, errors):
+        self.stderr.write(json.dumps({"line": line_number, "errors": errors}))
@@ -1,18 +1,53 @@
 import json
 import os
-from django.core.management.base import BaseCommand
+import time
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from pizza.cache import invalidate_catalog
 from pizza.models import Pizza, Extra, Ingredient
+from pizza.rollups import rebuild_rollups
+from pizza.search import invalidate_search
+from pizza.synthetic import generate_catalog, generate_orders, iter_fixture, load_fixture
 
 
 class Command(BaseCommand):
     help = "Populate database with sample pizza, extra, and ingredient data from JSON fixtures"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            help="Fixture file to load instead of fixtures/pizza_fixtures.json",
+        )
+        parser.add_argument(
+            "--bulk",
+            action="store_true",
+            help="Stream the fixture and insert new rows in bulk, leaving existing ones",
+        )
+        parser.add_argument(
+            "--generate",
+            action="store_true",
+            help="Generate a synthetic catalog and order history instead of a fixture",
+        )
+        parser.add_argument("--pizzas", type=int, default=50)
+        parser.add_argument("--extras", type=int, default=15)
+        parser.add_argument("--ingredients", type=int, default=40)
+        parser.add_argument("--orders", type=int, default=100000)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread orders over this many days"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, help="Seed for a reproducible data set")
+
     def handle(self, *args, **options):
-        # Load JSON data
-        fixtures_path = os.path.join(
+        fixtures_path = options["fixture"] or os.path.join(
             settings.BASE_DIR, "fixtures", "pizza_fixtures.json"
         )
+        if options["generate"]:
+            return self._generate(options)
+        if options["bulk"]:
+            return self._load_bulk(fixtures_path, options)
+
+        # Load JSON data
 
         try:
             with open(fixtures_path, "r") as f:
@@ -87,3 +122,62 @@ class Command(BaseCommand):
         self.stdout.write(
             self.style.SUCCESS("\nSuccessfully populated database with sample data!")
         )
+
+    def _load_bulk(self, fixtures_path, options):
+        try:
+            with open(fixtures_path, "r") as f:
+                created, missing = load_fixture(
+                    iter_fixture(f), batch_size=options["batch_size"]
+                )
+        except FileNotFoundError:
+            raise CommandError(f"Fixtures file not found at {fixtures_path}")
+        except ValueError as e:
+            raise CommandError(f"Invalid JSON in fixtures file: {e}")
+        # Bulk inserts skip the signals that keep the menu caches fresh
+        invalidate_catalog()
+        invalidate_search()
+
+        for name in missing:
+            self.stdout.write(self.style.WARNING(f"Ingredient '{name}' not found. Skipped."))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Created {ingredients} ingredients, {pizzas} pizzas and "
+                "{extras} extras.".format(**created)
+            )
+        )
+
+    def _generate(self, options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        started = time.monotonic()
+        pizzas, extras = generate_catalog(
+            options["pizzas"], options["extras"], options["ingredients"], options["seed"]
+        )
+        # Bulk inserts skip the signals that keep the menu caches fresh
+        invalidate_catalog()
+        invalidate_search()
+        self.stdout.write(f"Created {len(pizzas)} pizzas and {len(extras)} extras.")
+
+        inserted = 0
+        if options["orders"] and not pizzas:
+            raise CommandError("Orders need at least one pizza, see --pizzas")
+        for inserted in generate_orders(
+            options["orders"],
+            pizzas,
+            extras,
+            days=options["days"],
+            batch_size=options["batch_size"],
+            seed=options["seed"],
+        ):
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"{inserted} orders ({inserted / elapsed:.0f}/s)")
+        if inserted:
+            # Generated orders skip Order.save and with it the sales rollups.
+            # Nothing else writes orders while the data is populated
+            rebuild_rollups(quiet_seconds=0)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {inserted} orders in {time.monotonic() - started:.1f}s"
+            )
+        )
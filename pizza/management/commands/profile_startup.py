@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.startup import by_package, profile_startup
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the WSGI application in a fresh interpreter and report the "
+        "slowest imports and the time to a first response."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20, help="Rows per table.")
+        parser.add_argument(
+            "--module", help="Module holding the WSGI application, WSGI_APPLICATION by default."
+        )
+        parser.add_argument(
+            "--path",
+            default="/api/v1/pizza/",
+            help="Path of the first request, an empty value skips it.",
+        )
+        parser.add_argument(
+            "--warm-up", action="store_true", help="Run the worker warm-up before the request."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            records, timings = profile_startup(
+                options["module"], options["warm_up"], options["path"]
+            )
+        except RuntimeError as exc:
+            raise CommandError(f"The application failed to boot: {exc}")
+
+        limit = options["limit"]
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        slowest = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+        for record in slowest[:limit]:
+            self.stdout.write(
+                f"{record.cumulative_us / 1000:14.1f} {record.self_us / 1000:8.1f}  "
+                f"{'  ' * record.depth}{record.name}"
+            )
+
+        self.stdout.write(f"\n{'self ms':>14} {'modules':>8}  package")
+        counts = {}
+        for record in records:
+            package = record.name.partition(".")[0]
+            counts[package] = counts.get(package, 0) + 1
+        for package, self_us in by_package(records)[:limit]:
+            self.stdout.write(f"{self_us / 1000:14.1f} {counts[package]:8}  {package}")
+
+        self.stdout.write("")
+        for phase, seconds in timings.items():
+            self.stdout.write(f"{phase:>14}: {seconds * 1000:.1f} ms")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {len(records)} modules, ready in "
+                f"{sum(timings.values()) * 1000:.0f} ms."
+            )
+        )
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min, Sum
+
+from pizza.models import Extra, Pizza, StockShard
+from pizza.stock import reshard
+
+
+class Command(BaseCommand):
+    help = "Even out the stock shards of sharded pizzas and extras as they drain"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-fill",
+            type=float,
+            default=0.5,
+            help="Rebalance a product when a shard holds less than this "
+            "fraction of the mean shard quantity (0 rebalances all)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.STOCK_SHARDING:
+            raise CommandError(
+                "STOCK_SHARDING is off, merge sharded stock back with shard_stock --shards 0"
+            )
+        rebalanced = 0
+        for model in (Pizza, Extra):
+            products = model.objects.filter(stock_shards__gt=0).in_bulk()
+            fill = (
+                StockShard.objects.filter(kind=model.stock_kind, product_id__in=products)
+                .values("product_id")
+                .annotate(lowest=Min("quantity"), total=Sum("quantity"))
+            )
+            fill = {row["product_id"]: row for row in fill}
+            for pk, product in products.items():
+                row = fill.get(pk, {"lowest": 0, "total": 0})
+                mean = row["total"] / product.stock_shards
+                drained = row["lowest"] < options["min_fill"] * mean
+                if drained or product.quantity_in_stock or options["min_fill"] == 0:
+                    reshard(product, product.stock_shards)
+                    rebalanced += 1
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {rebalanced} products."))
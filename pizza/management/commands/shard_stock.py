@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.models import Extra, Pizza
+from pizza.stock import reshard
+
+MODELS = {"pizza": Pizza, "extra": Extra}
+
+
+class Command(BaseCommand):
+    help = "Split the stock of a pizza or extra across N counters, or merge it back"
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(MODELS))
+        parser.add_argument("id", type=int)
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=8,
+            help="Number of stock counters, 0 to merge them back into the product",
+        )
+
+    def handle(self, *args, **options):
+        if options["shards"] < 0:
+            raise CommandError("--shards cannot be negative")
+        if options["shards"] and not settings.STOCK_SHARDING:
+            raise CommandError(
+                "STOCK_SHARDING is off, sharded stock would not be read. "
+                "Turn it on first, or pass --shards 0 to merge shards back."
+            )
+        model = MODELS[options["kind"]]
+        try:
+            product = model.objects.get(pk=options["id"])
+        except model.DoesNotExist:
+            raise CommandError(f"{options['kind'].title()} {options['id']} not found")
+
+        product = reshard(product, options["shards"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{product.name}: stock spread over {product.stock_shards} shards."
+            )
+        )
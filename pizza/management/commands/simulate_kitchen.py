@@ -0,0 +1,84 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pizza.kitchen import simulate, simulated_orders
+
+POLICIES = ["fifo", "batched"]
+PARAMETERS = [
+    "hours",
+    "orders_per_hour",
+    "pizzas",
+    "capacity",
+    "oven_minutes",
+    "max_wait_minutes",
+    "seed",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate one oven working through a day of orders, baking them one "
+        "at a time in arrival order (fifo) and in batches per pizza (batched)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=float, default=8, help="Opening hours.")
+        parser.add_argument("--orders-per-hour", type=float, default=20)
+        parser.add_argument("--pizzas", type=int, default=12, help="Pizzas on the menu.")
+        parser.add_argument("--capacity", type=int, default=settings.KITCHEN_OVEN_CAPACITY)
+        parser.add_argument(
+            "--oven-minutes", type=float, default=settings.KITCHEN_OVEN_SECONDS / 60
+        )
+        parser.add_argument(
+            "--max-wait-minutes", type=float, default=settings.KITCHEN_MAX_WAIT / 60
+        )
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        if options["capacity"] < 1 or options["oven_minutes"] <= 0:
+            raise CommandError("--capacity and --oven-minutes must be positive.")
+
+        orders = list(
+            simulated_orders(
+                options["hours"], options["orders_per_hour"], options["pizzas"], options["seed"]
+            )
+        )
+        results = [
+            simulate(
+                orders,
+                policy,
+                options["capacity"],
+                options["oven_minutes"] * 60,
+                options["max_wait_minutes"] * 60,
+            )
+            for policy in POLICIES
+        ]
+
+        self.stdout.write(
+            f"{'policy':<8} {'orders':>7} {'runs':>6} {'batch':>6} {'pizzas/h':>9} "
+            f"{'p50 min':>8} {'p95 min':>8} {'max min':>8} {'late':>6} {'drain h':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['policy']:<8} {result['orders']:>7} {result['oven_runs']:>6} "
+                f"{result['avg_batch']:>6.1f} {result['pizzas_per_hour']:>9.1f} "
+                f"{result['wait_p50_min']:>8.1f} {result['wait_p95_min']:>8.1f} "
+                f"{result['wait_max_min']:>8.1f} {result['late_orders']:>6} "
+                f"{result['drain_hours']:>8.1f}"
+            )
+
+        if options["output"]:
+            report = {"parameters": {name: options[name] for name in PARAMETERS}}
+            with open(options["output"], "w") as f:
+                json.dump({**report, "results": results}, f, indent=2)
+
+        fifo, batched = results
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Simulated {len(orders)} orders: batching ran the oven "
+                f"{batched['oven_runs']} times instead of {fifo['oven_runs']}."
+            )
+        )
@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+
+from pizza.cache import menu_cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class QueryCounter:
+    """Database execute wrapper counting the queries it sees and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            with self._lock:
+                self.count += 1
+                self.seconds += time.perf_counter() - start
+
+
+class _ViewStats:
+    def __init__(self, buckets):
+        self.responses = {}
+        self.buckets = [0] * (len(buckets) + 1)
+        self.seconds = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+class RequestMetrics:
+    """Request counts, latency histograms and database cost per view."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bucket_bounds = tuple(buckets)
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def clear(self):
+        with self._lock:
+            self._views = {}
+
+    def observe(self, view, method, status, seconds, queries, db_seconds):
+        with self._lock:
+            stats = self._views.get((view, method))
+            if stats is None:
+                stats = self._views[(view, method)] = _ViewStats(self.bucket_bounds)
+            stats.responses[status] = stats.responses.get(status, 0) + 1
+            stats.buckets[bisect_left(self.bucket_bounds, seconds)] += 1
+            stats.seconds += seconds
+            stats.queries += queries
+            stats.db_seconds += db_seconds
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                "# TYPE usersnack_requests_total counter",
+                *(
+                    f"usersnack_requests_total{{{_labels(key, status=code)}}} {count}"
+                    for key, stats in views
+                    for code, count in sorted(stats.responses.items())
+                ),
+                "# TYPE usersnack_request_duration_seconds histogram",
+            ]
+            for key, stats in views:
+                labels = _labels(key)
+                total = 0
+                for bound, count in zip(self.bucket_bounds + ("+Inf",), stats.buckets):
+                    total += count
+                    lines.append(
+                        "usersnack_request_duration_seconds_bucket"
+                        f"{{{labels},le=\"{bound}\"}} {total}"
+                    )
+                lines.append(f"usersnack_request_duration_seconds_sum{{{labels}}} {stats.seconds}")
+                lines.append(f"usersnack_request_duration_seconds_count{{{labels}}} {total}")
+            lines.append("# TYPE usersnack_request_db_queries_total counter")
+            lines.extend(
+                f"usersnack_request_db_queries_total{{{_labels(key)}}} {stats.queries}"
+                for key, stats in views
+            )
+            lines.append("# TYPE usersnack_request_db_seconds_total counter")
+            lines.extend(
+                f"usersnack_request_db_seconds_total{{{_labels(key)}}} {stats.db_seconds}"
+                for key, stats in views
+            )
+        return lines
+
+
+def _labels(key, **extra):
+    view, method = key
+    labels = {"view": view, "method": method, **extra}
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+request_metrics = RequestMetrics()
+
+
+# The QueryCounter of the request being served. Context variables follow
+# the request into the threads sync_to_async runs its database work in
+_request_counter = ContextVar("request_counter", default=None)
+
+
+def _count_queries(execute, sql, params, many, context):
+    counter = _request_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    return counter(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Wrap every connection, whichever thread opens it, with ``_count_queries``."""
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+@contextmanager
+def _counting(counter):
+    """Count the queries the block runs, in this thread or the ones it hands work to."""
+    # Connections of this thread opened before the receiver was connected
+    for connection in connections.all():
+        install_query_counter(None, connection)
+    token = _request_counter.set(counter)
+    try:
+        yield
+    finally:
+        _request_counter.reset(token)
+
+
+class RequestMetricsMiddleware:
+    """
+    Record the latency and database cost of every request per view.
+
+    The query count and database time of the request are also left on it as
+    ``request.db_queries`` and ``request.db_seconds``. Requests over
+    ``REQUEST_QUERY_BUDGET`` queries or ``REQUEST_TIME_BUDGET_MS`` are logged
+    as warnings; a budget of 0 disables that check. Runs natively under both
+    WSGI and ASGI, so async views don't hold a thread while they wait; the
+    queries they run through ``sync_to_async`` are counted as well.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with _counting(counter):
+            response = self.get_response(request)
+        return self._record(request, response, counter, start)
+
+    async def __acall__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with _counting(counter):
+            response = await self.get_response(request)
+        return self._record(request, response, counter, start)
+
+    def _record(self, request, response, counter, start):
+        seconds = time.perf_counter() - start
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        request.db_queries = counter.count
+        request.db_seconds = counter.seconds
+        request_metrics.observe(
+            view, request.method, response.status_code, seconds, counter.count, counter.seconds
+        )
+        self._check_budget(request, view, counter, seconds)
+        return response
+
+    def _check_budget(self, request, view, counter, seconds):
+        query_budget = getattr(settings, "REQUEST_QUERY_BUDGET", 0)
+        time_budget = getattr(settings, "REQUEST_TIME_BUDGET_MS", 0) / 1000
+        if (query_budget and counter.count > query_budget) or (
+            time_budget and seconds > time_budget
+        ):
+            logger.warning(
+                "%s %s (%s) over budget: %d queries, %.1f ms, %.1f ms in the database",
+                request.method,
+                request.get_full_path(),
+                view,
+                counter.count,
+                seconds * 1000,
+                counter.seconds * 1000,
+            )
+
+
+def render_metrics():
+    """Render the process counters in the Prometheus text format."""
+    lines = []
+    for name, value in menu_cache.stats().items():
+        kind = "gauge" if name == "entries" else "counter"
+        metric = f"usersnack_menu_cache_{name}"
+        if kind == "counter":
+            metric += "_total"
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {value}")
+    lines.extend(request_metrics.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
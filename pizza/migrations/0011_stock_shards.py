@@ -0,0 +1,56 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pizza", "0010_rename_ingredient_pizza_ingredients"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="extra",
+            name="stock_shards",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="pizza",
+            name="stock_shards",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="StockShard",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[("pizza", "Pizza"), ("extra", "Extra")], max_length=10
+                    ),
+                ),
+                ("product_id", models.PositiveBigIntegerField()),
+                ("index", models.PositiveSmallIntegerField()),
+                ("quantity", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "product_id", "index"),
+                        name="unique_stock_shard",
+                    )
+                ],
+            },
+        ),
+    ]
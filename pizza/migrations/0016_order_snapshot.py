@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pizza", "0015_carts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="snapshot",
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.2 on 2026-10-18 15:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pizza", "0016_order_snapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("quantity", models.PositiveIntegerField(default=1)),
+                (
+                    "total_price",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("confirmed", "Confirmed"),
+                            ("preparing", "Preparing"),
+                            ("baking", "Baking"),
+                            ("ready", "Ready"),
+                            ("delivered", "Delivered"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("customer_name", models.CharField(max_length=100)),
+                ("delivery_address", models.TextField()),
+                ("snapshot", models.JSONField(blank=True, editable=False, null=True)),
+                ("created_at", models.DateTimeField()),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "cart",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="pizza.cart",
+                    ),
+                ),
+                (
+                    "pizza",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="pizza.pizza",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at", "-id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedOrderExtra",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "extra",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="pizza.extra"
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="pizza.archivedorder",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="archivedorder",
+            name="extras",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="+",
+                through="pizza.ArchivedOrderExtra",
+                to="pizza.extra",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="archivedorderextra",
+            constraint=models.UniqueConstraint(
+                fields=("order", "extra"), name="unique_archived_order_extra"
+            ),
+        ),
+    ]
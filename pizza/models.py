@@ -1,8 +1,11 @@
+from decimal import Decimal
+
 from django.db import models
 from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
 
 from generics.BaseModel import BaseModel
-from pizza.choices import DeliveryStatus
+from pizza.choices import DeliveryStatus, StockKind
 
 
 class Ingredient(BaseModel):
@@ -17,6 +20,10 @@ class Pizza(BaseModel):
     ingredients = models.ManyToManyField(Ingredient, blank=True)
     description = models.TextField(blank=True, null=True)
     is_available = models.BooleanField(default=True)
+    # When non-zero, stock lives in that many StockShard rows instead
+    stock_shards = models.PositiveSmallIntegerField(default=0)
+
+    stock_kind = StockKind.PIZZA
 
     def __str__(self):
         return self.name
@@ -27,12 +34,60 @@ class Extra(BaseModel):
     price = models.DecimalField(max_digits=6, decimal_places=2)
     quantity_in_stock = models.PositiveIntegerField(default=0)
     is_available = models.BooleanField(default=True)
+    # When non-zero, stock lives in that many StockShard rows instead
+    stock_shards = models.PositiveSmallIntegerField(default=0)
+
+    stock_kind = StockKind.EXTRA
 
     def __str__(self):
         return self.name
 
 
+class StockShard(BaseModel):
+    """One of the counters a hot product's stock is split across.
+
+    Orders take stock from a random shard so that concurrent orders for the
+    same product rarely update the same row.
+    """
+
+    kind = models.CharField(max_length=10, choices=StockKind)
+    product_id = models.PositiveBigIntegerField()
+    index = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "product_id", "index"], name="unique_stock_shard"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.product_id} shard {self.index}"
+
+
+class Cart(BaseModel):
+    """An order of several pizzas, each line of it an ``Order``.
+
+    Carts are created in one go by ``pizza.bulk.create_cart``; ``total_price``
+    is the sum of the line totals.
+    """
+
+    customer_name = models.CharField(max_length=100)
+    delivery_address = models.TextField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"Cart #{self.pk} - {self.customer_name}"
+
+
 class Order(BaseModel):
+    cart = models.ForeignKey(
+        Cart, on_delete=models.CASCADE, null=True, blank=True, related_name="lines"
+    )
     pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE)
     extras = models.ManyToManyField(Extra, blank=True)
     quantity = models.PositiveIntegerField(default=1)
@@ -42,41 +97,156 @@ class Order(BaseModel):
     status = models.CharField(max_length=20, choices=DeliveryStatus, default="pending")
     customer_name = models.CharField(max_length=100)
     delivery_address = models.TextField()
+    # Pizza, extras and prices as they were when the order was placed, see
+    # pizza/snapshots.py. The order list and detail are read from it alone.
+    snapshot = models.JSONField(null=True, blank=True, editable=False)
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # Keyset pagination over the order list, see pizza/pagination.py
+            models.Index(fields=["-created_at", "-id"], name="order_created_id_idx"),
+            models.Index(fields=["status", "-created_at"], name="order_status_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.pk} - {self.customer_name}"
 
     def calculate_total_price(self):
         """Calculate total price including pizza base price and extras"""
-        total = self.pizza.base_price * self.quantity
-        for extra in self.extras.all():
-            total += extra.price * self.quantity
-        return total
-
-    def save(self, *args, **kwargs):
+        from pizza.pricing import price_book
+
+        if self.snapshot:
+            return Decimal(self.snapshot["total_price"])
+        if "extras" in getattr(self, "_prefetched_objects_cache", {}):
+            extra_ids = [extra.pk for extra in self.extras.all()]
+        else:
+            extra_ids = self.extras.values_list("pk", flat=True)
+        return price_book.quote(
+            self.pizza_id, extra_ids, self.quantity, available_only=False
+        )
+
+    def save(self, *args, extras=(), **kwargs):
+        """Save the order, reserving stock for it when it is first inserted.
+
+        ``extras`` are the extras of a new order. Their stock is reserved
+        together with the pizza's and they are attached once the row exists,
+        which is written a single time with its total and snapshot.
+        """
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        from pizza.rollups import order_sales, record_sales
+        from pizza.snapshots import order_snapshot
+        from pizza.stock import reserve_stock
+
+        extras = list(extras)
         with transaction.atomic():
-            # Lock the pizza row
-            pizza = Pizza.objects.select_for_update().get(pk=self.pizza.pk)
-            pizza.quantity_in_stock -= self.quantity
-            if pizza.quantity_in_stock <= 0:
-                pizza.is_available = False
-            pizza.save(update_fields=["quantity_in_stock", "is_available"])
-
+            reserve_stock(Pizza, {self.pizza_id: self.quantity})
+            reserve_stock(Extra, {extra.pk: self.quantity for extra in extras})
+            if self.snapshot is None:
+                # Priced from the rows themselves rather than this worker's
+                # price book, which may not have seen a change made elsewhere
+                self.snapshot = order_snapshot(
+                    self.pizza_id,
+                    self.pizza,
+                    {extra.pk: extra for extra in extras},
+                    self.quantity,
+                    self.total_price or None,
+                )
             if not self.total_price:
-                super().save(*args, **kwargs)
-                self.total_price = self.calculate_total_price()
-                super().save(update_fields=["total_price"])
-            else:
-                super().save(*args, **kwargs)
-
-            for extra in self.extras.all():
-                extra.quantity_in_stock = extra.quantity_in_stock - self.quantity
-                extra.save(update_fields=["quantity_in_stock"])
-                extra.refresh_from_db()
-
-                if extra.quantity_in_stock <= 0:
-                    extra.is_available = False
-                    extra.save(update_fields=["is_available"])
+                self.total_price = Decimal(self.snapshot["total_price"])
+            super().save(*args, **kwargs)
+            if extras:
+                self.extras.add(*extras)
+            record_sales([order_sales(self, extras)])
+
+
+class ArchivedOrder(models.Model):
+    """A delivered or cancelled order moved out of the order table.
+
+    Rows keep the id and timestamps they had as an ``Order``, see
+    pizza/archive.py, and always carry their snapshot.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    cart = models.ForeignKey(
+        Cart, on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE, related_name="+")
+    extras = models.ManyToManyField(
+        Extra, through="ArchivedOrderExtra", blank=True, related_name="+"
+    )
+    quantity = models.PositiveIntegerField(default=1)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    status = models.CharField(max_length=20, choices=DeliveryStatus)
+    customer_name = models.CharField(max_length=100)
+    delivery_address = models.TextField()
+    snapshot = models.JSONField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return f"Archived order #{self.pk} - {self.customer_name}"
+
+
+class ArchivedOrderExtra(models.Model):
+    order = models.ForeignKey(ArchivedOrder, on_delete=models.CASCADE)
+    extra = models.ForeignKey(Extra, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["order", "extra"], name="unique_archived_order_extra")
+        ]
+
+
+class IdempotencyKey(BaseModel):
+    """Stored response of a request sent with an ``Idempotency-Key`` header.
+
+    A row without a ``status_code`` marks a request that is still running.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+
+    def __str__(self):
+        return self.key
+
+
+class DailyPizzaSales(BaseModel):
+    """Orders, units and revenue of one pizza on one day.
+
+    Kept up to date as orders are placed and cancelled, see pizza/rollups.py.
+    Revenue is the order totals, extras included.
+    """
+
+    day = models.DateField()
+    pizza = models.ForeignKey(Pizza, on_delete=models.CASCADE)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "pizza"], name="unique_pizza_sales_day")
+        ]
+
+
+class DailyExtraSales(BaseModel):
+    """Units and revenue of one extra on one day, see DailyPizzaSales."""
+
+    day = models.DateField()
+    extra = models.ForeignKey(Extra, on_delete=models.CASCADE)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "extra"], name="unique_extra_sales_day")
+        ]
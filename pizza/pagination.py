@@ -0,0 +1,111 @@
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class OrderPagination(PageNumberPagination):
+    """Order list pagination with a keyset mode for deep or large listings.
+
+    Sending a ``cursor`` parameter (empty for the first page) switches to
+    keyset pages ordered by ``(created_at, id)``, which cost the same at any
+    depth. In page-number mode, ``count=false`` skips the ``COUNT(*)``;
+    ``ORDER_LIST_EXACT_COUNT = False`` makes that the default.
+    """
+
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    ordering = ("-created_at", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if self.cursor_query_param in request.query_params:
+            self.mode = "cursor"
+            return self._paginate_keyset(queryset, request)
+        if not self._exact_count(request):
+            self.mode = "uncounted"
+            return self._paginate_uncounted(queryset, request)
+        self.mode = "page"
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.mode == "page":
+            return super().get_paginated_response(data)
+        return Response(
+            {"next": self.next_link, "previous": self.previous_link, "results": data}
+        )
+
+    def _exact_count(self, request):
+        value = request.query_params.get(self.count_query_param)
+        if value is None:
+            return getattr(settings, "ORDER_LIST_EXACT_COUNT", True)
+        return value.lower() not in ("0", "false", "no")
+
+    def _paginate_uncounted(self, queryset, request):
+        try:
+            page = int(request.query_params.get(self.page_query_param, 1))
+            if page < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound("Invalid page.")
+
+        offset = (page - 1) * self.page_size
+        rows = list(queryset[offset:offset + self.page_size + 1])
+        if not rows and page > 1:
+            raise NotFound("Invalid page.")
+
+        url = request.build_absolute_uri()
+        self.next_link = None
+        if len(rows) > self.page_size:
+            self.next_link = replace_query_param(url, self.page_query_param, page + 1)
+        self.previous_link = None
+        if page > 2:
+            self.previous_link = replace_query_param(
+                url, self.page_query_param, page - 1
+            )
+        elif page == 2:
+            self.previous_link = remove_query_param(url, self.page_query_param)
+        return rows[: self.page_size]
+
+    def _paginate_keyset(self, queryset, request):
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self._decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        self.previous_link = None
+        self.next_link = None
+        if len(rows) > self.page_size:
+            last = rows[self.page_size - 1]
+            if isinstance(last, dict):
+                # Page of values() rows, see pizza/readers.py
+                created_at, pk = last["created_at"], last["id"]
+            else:
+                created_at, pk = last.created_at, last.pk
+            self.next_link = replace_query_param(
+                request.build_absolute_uri(),
+                self.cursor_query_param,
+                self._encode_cursor(created_at, pk),
+            )
+        return rows[: self.page_size]
+
+    def _encode_cursor(self, created_at, pk):
+        raw = f"{created_at.isoformat()}|{pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    def _decode_cursor(self, cursor):
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
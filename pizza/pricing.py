@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+
+from pizza.cache import LRUCache, menu_cache
+from pizza.models import Pizza, Extra
+
+PizzaPrice = namedtuple("PizzaPrice", ["name", "base_price", "is_available"])
+ExtraPrice = namedtuple("ExtraPrice", ["name", "price", "is_available"])
+
+
+class PriceBook:
+    """In-memory table of pizza and extra prices.
+
+    The table is loaded with one query per model and follows the catalog
+    version of the menu cache, so the signals that invalidate cached menus
+    invalidate prices as well. Quotes are memoized on top of it.
+    """
+
+    # Least seconds between reloads for ids missing from the tables
+    reload_interval = 1.0
+
+    def __init__(self, max_quotes=1024):
+        self._lock = threading.Lock()
+        self._version = None
+        self._loaded_at = float("-inf")
+        self._pizzas = {}
+        self._extras = {}
+        # Ids looked up and not found, until the catalog version changes
+        self._unknown = (set(), set())
+        self._quotes = LRUCache(max_quotes)
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+            self._loaded_at = float("-inf")
+            self._pizzas = {}
+            self._extras = {}
+            self._unknown = (set(), set())
+        self._quotes.clear()
+
+    def load(self):
+        """Load the price tables now rather than on the first lookup."""
+        self._tables()
+
+    def lookup(self, pizza_ids=(), extra_ids=()):
+        """Return the ``(pizzas, extras)`` tables, having looked for the given ids.
+
+        Costs at most one reload however many ids are given, see
+        ``_tables_with``.
+        """
+        return self._tables_with(pizza_ids, extra_ids)
+
+    def pizza(self, pk):
+        """Return the ``PizzaPrice`` for ``pk`` or ``None`` if it doesn't exist."""
+        return self._tables_with(pizza_ids=[pk])[0].get(pk)
+
+    def extra(self, pk):
+        """Return the ``ExtraPrice`` for ``pk`` or ``None`` if it doesn't exist."""
+        return self._tables_with(extra_ids=[pk])[1].get(pk)
+
+    def quote(self, pizza_id, extra_ids=(), quantity=1, available_only=True):
+        """Price ``quantity`` pizzas with the given extras.
+
+        Unknown extras are ignored, as are unavailable ones unless
+        ``available_only`` is false. Raises ``Pizza.DoesNotExist`` for an
+        unknown pizza.
+        """
+        version = menu_cache.version
+        key = (version, pizza_id, tuple(sorted(set(extra_ids))), quantity, available_only)
+        total = self._quotes.get(key)
+        if total is not None:
+            return total
+
+        pizzas, extras = self._tables_with([pizza_id], key[2], version)
+        pizza = pizzas.get(pizza_id)
+        if pizza is None:
+            raise Pizza.DoesNotExist(f"Pizza {pizza_id} does not exist.")
+        total = line_price(pizza, extras, key[2], quantity, available_only)
+        self._quotes.set(key, total)
+        return total
+
+    def _tables_with(self, pizza_ids=(), extra_ids=(), version=None):
+        """Return the tables, reloaded if they lack any of the given ids.
+
+        Rows inserted without a catalog bump, by bulk_create or a process
+        whose bump this one missed, would otherwise stay unknown here until
+        the next change to the catalog. Reloads happen at most every
+        ``reload_interval`` seconds, and ids still missing afterwards are
+        remembered as unknown until the catalog version changes, so lookups
+        of ids that really don't exist cost no queries.
+        """
+        pizzas, extras = self._tables(version)
+        with self._lock:
+            missing_pizzas = set(pizza_ids) - pizzas.keys() - self._unknown[0]
+            missing_extras = set(extra_ids) - extras.keys() - self._unknown[1]
+        if not (missing_pizzas or missing_extras):
+            return pizzas, extras
+
+        if time.monotonic() - self._loaded_at >= self.reload_interval:
+            pizzas, extras = self._tables(version, reload=True)
+        with self._lock:
+            self._unknown[0].update(missing_pizzas - pizzas.keys())
+            self._unknown[1].update(missing_extras - extras.keys())
+        return pizzas, extras
+
+    def _tables(self, version=None, reload=False):
+        if version is None:
+            version = menu_cache.version
+        with self._lock:
+            if self._version == version and not reload:
+                return self._pizzas, self._extras
+
+        pizzas = {
+            pk: PizzaPrice(name, Decimal(base_price), is_available)
+            for pk, name, base_price, is_available in Pizza.objects.values_list(
+                "pk", "name", "base_price", "is_available"
+            )
+        }
+        extras = {
+            pk: ExtraPrice(name, Decimal(price), is_available)
+            for pk, name, price, is_available in Extra.objects.values_list(
+                "pk", "name", "price", "is_available"
+            )
+        }
+        with self._lock:
+            if self._version != version:
+                self._unknown = (set(), set())
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self._pizzas = pizzas
+            self._extras = extras
+        return pizzas, extras
+
+
+def line_price(pizza, extras, extra_ids, quantity, available_only=True):
+    """Price ``quantity`` of ``pizza`` with the ``extra_ids`` found in ``extras``.
+
+    ``pizza`` is a ``PizzaPrice`` and ``extras`` the price book's extra
+    table. Unknown extras are ignored, as are unavailable ones unless
+    ``available_only`` is false.
+    """
+    unit_price = pizza.base_price
+    for extra_id in set(extra_ids):
+        extra = extras.get(extra_id)
+        if extra is not None and (extra.is_available or not available_only):
+            unit_price += extra.price
+    return unit_price * quantity
+
+
+price_book = PriceBook(max_quotes=getattr(settings, "PRICE_BOOK_MAX_QUOTES", 1024))
@@ -0,0 +1,192 @@
+from operator import itemgetter
+
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from rest_framework.response import Response
+
+from pizza.models import ArchivedOrder, Extra, Ingredient, Order, Pizza
+from pizza.serializers import (
+    ArchivedOrderSerializer,
+    CartSerializer,
+    ExtraSerializer,
+    IngredientSerializer,
+    OrderSerializer,
+    PizzaDetailSerializer,
+    PizzaSerializer,
+)
+from pizza.snapshots import snapshots_of
+
+
+class RowReader:
+    """Render the output of ``serializer_class`` from ``values()`` rows.
+
+    Plain fields are formatted by the serializer's own fields, so the JSON is
+    the same, but without building model instances or walking DRF's field
+    machinery per object. Each name in ``nested`` is filled by a
+    ``get_<name>(rows)`` method returning ``{row id: value}``, which should
+    cost a fixed number of queries however many rows there are.
+    """
+
+    serializer_class = None
+    nested = ()
+    # Columns the nested lookups need besides the serialized ones
+    extra_columns = ()
+
+    def __init__(self):
+        self.fields = [
+            (name, None, None)
+            if name in self.nested
+            else (name, field.source, field.to_representation)
+            for name, field in self.serializer_class().fields.items()
+        ]
+
+    def values(self, queryset, **expressions):
+        columns = {source for _, source, _ in self.fields if source}
+        columns.update(self.extra_columns)
+        columns.add("id")
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .values(*sorted(columns), **expressions)
+        )
+
+    def render(self, rows):
+        nested = {name: getattr(self, f"get_{name}")(rows) for name in self.nested}
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, represent in self.fields:
+                if source is None:
+                    item[name] = nested[name][row["id"]]
+                else:
+                    value = row[source]
+                    item[name] = None if value is None else represent(value)
+            data.append(item)
+        return data
+
+    def render_grouped(self, queryset, key):
+        """Render ``queryset`` into ``{key value: [items]}``, keeping its order."""
+        rows = list(queryset)
+        groups = {}
+        for row, item in zip(rows, self.render(rows)):
+            groups.setdefault(row[key], []).append(item)
+        return groups
+
+
+class ExtraReader(RowReader):
+    serializer_class = ExtraSerializer
+
+
+class IngredientReader(RowReader):
+    serializer_class = IngredientSerializer
+
+
+class PizzaReader(RowReader):
+    serializer_class = PizzaSerializer
+    nested = ("ingredients",)
+
+    def get_ingredients(self, rows):
+        pizza_ids = [row["id"] for row in rows]
+        reader = IngredientReader()
+        groups = reader.render_grouped(
+            reader.values(
+                Ingredient.objects.filter(pizza__in=pizza_ids), owner_id=F("pizza")
+            ),
+            "owner_id",
+        )
+        return {pk: groups.get(pk, []) for pk in pizza_ids}
+
+
+class PizzaDetailReader(PizzaReader):
+    serializer_class = PizzaDetailSerializer
+    nested = ("ingredients", "available_extras")
+
+    def get_available_extras(self, rows):
+        reader = ExtraReader()
+        extras = reader.render(list(reader.values(Extra.objects.filter(is_available=True))))
+        return {row["id"]: extras for row in rows}
+
+
+class OrderReader(RowReader):
+    """Orders rendered from their snapshot column, without touching the catalog."""
+
+    serializer_class = OrderSerializer
+    nested = ("pizza", "extras", "unit_price")
+    extra_columns = ("snapshot",)
+
+    def render(self, rows):
+        missing = [row["id"] for row in rows if row["snapshot"] is None]
+        if missing:
+            snapshots = snapshots_of(missing)
+            for row in rows:
+                if row["snapshot"] is None:
+                    row["snapshot"] = snapshots[row["id"]]
+        return super().render(rows)
+
+    def get_pizza(self, rows):
+        return {row["id"]: row["snapshot"]["pizza"] for row in rows}
+
+    def get_extras(self, rows):
+        return {row["id"]: row["snapshot"]["extras"] for row in rows}
+
+    def get_unit_price(self, rows):
+        return {row["id"]: row["snapshot"]["unit_price"] for row in rows}
+
+
+class ArchivedOrderReader(OrderReader):
+    serializer_class = ArchivedOrderSerializer
+
+
+class CartReader(RowReader):
+    serializer_class = CartSerializer
+    nested = ("lines",)
+
+    def get_lines(self, rows):
+        # Lines archived since the cart was placed still belong to it
+        cart_ids = [row["id"] for row in rows]
+        groups = {}
+        for reader, model in ((OrderReader(), Order), (ArchivedOrderReader(), ArchivedOrder)):
+            lines = reader.render_grouped(
+                reader.values(
+                    model.objects.filter(cart__in=cart_ids).order_by("id"), owner_id=F("cart")
+                ),
+                "owner_id",
+            )
+            for pk, items in lines.items():
+                groups.setdefault(pk, []).extend(items)
+        return {
+            pk: sorted(groups.get(pk, []), key=itemgetter("id")) for pk in cart_ids
+        }
+
+
+class RowReadMixin:
+    """
+    Serve list and retrieve through the RowReader for the action in ``readers``
+    """
+
+    readers = {}
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        queryset = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(reader.render(page))
+        return Response(reader.render(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        reader = self.get_reader()
+        if reader is None:
+            return super().retrieve(request, *args, **kwargs)
+        queryset = reader.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(reader.render([row])[0])
+
+    def get_reader(self):
+        reader_class = self.readers.get(self.action)
+        return reader_class() if reader_class else None
@@ -0,0 +1,287 @@
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from pizza.choices import DeliveryStatus
+from pizza.models import ArchivedOrder, DailyExtraSales, DailyPizzaSales, Extra, Order
+
+# Longest date range one analytics request may cover
+MAX_REPORT_DAYS = 366
+
+# One order as the rollups see it, ``extras`` holds ``(extra_id, unit price)``
+SaleLine = namedtuple("SaleLine", "day pizza_id quantity total_price extras")
+
+_OUTPUT_FIELDS = {
+    "orders": IntegerField,
+    "units": IntegerField,
+    "revenue": lambda: DecimalField(max_digits=14, decimal_places=2),
+}
+
+
+class RollupsBusy(Exception):
+    """Raised when orders of the rebuilt days changed while they were rebuilt."""
+
+
+def order_sales(order, extras):
+    """Return the SaleLine of a saved ``order`` with its ``extras``.
+
+    Extras are priced from the order's snapshot when it has one.
+    """
+    if order.snapshot is not None:
+        priced = tuple(
+            (extra["id"], Decimal(extra["price"])) for extra in order.snapshot["extras"]
+        )
+    else:
+        priced = tuple((extra.pk, extra.price) for extra in extras)
+    return SaleLine(
+        timezone.localdate(order.created_at),
+        order.pizza_id,
+        order.quantity,
+        order.total_price or Decimal("0"),
+        priced,
+    )
+
+
+def sales_of(order_ids):
+    """Return the SaleLines of ``order_ids``, read with at most two queries.
+
+    Extras are priced from the snapshots, orders without one fall back to
+    the current extra prices.
+    """
+    orders = list(
+        Order.objects.filter(pk__in=order_ids).values_list(
+            "pk", "created_at", "pizza_id", "quantity", "total_price", "snapshot"
+        )
+    )
+    extras = defaultdict(list)
+    for pk, *_, snapshot in orders:
+        if snapshot is not None:
+            extras[pk] = [(extra["id"], Decimal(extra["price"])) for extra in snapshot["extras"]]
+    missing = [pk for pk, *_, snapshot in orders if snapshot is None]
+    if missing:
+        for order_id, extra_id, price in Order.extras.through.objects.filter(
+            order_id__in=missing
+        ).values_list("order_id", "extra_id", "extra__price"):
+            extras[order_id].append((extra_id, price))
+    return [
+        SaleLine(
+            timezone.localdate(created_at),
+            pizza_id,
+            quantity,
+            total_price or Decimal("0"),
+            tuple(extras[pk]),
+        )
+        for pk, created_at, pizza_id, quantity, total_price, _ in orders
+    ]
+
+
+def record_sales(lines, sign=1):
+    """Add the SaleLines to the daily rollups, or take them off with ``sign=-1``.
+
+    The deltas are applied once the caller's transaction commits, in a short
+    transaction of their own, so orders for the same pizza do not queue on
+    its rollup row while they hold their stock locks, and a rolled back
+    order is never counted. A process dying in between leaves the rollups
+    short until ``rebuild_rollups`` runs.
+    """
+    pizzas = defaultdict(lambda: {"orders": 0, "units": 0, "revenue": Decimal("0")})
+    extras = defaultdict(lambda: {"units": 0, "revenue": Decimal("0")})
+    for line in lines:
+        totals = pizzas[(line.day, line.pizza_id)]
+        totals["orders"] += sign
+        totals["units"] += sign * line.quantity
+        totals["revenue"] += sign * Decimal(line.total_price)
+        for extra_id, price in line.extras:
+            totals = extras[(line.day, extra_id)]
+            totals["units"] += sign * line.quantity
+            totals["revenue"] += sign * Decimal(price) * line.quantity
+
+    transaction.on_commit(lambda: _apply(pizzas, extras))
+
+
+def _apply(pizzas, extras):
+    with transaction.atomic():
+        _add(DailyPizzaSales, "pizza_id", pizzas)
+        _add(DailyExtraSales, "extra_id", extras)
+
+
+def _add(model, key, deltas, chunk_size=500):
+    """Add ``deltas`` of ``(day, product id) -> {field: delta}`` to ``model``.
+
+    Missing rows are inserted empty, then every row of a chunk is updated
+    with a single relative UPDATE so concurrent orders never lose a sale.
+    """
+    items = list(deltas.items())
+    now = timezone.now()
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        model.objects.bulk_create(
+            [model(day=day, **{key: pk}) for (day, pk), _ in chunk],
+            ignore_conflicts=True,
+        )
+        increments = {
+            field: Case(
+                *(
+                    When(day=day, **{key: pk}, then=Value(values[field]))
+                    for (day, pk), values in chunk
+                ),
+                default=Value(0),
+                output_field=_OUTPUT_FIELDS[field](),
+            )
+            for field in chunk[0][1]
+        }
+        model.objects.filter(
+            reduce(or_, (Q(day=day, **{key: pk}) for (day, pk), _ in chunk))
+        ).update(
+            updated_at=now,
+            **{field: F(field) + increment for field, increment in increments.items()},
+        )
+
+
+def rebuild_rollups(start=None, end=None, quiet_seconds=None):
+    """Recompute the rollups of the days from ``start`` to ``end`` from orders.
+
+    Both bounds are optional dates and included. Archived orders count like
+    the others. Extras are priced from the order snapshots like the
+    incremental updates, orders without a snapshot use the current prices.
+    Returns the number of pizza and extra rows written.
+
+    The days must be quiet: an order of those days placed or cancelled while
+    they are rebuilt would have its ``record_sales`` delta counted twice or
+    lost. Orders changed since ``quiet_seconds`` (``ROLLUP_QUIET_SECONDS``)
+    before the rebuild started, which covers deltas still on their way,
+    roll the rebuild back with ``RollupsBusy``.
+    """
+    if quiet_seconds is None:
+        quiet_seconds = settings.ROLLUP_QUIET_SECONDS
+    quiet_since = timezone.now() - timedelta(seconds=quiet_seconds)
+    changed = Order.objects.filter(updated_at__gte=quiet_since)
+    pizza_rows = DailyPizzaSales.objects.all()
+    extra_rows = DailyExtraSales.objects.all()
+    if start:
+        pizza_rows = pizza_rows.filter(day__gte=start)
+        extra_rows = extra_rows.filter(day__gte=start)
+        changed = changed.filter(created_at__date__gte=start)
+    if end:
+        pizza_rows = pizza_rows.filter(day__lte=end)
+        extra_rows = extra_rows.filter(day__lte=end)
+        changed = changed.filter(created_at__date__lte=end)
+
+    pizza_sales, extra_sales = {}, {}
+    for model in (Order, ArchivedOrder):
+        orders = model.objects.exclude(status=DeliveryStatus.CANCELLED)
+        order_extras = model.extras.through.objects.exclude(
+            order__status=DeliveryStatus.CANCELLED
+        )
+        if start:
+            orders = orders.filter(created_at__date__gte=start)
+            order_extras = order_extras.filter(order__created_at__date__gte=start)
+        if end:
+            orders = orders.filter(created_at__date__lte=end)
+            order_extras = order_extras.filter(order__created_at__date__lte=end)
+
+        _merge(
+            pizza_sales,
+            orders.annotate(day=TruncDate("created_at"))
+            .values("day", "pizza_id")
+            .annotate(orders=Count("id"), units=Sum("quantity"), revenue=Sum("total_price"))
+            .order_by(),
+            "pizza_id",
+        )
+        _merge(extra_sales, _snapshot_extra_sales(orders).values(), "extra_id")
+        _merge(
+            extra_sales,
+            order_extras.filter(order__snapshot__isnull=True)
+            .annotate(day=TruncDate("order__created_at"))
+            .values("day", "extra_id")
+            .annotate(
+                units=Sum("order__quantity"),
+                revenue=Sum(
+                    F("order__quantity") * F("extra__price"),
+                    output_field=_OUTPUT_FIELDS["revenue"](),
+                ),
+            )
+            .order_by(),
+            "extra_id",
+        )
+
+    with transaction.atomic():
+        pizza_rows.delete()
+        extra_rows.delete()
+        pizzas = DailyPizzaSales.objects.bulk_create(
+            [DailyPizzaSales(**row) for row in pizza_sales.values()], batch_size=1000
+        )
+        extras = DailyExtraSales.objects.bulk_create(
+            [DailyExtraSales(**row) for row in extra_sales.values()], batch_size=1000
+        )
+        if changed.exists():
+            raise RollupsBusy(
+                f"Orders of these days changed since {quiet_since:%Y-%m-%d %H:%M:%S}."
+            )
+    return len(pizzas), len(extras)
+
+
+def _snapshot_extra_sales(orders):
+    """Return the extra rows of the ``orders`` with a snapshot, by day and extra.
+
+    Extras deleted since are left out, as their order extras are.
+    """
+    existing = set(Extra.objects.values_list("pk", flat=True))
+    totals = {}
+    rows = (
+        orders.filter(snapshot__isnull=False)
+        .values_list("created_at", "quantity", "snapshot")
+        .iterator(chunk_size=2000)
+    )
+    for created_at, quantity, snapshot in rows:
+        day = timezone.localdate(created_at)
+        for extra in snapshot["extras"]:
+            if extra["id"] not in existing:
+                continue
+            total = totals.setdefault(
+                (day, extra["id"]),
+                {"day": day, "extra_id": extra["id"], "units": 0, "revenue": Decimal("0")},
+            )
+            total["units"] += quantity
+            total["revenue"] += Decimal(extra["price"]) * quantity
+    return totals
+
+
+def _merge(totals, rows, key):
+    """Add the ``rows`` of one table's sales to ``totals`` by day and ``key``."""
+    for row in rows:
+        total = totals.get((row["day"], row[key]))
+        if total is None:
+            totals[row["day"], row[key]] = dict(row)
+            continue
+        for field in _OUTPUT_FIELDS:
+            if field in row:
+                total[field] = (total[field] or 0) + (row[field] or 0)
+
+
+def sales_report(model, product, start, end, by_day=True):
+    """Return the rollup rows of ``model`` between two dates for the report.
+
+    ``product`` is the ``pizza`` or ``extra`` foreign key. Rows are per day
+    and product, or summed over the range per product without ``by_day``.
+    Sums are named ``<field>_sum``.
+    """
+    fields = [field.name for field in model._meta.fields if field.name in _OUTPUT_FIELDS]
+    group = ["day"] if by_day else []
+    group.append(f"{product}_id")
+    rows = (
+        model.objects.filter(day__range=(start, end))
+        .values(*group, **{f"{product}_name": F(f"{product}__name")})
+        .annotate(**{f"{field}_sum": Sum(field) for field in fields})
+    )
+    if by_day:
+        return rows.order_by("day", f"{product}_id")
+    return rows.order_by("-revenue_sum", f"{product}_id")
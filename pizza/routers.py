@@ -0,0 +1,114 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "usersnack_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Set for the duration of requests whose reads may be served by a replica
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def replicas():
+    return getattr(settings, "READ_REPLICAS", [])
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary within the block, whatever the request allows.
+
+    For reads whose result outlives the request, such as the menu cache
+    entries, which a lagging replica would fill with stale rows.
+    """
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Send the reads of replica-safe requests to a random read replica.
+
+    Everything else, writes, reads inside a transaction (such as the stock
+    locking in ``Order.save``), management commands and requests from a
+    client that wrote recently, uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        in_transaction = connections[DEFAULT_DB_ALIAS].in_atomic_block
+        if _replica_reads.get() and replicas() and not in_transaction:
+            return random.choice(replicas())
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe requests read from replicas, unless the client wrote within the
+    last ``REPLICA_STICKY_SECONDS`` and may not see its write there yet
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _replica_reads.set(_may_read_replicas(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return _stick_writers(request, response)
+
+    async def __acall__(self, request):
+        # The context variable follows the request into sync_to_async threads
+        token = _replica_reads.set(_may_read_replicas(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        return _stick_writers(request, response)
+
+
+def _may_read_replicas(request):
+    sticky_until = _parse_float(request.COOKIES.get(STICKY_COOKIE))
+    return request.method in SAFE_METHODS and sticky_until < time.time()
+
+
+def _stick_writers(request, response):
+    if request.method not in SAFE_METHODS and replicas():
+        seconds = getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{time.time() + seconds:.3f}",
+            max_age=seconds,
+            httponly=True,
+            samesite="Lax",
+        )
+    return response
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,182 @@
+import bisect
+import re
+import threading
+
+from django.db import transaction
+
+from pizza.cache import bump_version, read_version
+from pizza.models import Pizza
+
+SEARCH_VERSION_KEY = "pizza:search-version"
+# Pizza fields the index reads, along with the names of the ingredients
+SEARCHABLE_FIELDS = ("name", "description")
+
+TOKEN_RE = re.compile(r"\w+")
+NEGATIONS = {"no", "without"}
+
+# Weight of a query term found in each part of a pizza
+FIELD_WEIGHTS = {"name": 3.0, "ingredients": 2.0, "description": 1.0}
+# Share of the weight kept when a term only matches as a prefix
+PREFIX_WEIGHT = 0.5
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+def parse_query(query):
+    """Split a free-text query into search terms and excluded ingredients.
+
+    ``"veggie no onion"`` and ``"veggie -onion"`` both search for "veggie"
+    and exclude pizzas with an onion ingredient.
+    """
+    terms, excluded = [], []
+    negate = False
+    for word in (query or "").lower().split():
+        if word in NEGATIONS:
+            negate = True
+            continue
+        tokens = tokenize(word)
+        if word.startswith("-") or negate:
+            excluded.extend(tokens)
+        else:
+            terms.extend(tokens)
+        negate = False
+    return terms, excluded
+
+
+class MenuSearchIndex:
+    """In-memory inverted index over pizza names, descriptions and ingredients.
+
+    The index follows a version of its own, kept in the default cache next
+    to the catalog version and bumped by ``invalidate_search`` only when a
+    change reaches the indexed text: a pizza added, deleted or renamed, or
+    an ingredient change. It is rebuilt on the first search after any worker
+    or command made one. Prices, stock and availability are not indexed, so
+    their changes leave it alone; searches return ranked pizza ids, which
+    callers hydrate and filter from the database.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._version = None
+        self._postings = {}
+        self._tokens = []
+        self._documents = {}
+        self._ingredients = {}
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._postings = {}
+            self._tokens = []
+            self._documents = {}
+            self._ingredients = {}
+
+    def build(self, version=None):
+        # Read before the rows, a change racing the build triggers another
+        if version is None:
+            version = read_version(SEARCH_VERSION_KEY)
+        pizzas = Pizza.objects.prefetch_related("ingredients")
+        with self._lock:
+            self.clear()
+            for pizza in pizzas:
+                self._add(pizza)
+            self._version = version
+
+    def search(self, query="", include=(), exclude=()):
+        """Return ids of the pizzas matching ``query``, best match first.
+
+        Every query term must match a word of the pizza, the last one as a
+        prefix. ``include`` and ``exclude`` are ingredient terms the pizza
+        must or must not have; negated query terms are added to ``exclude``.
+        """
+        terms, excluded = parse_query(query)
+        include = [token for term in include for token in tokenize(term)]
+        exclude = [token for term in exclude for token in tokenize(term)] + excluded
+
+        version = read_version(SEARCH_VERSION_KEY)
+        with self._lock:
+            if self._version != version:
+                self.build(version)
+            scores = None
+            for position, term in enumerate(terms):
+                prefix = position == len(terms) - 1
+                matches = self._match(term, prefix)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {
+                        pk: score + matches[pk]
+                        for pk, score in scores.items()
+                        if pk in matches
+                    }
+            if scores is None:
+                scores = dict.fromkeys(self._documents, 0.0)
+
+            for term in include:
+                scores = {
+                    pk: score
+                    for pk, score in scores.items()
+                    if self._has_ingredient(pk, term)
+                }
+            for term in exclude:
+                scores = {
+                    pk: score
+                    for pk, score in scores.items()
+                    if not self._has_ingredient(pk, term)
+                }
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+    def _match(self, term, prefix):
+        """Return pizza id -> score for the pizzas with a word matching ``term``."""
+        if prefix:
+            start = bisect.bisect_left(self._tokens, term)
+            end = bisect.bisect_left(self._tokens, term + "\uffff")
+            tokens = self._tokens[start:end]
+        else:
+            tokens = [term] if term in self._postings else []
+
+        scores = {}
+        for token in tokens:
+            factor = 1.0 if token == term else PREFIX_WEIGHT
+            for pk, weight in self._postings[token].items():
+                scores[pk] = max(scores.get(pk, 0.0), weight * factor)
+        return scores
+
+    def _has_ingredient(self, pizza_id, term):
+        return any(token.startswith(term) for token in self._ingredients[pizza_id])
+
+    def _add(self, pizza):
+        weights = {}
+        ingredient_tokens = set()
+        for ingredient in pizza.ingredients.all():
+            ingredient_tokens.update(tokenize(ingredient.name))
+        fields = {
+            "name": tokenize(pizza.name),
+            "ingredients": ingredient_tokens,
+            "description": tokenize(pizza.description),
+        }
+        for field, tokens in fields.items():
+            for token in tokens:
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+            self._postings[token][pizza.pk] = weight
+        self._documents[pizza.pk] = set(weights)
+        self._ingredients[pizza.pk] = ingredient_tokens
+
+
+search_index = MenuSearchIndex()
+
+
+def invalidate_search():
+    """Have every worker rebuild its index, now and once the transaction commits.
+
+    Bumped twice for the reason given in ``invalidate_catalog``.
+    """
+    bump_version(SEARCH_VERSION_KEY)
+    transaction.on_commit(lambda: bump_version(SEARCH_VERSION_KEY))
@@ -1,8 +1,14 @@
 from typing import List
 
+from django.db import models
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from pizza.models import Pizza, Extra, Order, Ingredient
+from pizza.choices import DeliveryStatus
+from pizza.models import ArchivedOrder, Cart, Pizza, Extra, Order, Ingredient
+from pizza.snapshots import fill_snapshots
+from pizza.stock import stock_levels
+from pizza.transitions import can_transition, transition_orders
 
 
 class ExtraSerializer(serializers.ModelSerializer):
@@ -41,7 +47,10 @@ class CalculateOrderAmountSerializer(serializers.Serializer):
         help_text="List of extra item IDs to include.",
     )
     quantity = serializers.IntegerField(
-        default=1, min_value=1, help_text="Quantity of the pizza."
+        default=1,
+        min_value=1,
+        help_text="Quantity of the pizza.",
+        error_messages={"min_value": "Quantity must be at least 1"},
     )
 
     pizza_id = serializers.IntegerField(read_only=True)
@@ -54,6 +63,24 @@ class CalculateOrderAmountSerializer(serializers.Serializer):
     )
 
 
+class QuoteLineSerializer(CalculateOrderAmountSerializer):
+    pizza_id = serializers.IntegerField(help_text="ID of the pizza to quote.")
+    extras_ids = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    errors = serializers.DictField(read_only=True)
+
+
+class BatchQuoteSerializer(serializers.Serializer):
+    lines = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=100,
+        help_text="Cart lines, each with pizza_id, extras and quantity.",
+    )
+    total_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
+
+
 class PizzaDetailSerializer(serializers.ModelSerializer):
     available_extras = serializers.SerializerMethodField()
     ingredients = IngredientSerializer(many=True, read_only=True)
@@ -96,9 +123,15 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ("id", "created_at")
 
+    def create(self, validated_data):
+        extras = validated_data.pop("extras", [])
+        order = Order(**validated_data)
+        order.save(extras=extras)
+        return order
+
     def get_calculated_total(self, obj) -> float:
         if obj.pk:
-            return obj.calculate_total_price()
+            return obj.total_price or obj.calculate_total_price()
         return None
 
     def validate_quantity(self, value):
@@ -107,7 +140,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         return value
 
     def validate_pizza(self, value):
-        if not value.is_available or value.quantity_in_stock <= 0:
+        if not value.is_available or stock_levels(Pizza, [value])[value.pk] <= 0:
             raise serializers.ValidationError("This pizza is currently unavailable")
         return value
 
@@ -126,14 +159,16 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         quantity = attrs.get("quantity", 1)
 
         # Ensure enough pizza in stock
-        if pizza and pizza.quantity_in_stock < quantity:
+        pizza_stock = stock_levels(Pizza, [pizza])[pizza.pk] if pizza else 0
+        if pizza and pizza_stock < quantity:
             raise serializers.ValidationError(
-                f"Only {pizza.quantity_in_stock} pizzas left in stock."
+                f"Only {pizza_stock} pizzas left in stock."
             )
 
         # Ensure enough of each extra in stock
+        extra_stock = stock_levels(Extra, extras)
         low_stock_extras = [
-            extra for extra in extras if extra.quantity_in_stock < quantity
+            extra for extra in extras if extra_stock[extra.pk] < quantity
         ]
         if low_stock_extras:
             names = [extra.name for extra in low_stock_extras]
@@ -144,17 +179,74 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         return attrs
 
 
+class BulkOrderRowSerializer(serializers.ModelSerializer):
+    pizza = serializers.IntegerField()
+    extras = serializers.ListField(child=serializers.IntegerField(), required=False)
+    quantity = serializers.IntegerField(
+        default=1,
+        min_value=1,
+        error_messages={"min_value": "Quantity must be at least 1"},
+    )
+
+    class Meta:
+        model = Order
+        fields = ["pizza", "extras", "quantity", "customer_name", "delivery_address"]
+
+
+class BulkOrderSerializer(serializers.Serializer):
+    orders = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=1000,
+        help_text="Orders in the same shape as a single order create.",
+    )
+    atomic = serializers.BooleanField(
+        default=True,
+        help_text="Reject the whole batch when any order is invalid.",
+    )
+
+
+class OrderedPizzaSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    base_price = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+
+class OrderedExtraSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    price = serializers.DecimalField(max_digits=6, decimal_places=2)
+
+
+class OrderListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        orders = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        return super().to_representation(fill_snapshots(orders))
+
+
 class OrderSerializer(serializers.ModelSerializer):
-    pizza = PizzaSerializer(read_only=True)
-    extras = ExtraSerializer(many=True, read_only=True)
+    """An order as it was placed, read from its snapshot only.
+
+    Orders placed before snapshots existed get one built on the fly from the
+    current catalog until ``backfill_order_snapshots`` has stored theirs.
+    """
+
+    pizza = OrderedPizzaSerializer(source="snapshot.pizza", read_only=True)
+    extras = OrderedExtraSerializer(source="snapshot.extras", many=True, read_only=True)
+    unit_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, source="snapshot.unit_price", read_only=True
+    )
+    cart = serializers.IntegerField(source="cart_id", read_only=True)
 
     class Meta:
         model = Order
         fields = [
             "id",
+            "cart",
             "pizza",
             "extras",
             "quantity",
+            "unit_price",
             "total_price",
             "status",
             "customer_name",
@@ -163,3 +255,109 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ("id", "created_at", "updated_at")
+        list_serializer_class = OrderListSerializer
+
+    def to_representation(self, instance):
+        fill_snapshots([instance])
+        return super().to_representation(instance)
+
+    def validate_status(self, value):
+        if self.instance and value != self.instance.status:
+            if not can_transition(self.instance.status, value):
+                raise serializers.ValidationError(
+                    f"Cannot move a {self.instance.status} order to {value}."
+                )
+        return value
+
+    def update(self, instance, validated_data):
+        status = validated_data.pop("status", instance.status)
+        instance = super().update(instance, validated_data)
+        if status != instance.status:
+            transition_orders([instance.pk], status)
+            instance.refresh_from_db(fields=["status", "updated_at"])
+        return instance
+
+
+class ArchivedOrderSerializer(OrderSerializer):
+    class Meta(OrderSerializer.Meta):
+        model = ArchivedOrder
+        read_only_fields = OrderSerializer.Meta.fields
+
+
+class KitchenBatchSerializer(serializers.Serializer):
+    pizza = PizzaSerializer()
+    units = serializers.IntegerField(help_text="Pizzas to bake in this oven run.")
+    orders = OrderSerializer(many=True)
+
+
+class CartCreateSerializer(serializers.Serializer):
+    customer_name = serializers.CharField(max_length=100)
+    delivery_address = serializers.CharField()
+    lines = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=50,
+        help_text="Pizza lines, each with pizza, extras and quantity.",
+    )
+
+    def create(self, validated_data):
+        from pizza.bulk import create_cart
+
+        cart, results = create_cart(**validated_data)
+        if cart is None:
+            raise serializers.ValidationError(
+                {"lines": [result.get("errors", {}) for result in results]}
+            )
+        return Cart.objects.prefetch_related(cart_lines()).get(pk=cart.pk)
+
+    def to_representation(self, instance):
+        return CartSerializer(instance).data
+
+
+def cart_lines():
+    """Prefetch the lines of carts in the order they were placed."""
+    return Prefetch("lines", queryset=Order.objects.order_by("id"))
+
+
+class CartSerializer(serializers.ModelSerializer):
+    lines = OrderSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Cart
+        fields = [
+            "id",
+            "customer_name",
+            "delivery_address",
+            "total_price",
+            "lines",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=1000
+    )
+    status = serializers.ChoiceField(choices=DeliveryStatus.choices)
+
+
+class PizzaSalesSerializer(serializers.Serializer):
+    day = serializers.DateField(required=False)
+    pizza_id = serializers.IntegerField()
+    pizza_name = serializers.CharField()
+    orders = serializers.IntegerField(source="orders_sum")
+    units = serializers.IntegerField(source="units_sum")
+    revenue = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="revenue_sum"
+    )
+
+
+class ExtraSalesSerializer(serializers.Serializer):
+    day = serializers.DateField(required=False)
+    extra_id = serializers.IntegerField()
+    extra_name = serializers.CharField()
+    units = serializers.IntegerField(source="units_sum")
+    revenue = serializers.DecimalField(
+        max_digits=14, decimal_places=2, source="revenue_sum"
+    )
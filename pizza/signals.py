@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from pizza.cache import invalidate_catalog
+from pizza.events import order_events
+from pizza.kitchen import QUEUED_STATUSES, kitchen_scheduler
+from pizza.models import Extra, Ingredient, Order, Pizza
+from pizza.search import SEARCHABLE_FIELDS, invalidate_search
+
+# Sent once committed with ``order_ids`` that moved to ``status``
+order_status_changed = Signal()
+# Sent once committed with the new ``orders``, saved one by one or in bulk
+orders_placed = Signal()
+
+
+@receiver(post_save, sender=Pizza)
+@receiver(post_delete, sender=Pizza)
+@receiver(post_save, sender=Extra)
+@receiver(post_delete, sender=Extra)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(m2m_changed, sender=Pizza.ingredients.through)
+def catalog_changed(sender, **kwargs):
+    """Bump the catalog version whenever menu data changes.
+
+    The menu cache and the price book follow it.
+    """
+    invalidate_catalog()
+
+
+@receiver(pre_save, sender=Pizza)
+def note_search_changes(sender, instance, update_fields=None, **kwargs):
+    """Record on ``instance`` whether the save changes text the search index reads.
+
+    Costs one query when an existing pizza is saved with its searchable
+    fields, so that price and stock changes don't rebuild every index.
+    """
+    fields = SEARCHABLE_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    if instance._state.adding or not fields:
+        instance._search_changed = instance._state.adding
+        return
+    stored = Pizza.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._search_changed = stored is None or any(
+        stored[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=Pizza)
+def pizza_saved(sender, instance, **kwargs):
+    if getattr(instance, "_search_changed", True):
+        invalidate_search()
+
+
+@receiver(post_delete, sender=Pizza)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(m2m_changed, sender=Pizza.ingredients.through)
+def search_changed(sender, **kwargs):
+    invalidate_search()
+
+
+@receiver(order_status_changed)
+def publish_order_status(sender, order_ids, status, **kwargs):
+    for order_id in order_ids:
+        order_events.publish(order_id, status)
+
+
+@receiver(order_status_changed)
+def dequeue_kitchen_orders(sender, order_ids, status, **kwargs):
+    if status not in QUEUED_STATUSES:
+        kitchen_scheduler.discard(order_ids)
+
+
+@receiver(orders_placed)
+def publish_placed_orders(sender, orders, **kwargs):
+    for order in orders:
+        order_events.publish(order.pk, order.status)
+
+
+@receiver(orders_placed)
+def queue_kitchen_orders(sender, orders, **kwargs):
+    for order in orders:
+        kitchen_scheduler.add(order)
+
+
+@receiver(post_save, sender=Order)
+def order_created(sender, instance, created, **kwargs):
+    # bulk_create sends no post_save, pizza/bulk.py sends orders_placed itself
+    if created:
+        transaction.on_commit(lambda: orders_placed.send(sender=Order, orders=[instance]))
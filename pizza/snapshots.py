@@ -0,0 +1,91 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from pizza.models import Order
+
+
+def money(value):
+    return f"{Decimal(value):.2f}"
+
+
+def order_snapshot(pizza_id, pizza, extras, quantity, total_price=None):
+    """Return the priced snapshot stored in ``Order.snapshot``.
+
+    ``pizza`` has a ``name`` and ``base_price`` and ``extras`` maps extra ids
+    to objects with a ``name`` and ``price``, model instances and the price
+    book's tuples alike. ``total_price`` defaults to the unit price times
+    ``quantity``.
+    """
+    unit_price = Decimal(pizza.base_price) + sum(
+        (Decimal(extra.price) for extra in extras.values()), Decimal("0")
+    )
+    if total_price is None:
+        total_price = unit_price * quantity
+    return {
+        "pizza": {"id": pizza_id, "name": pizza.name, "base_price": money(pizza.base_price)},
+        "extras": [
+            {"id": pk, "name": extra.name, "price": money(extra.price)}
+            for pk, extra in sorted(extras.items())
+        ],
+        "unit_price": money(unit_price),
+        "total_price": money(total_price),
+    }
+
+
+class _Priced:
+    def __init__(self, name, price):
+        self.name = name
+        self.base_price = self.price = price
+
+
+def snapshots_of(order_ids):
+    """Build the snapshots of already placed orders with two queries.
+
+    Their prices at the time are gone, so the current ones are used; the
+    stored order total is kept as the snapshot's total.
+    """
+    extras = defaultdict(dict)
+    for order_id, extra_id, name, price in Order.extras.through.objects.filter(
+        order_id__in=order_ids
+    ).values_list("order_id", "extra_id", "extra__name", "extra__price"):
+        extras[order_id][extra_id] = _Priced(name, price)
+
+    rows = Order.objects.filter(pk__in=order_ids).values_list(
+        "pk", "pizza_id", "pizza__name", "pizza__base_price", "quantity", "total_price"
+    )
+    return {
+        pk: order_snapshot(pizza_id, _Priced(name, price), extras[pk], quantity, total)
+        for pk, pizza_id, name, price, quantity, total in rows
+    }
+
+
+def fill_snapshots(orders):
+    """Give the orders without a snapshot one from ``snapshots_of``, unsaved."""
+    missing = [order for order in orders if order.snapshot is None]
+    if missing:
+        snapshots = snapshots_of([order.pk for order in missing])
+        for order in missing:
+            order.snapshot = snapshots[order.pk]
+    return orders
+
+
+def backfill_snapshots(batch_size=1000):
+    """Store snapshots on every order without one, ``batch_size`` at a time.
+
+    Orders are walked by id, so an interrupted run picks up where it stopped.
+    Yields the number of orders updated after each batch.
+    """
+    pending = Order.objects.filter(snapshot__isnull=True).order_by("pk")
+    last_id, updated = 0, 0
+    while True:
+        order_ids = list(pending.filter(pk__gt=last_id).values_list("pk", flat=True)[:batch_size])
+        if not order_ids:
+            return
+        snapshots = snapshots_of(order_ids)
+        Order.objects.bulk_update(
+            [Order(pk=pk, snapshot=snapshot) for pk, snapshot in snapshots.items()],
+            ["snapshot"],
+        )
+        last_id = order_ids[-1]
+        updated += len(snapshots)
+        yield updated
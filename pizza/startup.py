@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+from django.urls import get_resolver
+
+from pizza.pricing import price_book
+from pizza.search import search_index
+
+logger = logging.getLogger("pizza.startup")
+
+ImportRecord = namedtuple("ImportRecord", ["name", "depth", "self_us", "cumulative_us"])
+
+# Endpoints requested by warm_up() so their menu cache entries exist
+WARM_UP_URLS = ["pizza-list", "extra-list"]
+
+# Run in a fresh interpreter by profile_startup(), prints phase timings as JSON
+_BOOT_SCRIPT = """
+import json, sys, time
+from importlib import import_module
+
+timings = {}
+started = time.perf_counter()
+application = import_module(sys.argv[1]).application
+timings["application"] = time.perf_counter() - started
+
+from django.urls import get_resolver
+mark = time.perf_counter()
+get_resolver().url_patterns
+timings["urls"] = time.perf_counter() - mark
+
+if sys.argv[2]:
+    from pizza.startup import warm_up
+    mark = time.perf_counter()
+    warm_up()
+    timings["warm_up"] = time.perf_counter() - mark
+
+if sys.argv[3]:
+    from django.conf import settings
+    from django.test import Client
+    client = Client(HTTP_HOST=sys.argv[4], secure=settings.SECURE_SSL_REDIRECT)
+    mark = time.perf_counter()
+    status = client.get(sys.argv[3]).status_code
+    timings["first_request"] = time.perf_counter() - mark
+    if status != 200:
+        sys.exit(f"GET {sys.argv[3]} returned {status}")
+
+print(json.dumps(timings))
+"""
+
+
+def parse_importtime(lines):
+    """Yield an ``ImportRecord`` per line of ``python -X importtime`` output."""
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        yield ImportRecord(name.strip(), depth, int(self_us), int(cumulative_us))
+
+
+def by_package(records):
+    """Sum the self time of ``records`` per top-level package, slowest first."""
+    totals = defaultdict(int)
+    for record in records:
+        totals[record.name.partition(".")[0]] += record.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile_startup(module=None, warm=False, path=None):
+    """Boot the WSGI application in a fresh interpreter.
+
+    Returns the import records and the seconds spent importing the
+    application, loading the URLconf, warming up (``warm``) and serving a
+    first GET of ``path``.
+    """
+    module = module or settings.WSGI_APPLICATION.rpartition(".")[0]
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            _BOOT_SCRIPT,
+            module,
+            "1" if warm else "",
+            path or "",
+            _host(),
+        ],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=settings.BASE_DIR.parent,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    records = list(parse_importtime(result.stderr.splitlines()))
+    return records, json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def warm_up():
+    """Prepare this process for traffic before it accepts any.
+
+    Opens the database connections, loads the URLconf, the price book and the
+    search index, and renders the menu and extras into the menu cache for the
+    first of ``ALLOWED_HOSTS``.
+    """
+    started = time.monotonic()
+    for alias in connections:
+        connections[alias].ensure_connection()
+    resolver = get_resolver()
+    price_book.load()
+    search_index.build()
+
+    client = Client(HTTP_HOST=_host(), secure=getattr(settings, "SECURE_SSL_REDIRECT", False))
+    for name in WARM_UP_URLS:
+        # Without the script prefix reverse() adds once a request was served
+        response = client.get("/" + resolver.reverse(name))
+        if response.status_code != 200:
+            logger.warning("Warm-up request to %s returned %s", name, response.status_code)
+    logger.info("Warmed up in %.0f ms", (time.monotonic() - started) * 1000)
+
+
+def _host():
+    hosts = [host for host in settings.ALLOWED_HOSTS if not host.startswith((".", "*"))]
+    return hosts[0] if hosts else "localhost"
@@ -0,0 +1,218 @@
+import random
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, Value, When
+
+from pizza.cache import invalidate_catalog
+from pizza.exceptions import InsufficientStock
+from pizza.models import StockShard
+
+
+def reserve_stock(model, quantities):
+    """Take ``quantities`` (pk -> units) out of ``model`` stock.
+
+    All rows are decremented by a single conditional UPDATE that only matches
+    rows with enough stock left and flips ``is_available`` off, in the same
+    write, on the rows it sells out. No row lock is held beyond that statement.
+    Products with sharded stock take their units from one of their shards.
+
+    Raises InsufficientStock, leaving every row untouched, when any of them
+    falls short.
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty}
+    if not quantities:
+        return
+
+    with transaction.atomic():
+        for pk in _sharded(model, quantities):
+            _reserve_from_shards(model, pk, quantities.pop(pk))
+        if quantities:
+            _reserve_rows(model, quantities)
+
+
+def release_stock(model, quantities):
+    """Put ``quantities`` (pk -> units) back into ``model`` stock.
+
+    Rows are restocked with a single UPDATE; rows that had sold out become
+    available again.
+    """
+    quantities = {pk: qty for pk, qty in quantities.items() if qty}
+    if not quantities:
+        return
+
+    with transaction.atomic():
+        for pk in _sharded(model, quantities):
+            _release_to_shards(model, pk, quantities.pop(pk))
+        if not quantities:
+            return
+        sold_out = model.objects.filter(pk__in=quantities, quantity_in_stock=0).exists()
+        model.objects.filter(pk__in=quantities).update(
+            is_available=Case(
+                When(quantity_in_stock=0, then=Value(True)),
+                default=F("is_available"),
+            ),
+            quantity_in_stock=Case(
+                *(
+                    When(pk=pk, then=F("quantity_in_stock") + qty)
+                    for pk, qty in quantities.items()
+                ),
+            ),
+        )
+        if sold_out:
+            invalidate_catalog()
+
+
+def stock_levels(model, products):
+    """Return pk -> units in stock for ``products``.
+
+    Sharded products are summed over their shards in a single query.
+    """
+    products = list(products)
+    levels = {product.pk: product.quantity_in_stock for product in products}
+    sharded = [product.pk for product in products if product.stock_shards]
+    if sharded and settings.STOCK_SHARDING:
+        totals = (
+            StockShard.objects.filter(kind=model.stock_kind, product_id__in=sharded)
+            .values("product_id")
+            .annotate(total=Sum("quantity"))
+            .values_list("product_id", "total")
+        )
+        levels.update({pk: 0 for pk in sharded})
+        levels.update(totals)
+    return levels
+
+
+def reshard(product, shards):
+    """Spread the stock of ``product`` evenly over ``shards`` counters.
+
+    Stock added to ``quantity_in_stock`` since the product was sharded is
+    folded into the shards, and ``is_available`` is set from the total.
+    With ``shards=0`` the stock moves back into ``quantity_in_stock``, the
+    only move allowed without ``STOCK_SHARDING``: the shards would not be
+    read, leaving the product listed yet out of stock for every order.
+    """
+    if shards and not settings.STOCK_SHARDING:
+        raise ImproperlyConfigured("Stock cannot be sharded with STOCK_SHARDING off.")
+    model = type(product)
+    existing = StockShard.objects.filter(kind=model.stock_kind, product_id=product.pk)
+    with transaction.atomic():
+        product = model.objects.select_for_update().get(pk=product.pk)
+        locked = list(existing.select_for_update())
+        total = product.quantity_in_stock + sum(shard.quantity for shard in locked)
+        existing.delete()
+
+        base, remainder = divmod(total, shards) if shards else (0, 0)
+        StockShard.objects.bulk_create(
+            StockShard(
+                kind=model.stock_kind,
+                product_id=product.pk,
+                index=index,
+                quantity=base + (index < remainder),
+            )
+            for index in range(shards)
+        )
+        product.stock_shards = shards
+        product.quantity_in_stock = 0 if shards else total
+        product.is_available = total > 0
+        product.save(update_fields=["stock_shards", "quantity_in_stock", "is_available"])
+    return product
+
+
+def _reserve_rows(model, quantities):
+    enough = reduce(
+        or_, (Q(pk=pk, quantity_in_stock__gte=qty) for pk, qty in quantities.items())
+    )
+    # is_available goes first: MySQL evaluates SET clauses left to right
+    updated = model.objects.filter(enough).update(
+        is_available=Case(
+            *(
+                When(pk=pk, quantity_in_stock=qty, then=Value(False))
+                for pk, qty in quantities.items()
+            ),
+            default=F("is_available"),
+        ),
+        quantity_in_stock=Case(
+            *(
+                When(pk=pk, then=F("quantity_in_stock") - qty)
+                for pk, qty in quantities.items()
+            ),
+        ),
+    )
+    if updated < len(quantities):
+        raise InsufficientStock(_shortage_message(model, quantities))
+
+    # Every row matched, so any row now at zero was sold out by this write
+    if model.objects.filter(pk__in=quantities, quantity_in_stock=0).exists():
+        invalidate_catalog()
+
+
+def _sharded(model, pks):
+    if not settings.STOCK_SHARDING:
+        return []
+    return list(
+        model.objects.filter(pk__in=pks, stock_shards__gt=0).values_list("pk", flat=True)
+    )
+
+
+def _reserve_from_shards(model, pk, qty):
+    shards = StockShard.objects.filter(kind=model.stock_kind, product_id=pk)
+    candidates = list(shards.filter(quantity__gte=qty).values_list("pk", flat=True))
+    random.shuffle(candidates)
+    for shard_pk in candidates:
+        shard = shards.filter(pk=shard_pk)
+        if shard.filter(quantity__gte=qty).update(quantity=F("quantity") - qty):
+            if shard.filter(quantity=0).exists():
+                _mark_sold_out(model, pk, shards)
+            return
+
+    # No single shard holds enough: take the units across all of them
+    locked = list(shards.select_for_update().order_by("index"))
+    if sum(shard.quantity for shard in locked) < qty:
+        raise InsufficientStock(
+            _shortage_message(model, {pk: qty}, {pk: sum(s.quantity for s in locked)})
+        )
+    remaining = qty
+    for shard in locked:
+        taken = min(shard.quantity, remaining)
+        if taken:
+            shards.filter(pk=shard.pk).update(quantity=F("quantity") - taken)
+            remaining -= taken
+        if not remaining:
+            break
+    _mark_sold_out(model, pk, shards)
+
+
+def _release_to_shards(model, pk, qty):
+    shards = StockShard.objects.filter(kind=model.stock_kind, product_id=pk)
+    emptiest = shards.order_by("quantity").values_list("pk", flat=True).first()
+    if emptiest is None:
+        return
+    shards.filter(pk=emptiest).update(quantity=F("quantity") + qty)
+    if model.objects.filter(pk=pk, is_available=False).update(is_available=True):
+        invalidate_catalog()
+
+
+def _mark_sold_out(model, pk, shards):
+    if shards.filter(quantity__gt=0).exists():
+        return
+    if model.objects.filter(pk=pk, is_available=True).update(is_available=False):
+        invalidate_catalog()
+
+
+def _shortage_message(model, quantities, levels=None):
+    rows = model.objects.filter(pk__in=quantities).values_list(
+        "pk", "name", "quantity_in_stock"
+    )
+    stock = {pk: (name, in_stock) for pk, name, in_stock in rows}
+    if levels:
+        stock.update({pk: (stock[pk][0], level) for pk, level in levels.items()})
+    short = [
+        stock.get(pk, (str(pk), 0))[0]
+        for pk, qty in quantities.items()
+        if stock.get(pk, (None, 0))[1] < qty
+    ]
+    return f"Insufficient stock for {model._meta.verbose_name_plural}: {', '.join(short)}"
@@ -0,0 +1,311 @@
+import json
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import transaction
+from django.utils import timezone
+
+from pizza.choices import DeliveryStatus
+from pizza.models import Extra, Ingredient, Order, Pizza
+from pizza.snapshots import order_snapshot
+
+# Share of orders per number of extras
+EXTRAS_PER_ORDER = {0: 45, 1: 30, 2: 17, 3: 8}
+# Share of orders per quantity
+QUANTITIES = {1: 72, 2: 20, 3: 5, 4: 3}
+# Outcome of orders placed before the in-flight window
+SETTLED_STATUSES = {DeliveryStatus.DELIVERED: 93, DeliveryStatus.CANCELLED: 7}
+# Orders placed within IN_FLIGHT_HOURS may still be anywhere in the pipeline
+IN_FLIGHT_STATUSES = {
+    DeliveryStatus.PENDING: 10,
+    DeliveryStatus.CONFIRMED: 10,
+    DeliveryStatus.PREPARING: 15,
+    DeliveryStatus.BAKING: 15,
+    DeliveryStatus.READY: 10,
+    DeliveryStatus.DELIVERED: 35,
+    DeliveryStatus.CANCELLED: 5,
+}
+IN_FLIGHT_HOURS = 2
+
+
+def iter_fixture(stream, chunk_size=64 * 1024):
+    """Yield ``(section, item)`` for a ``{"section": [item, ...], ...}`` file.
+
+    The file is read ``chunk_size`` characters at a time, so only one item
+    needs to fit in memory however large the fixture is.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position].isspace():
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    def expect(*tokens):
+        nonlocal position
+        skip_whitespace()
+        if position >= len(buffer) or buffer[position] not in tokens:
+            found = buffer[position:position + 1] or "end of file"
+            raise ValueError(f"Expected {' or '.join(tokens)} in fixture, found {found}")
+        position += 1
+        return buffer[position - 1]
+
+    def value():
+        nonlocal position
+        skip_whitespace()
+        while True:
+            try:
+                parsed, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            position = end
+            return parsed
+
+    expect("{")
+    skip_whitespace()
+    if buffer[position:position + 1] == "}":
+        return
+    while True:
+        section = value()
+        expect(":")
+        expect("[")
+        skip_whitespace()
+        if buffer[position:position + 1] == "]":
+            position += 1
+        else:
+            while True:
+                yield section, value()
+                if expect(",", "]") == "]":
+                    break
+        if expect(",", "}") == "}":
+            return
+
+
+def load_fixture(items, batch_size=1000):
+    """Insert the new ingredients, pizzas and extras of a fixture in bulk.
+
+    Rows whose name already exists are left as they are. Returns the number
+    of rows created per section and the ingredient names pizzas referred to
+    that could not be found.
+    """
+    ingredients = dict(Ingredient.objects.values_list("name", "pk"))
+    existing = {
+        "pizzas": set(Pizza.objects.values_list("name", flat=True)),
+        "extras": set(Extra.objects.values_list("name", flat=True)),
+    }
+    created = {"ingredients": 0, "pizzas": 0, "extras": 0}
+    missing = set()
+    pending = {"ingredients": [], "pizzas": [], "extras": []}
+
+    def flush(section):
+        rows = pending[section]
+        pending[section] = []
+        if section == "ingredients":
+            for ingredient in Ingredient.objects.bulk_create(rows):
+                ingredients[ingredient.name] = ingredient.pk
+        elif section == "pizzas":
+            pizzas = Pizza.objects.bulk_create([pizza for pizza, _ in rows])
+            through = Pizza.ingredients.through
+            through.objects.bulk_create(
+                through(pizza_id=pizza.pk, ingredient_id=ingredient_id)
+                for pizza, (_, ingredient_ids) in zip(pizzas, rows)
+                for ingredient_id in ingredient_ids
+            )
+        else:
+            Extra.objects.bulk_create(rows)
+        created[section] += len(rows)
+
+    with transaction.atomic():
+        for section, data in items:
+            if section not in pending:
+                continue
+            if section != "ingredients" and pending["ingredients"]:
+                # Pizzas refer to ingredients by name, insert those first
+                flush("ingredients")
+            if section == "ingredients":
+                if data["name"] in ingredients:
+                    continue
+                ingredients[data["name"]] = None
+                pending[section].append(Ingredient(**data))
+            elif section == "pizzas":
+                data = dict(data)
+                names = data.pop("ingredients", [])
+                if data["name"] in existing["pizzas"]:
+                    continue
+                existing["pizzas"].add(data["name"])
+                missing.update(name for name in names if name not in ingredients)
+                ingredient_ids = list(
+                    dict.fromkeys(ingredients[name] for name in names if name in ingredients)
+                )
+                pending[section].append((Pizza(**data), ingredient_ids))
+            else:
+                if data["name"] in existing["extras"]:
+                    continue
+                existing["extras"].add(data["name"])
+                pending[section].append(Extra(**data))
+            if len(pending[section]) >= batch_size:
+                flush(section)
+        for section in pending:
+            if pending[section]:
+                flush(section)
+    return created, sorted(missing)
+
+
+def _weighted(rng, weights):
+    """Return a function drawing one key of ``weights`` per call."""
+    population = list(weights)
+    cum_weights = list(accumulate(weights.values()))
+    return lambda: rng.choices(population, cum_weights=cum_weights)[0]
+
+
+def _popularity(count):
+    """Zipf-like weights, a few products get most of the orders."""
+    return [1 / (rank + 1) for rank in range(count)]
+
+
+def generate_catalog(pizzas=50, extras=15, ingredients=40, seed=None):
+    """Create a synthetic menu, returns the new pizzas and extras."""
+    rng = random.Random(seed)
+    with transaction.atomic():
+        tag = Ingredient.objects.count()
+        new_ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ingredient {tag + i}") for i in range(ingredients)
+        )
+        tag = Pizza.objects.count()
+        new_pizzas = Pizza.objects.bulk_create(
+            Pizza(
+                name=f"Pizza {tag + i}",
+                description=f"Synthetic pizza number {tag + i}",
+                base_price=Decimal(rng.randrange(800, 1800)) / 100,
+                quantity_in_stock=rng.randrange(50, 500),
+            )
+            for i in range(pizzas)
+        )
+        through = Pizza.ingredients.through
+        through.objects.bulk_create(
+            through(pizza_id=pizza.pk, ingredient_id=ingredient.pk)
+            for pizza in new_pizzas
+            for ingredient in rng.sample(new_ingredients, min(len(new_ingredients), 4))
+        )
+        tag = Extra.objects.count()
+        new_extras = Extra.objects.bulk_create(
+            Extra(
+                name=f"Extra {tag + i}",
+                price=Decimal(rng.randrange(50, 400)) / 100,
+                quantity_in_stock=rng.randrange(100, 1000),
+            )
+            for i in range(extras)
+        )
+    return new_pizzas, new_extras
+
+
+@contextmanager
+def historical_timestamps(model):
+    """Let ``bulk_create`` keep the ``created_at``/``updated_at`` it is given."""
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def generate_orders(count, pizzas, extras, days=365, batch_size=5000, seed=None):
+    """Insert ``count`` historical orders spread over the last ``days`` days.
+
+    Popular pizzas and extras are ordered much more often than the rest,
+    most orders are delivered and only recent ones are still in flight.
+    Stock is not touched, these orders are history. Yields the number of
+    orders inserted after each batch.
+    """
+    rng = random.Random(seed)
+    pizza_ids = [pizza.pk for pizza in pizzas]
+    pizzas_by_id = {pizza.pk: pizza for pizza in pizzas}
+    extras_by_id = {extra.pk: extra for extra in extras}
+    pizza_weights = list(accumulate(_popularity(len(pizzas))))
+    extra_ids = list(extras_by_id)
+    extra_weights = list(accumulate(_popularity(len(extras))))
+    extras_count = _weighted(rng, EXTRAS_PER_ORDER)
+    quantity = _weighted(rng, QUANTITIES)
+    settled = _weighted(rng, SETTLED_STATUSES)
+    in_flight = _weighted(rng, IN_FLIGHT_STATUSES)
+
+    now = timezone.now()
+    span = days * 24 * 60 * 60
+    in_flight_since = now - timedelta(hours=IN_FLIGHT_HOURS)
+    through = Order.extras.through
+
+    def pick_extras():
+        chosen = set()
+        wanted = min(extras_count(), len(extras))
+        while len(chosen) < wanted:
+            chosen.add(rng.choices(extra_ids, cum_weights=extra_weights)[0])
+        return sorted(chosen)
+
+    inserted = 0
+    with historical_timestamps(Order):
+        while inserted < count:
+            orders, order_extras = [], []
+            for n in range(inserted, min(count, inserted + batch_size)):
+                pizza_id = rng.choices(pizza_ids, cum_weights=pizza_weights)[0]
+                chosen = pick_extras()
+                amount = quantity()
+                created_at = now - timedelta(seconds=rng.randrange(span))
+                status = in_flight() if created_at > in_flight_since else settled()
+                snapshot = order_snapshot(
+                    pizza_id,
+                    pizzas_by_id[pizza_id],
+                    {pk: extras_by_id[pk] for pk in chosen},
+                    amount,
+                )
+                orders.append(
+                    Order(
+                        pizza_id=pizza_id,
+                        quantity=amount,
+                        total_price=Decimal(snapshot["total_price"]),
+                        snapshot=snapshot,
+                        status=status,
+                        customer_name=f"Customer {n}",
+                        delivery_address=f"{rng.randrange(1, 200)} Synthetic Street",
+                        created_at=created_at,
+                        updated_at=min(
+                            now, created_at + timedelta(minutes=rng.randrange(20, 90))
+                        ),
+                    )
+                )
+                order_extras.append(chosen)
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                through.objects.bulk_create(
+                    through(order_id=order.pk, extra_id=extra_id)
+                    for order, chosen in zip(orders, order_extras)
+                    for extra_id in chosen
+                )
+            inserted += len(orders)
+            yield inserted
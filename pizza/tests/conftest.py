@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.test import APIClient
+
+from pizza.cache import menu_cache
+from pizza.idempotency import idempotency_store
+from pizza.kitchen import kitchen_scheduler
+from pizza.metrics import request_metrics
+from pizza.models import Pizza, Extra
+from pizza.pricing import price_book
+from pizza.search import search_index
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    menu_cache.clear()
+    price_book.invalidate()
+    idempotency_store.clear()
+    search_index.clear()
+    request_metrics.clear()
+    kitchen_scheduler.clear()
+    yield
+    menu_cache.clear()
+    price_book.invalidate()
+    idempotency_store.clear()
+    search_index.clear()
+    kitchen_scheduler.clear()
+
+
+@pytest.fixture
+def client():
+    return APIClient()
+
+
+@pytest.fixture
+def assert_query_budget():
+    """Check the queries a test client response cost against a budget."""
+
+    def check(response, budget):
+        request = response.wsgi_request
+        assert request.db_queries <= budget, (
+            f"{request.method} {request.get_full_path()} ran {request.db_queries} "
+            f"queries, over its budget of {budget}"
+        )
+
+    return check
+
+
+@pytest.fixture
+def pizza():
+    return Pizza.objects.create(
+        name="Margherita", base_price=10.0, quantity_in_stock=5, is_available=True
+    )
+
+
+@pytest.fixture
+def extras():
+    return [
+        Extra.objects.create(
+            name="Cheese", price=2.0, quantity_in_stock=5, is_available=True
+        ),
+        Extra.objects.create(
+            name="Olives", price=1.5, quantity_in_stock=5, is_available=True
+        ),
+    ]
@@ -0,0 +1,136 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from pizza.archive import archive_orders
+from pizza.models import ArchivedOrder, ArchivedOrderExtra, DailyPizzaSales, Order
+from pizza.rollups import rebuild_rollups
+
+URL = "/api/v1/order/"
+CART_URL = "/api/v1/cart/"
+
+
+def place_order(pizza, extras, status="delivered", days_ago=200):
+    order = Order(pizza=pizza, quantity=1, customer_name="Ada", delivery_address="A")
+    order.save(extras=extras)
+    Order.objects.filter(pk=order.pk).update(
+        status=status, created_at=timezone.now() - timedelta(days=days_ago)
+    )
+    return order
+
+
+def archive(**options):
+    out = io.StringIO()
+    call_command("archive_orders", stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_only_old_terminal_orders_are_archived(pizza, extras):
+    delivered = place_order(pizza, extras)
+    cancelled = place_order(pizza, [], status="cancelled")
+    stuck = place_order(pizza, [], status="ready")
+    recent = place_order(pizza, [], days_ago=1)
+    created_at = Order.objects.get(pk=delivered.pk).created_at
+
+    output = archive(days=90)
+
+    assert "Archived 2 orders and 2 order extras in" in output
+    assert set(Order.objects.values_list("pk", flat=True)) == {stuck.pk, recent.pk}
+    assert set(ArchivedOrder.objects.values_list("pk", flat=True)) == {
+        delivered.pk,
+        cancelled.pk,
+    }
+    archived = ArchivedOrder.objects.get(pk=delivered.pk)
+    assert (archived.created_at, archived.snapshot) == (created_at, delivered.snapshot)
+    assert set(archived.extras.values_list("pk", flat=True)) == {e.pk for e in extras}
+    assert not Order.extras.through.objects.filter(order_id=delivered.pk).exists()
+
+
+@pytest.mark.django_db
+def test_archived_orders_are_still_retrieved(client, pizza, extras):
+    order = place_order(pizza, extras)
+    before = client.get(f"{URL}{order.pk}/").json()
+
+    archive(days=90)
+
+    assert client.get(URL).json()["results"] == []
+    assert client.get(f"{URL}{order.pk}/").json() == before
+    assert client.get(f"{URL}9999/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_archiving_runs_in_resumable_batches(pizza):
+    pizza.quantity_in_stock = 10
+    pizza.save()
+    for _ in range(5):
+        place_order(pizza, [])
+    Order.objects.update(snapshot=None)
+    before = timezone.now() - timedelta(days=90)
+
+    batches = archive_orders(before, batch_size=2)
+    assert next(batches) == (2, 0)
+    batches.close()
+    assert (Order.objects.count(), ArchivedOrder.objects.count()) == (3, 2)
+
+    assert list(archive_orders(before, batch_size=2)) == [(2, 0), (3, 0)]
+    assert not Order.objects.exists()
+    assert not ArchivedOrder.objects.filter(snapshot__isnull=True).exists()
+    assert "Archived 0 orders" in archive(days=90)
+
+
+@pytest.mark.django_db
+def test_rollup_rebuild_counts_archived_orders(pizza, extras):
+    for status in ("delivered", "delivered", "cancelled"):
+        place_order(pizza, extras[:1], status=status)
+    rebuild_rollups()
+    expected = list(DailyPizzaSales.objects.values("day", "orders", "units", "revenue"))
+
+    archive(days=90)
+    rebuild_rollups()
+
+    assert ArchivedOrderExtra.objects.count() == 3
+    assert list(DailyPizzaSales.objects.values("day", "orders", "units", "revenue")) == expected
+    assert expected[0]["orders"] == 2
+
+
+@pytest.mark.django_db
+def test_carts_keep_their_archived_lines(client, pizza, extras):
+    lines = [{"pizza": pizza.pk, "extras": [extras[0].pk]}, {"pizza": pizza.pk}]
+    response = client.post(
+        CART_URL,
+        {"customer_name": "Ada", "delivery_address": "A", "lines": lines},
+        format="json",
+    )
+    assert response.status_code == 201, response.data
+    cart_id = response.data["id"]
+    first = min(line["id"] for line in response.data["lines"])
+    Order.objects.filter(pk=first).update(
+        status="delivered", created_at=timezone.now() - timedelta(days=200)
+    )
+    before = client.get(f"{CART_URL}{cart_id}/").json()
+
+    archive(days=90)
+
+    assert ArchivedOrder.objects.filter(cart_id=cart_id).count() == 1
+    after = client.get(f"{CART_URL}{cart_id}/").json()
+    assert [line["id"] for line in after["lines"]] == [line["id"] for line in before["lines"]]
+    assert after == before
+
+
+@pytest.mark.django_db
+def test_export_includes_archived_orders(client, pizza, extras):
+    old = place_order(pizza, extras, days_ago=200)
+    stuck = place_order(pizza, [], status="ready", days_ago=300)
+    recent = place_order(pizza, [], days_ago=1)
+
+    archive(days=90)
+
+    response = client.get(f"{URL}export/", {"type": "ndjson"})
+    rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [row["id"] for row in rows] == [stuck.pk, old.pk, recent.pk]
+    assert rows[1]["extras_ids"] == sorted(extra.pk for extra in extras)
@@ -0,0 +1,26 @@
+from pizza.benchmarks import compare_runs, percentile
+
+
+def test_percentile():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_runs_flags_regressions():
+    baseline = {
+        "menu_list": {"throughput": 400.0, "p95_ms": 10.0},
+        "order_list": {"throughput": 100.0, "p95_ms": 50.0},
+        "retired": {"throughput": 1.0, "p95_ms": 1.0},
+    }
+    results = {
+        "menu_list": {"throughput": 420.0, "p95_ms": 10.5},
+        "order_list": {"throughput": 80.0, "p95_ms": 50.0},
+        "order_create": {"throughput": 50.0, "p95_ms": 30.0},
+    }
+    comparison = compare_runs(results, baseline, tolerance=0.1)
+    assert comparison == {
+        "menu_list": {"throughput_change": 0.05, "p95_change": 0.05, "regressed": False},
+        "order_list": {"throughput_change": -0.2, "p95_change": 0.0, "regressed": True},
+    }
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from pizza.models import Extra, Order
+
+
+def row(pizza, extras=(), quantity=1):
+    return {
+        "pizza": pizza.id,
+        "extras": [extra.id for extra in extras],
+        "quantity": quantity,
+        "customer_name": "Partner",
+        "delivery_address": "1 Batch Way",
+    }
+
+
+@pytest.mark.django_db
+def test_bulk_create_orders(client, pizza, extras, django_assert_max_num_queries):
+    payload = {"orders": [row(pizza, extras, 2), row(pizza, extras[:1], 1)]}
+    # Snapshot, pricing, one reservation per model, one insert per table,
+    # the sales rollups and the savepoints around them, whatever the number
+    # of orders
+    with django_assert_max_num_queries(20):
+        response = client.post(reverse("order-bulk"), data=payload, format="json")
+    assert response.status_code == 201
+    assert response.data["created"] == 2
+
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 2
+    assert list(Extra.objects.values_list("quantity_in_stock", flat=True)) == [2, 3]
+    first = Order.objects.get(pk=response.data["results"][0]["id"])
+    assert first.total_price == 27
+    assert first.extras.count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_is_all_or_nothing_by_default(client, pizza):
+    payload = {"orders": [row(pizza, quantity=3), row(pizza, quantity=3)]}
+    response = client.post(reverse("order-bulk"), data=payload, format="json")
+    assert response.status_code == 400
+    assert response.data["results"][0] == {"index": 0, "id": None}
+    assert "pizza" in response.data["results"][1]["errors"]
+    assert not Order.objects.exists()
+
+
+@pytest.mark.django_db
+def test_bulk_best_effort(client, pizza):
+    payload = {
+        "orders": [row(pizza, quantity=3), row(pizza, quantity=3), {"pizza": "x"}],
+        "atomic": False,
+    }
+    response = client.post(reverse("order-bulk"), data=payload, format="json")
+    assert response.status_code == 201
+    assert response.data["created"] == 1
+    assert Order.objects.count() == 1
+    assert "errors" in response.data["results"][2]
+
+
+@pytest.mark.django_db
+def test_import_orders_command(tmp_path, pizza, capsys):
+    path = tmp_path / "orders.ndjson"
+    lines = [json.dumps(row(pizza)), "not json", json.dumps(row(pizza, quantity=9))]
+    path.write_text("\n".join(lines))
+    call_command("import_orders", str(path), "--best-effort", "--batch-size", "2")
+    assert Order.objects.count() == 1
+    captured = capsys.readouterr()
+    assert "Imported 1 orders, 2 failed." in captured.out
+    assert '"line": 3' in captured.err
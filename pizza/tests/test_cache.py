@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+
+from pizza.cache import LRUCache, MenuCache, menu_cache
+from pizza.checks import check_shared_cache
+from pizza.models import Pizza, Ingredient
+
+
+@pytest.mark.django_db
+def test_menu_list_is_served_from_cache(client, pizza, django_assert_num_queries):
+    url = reverse("pizza-list")
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert menu_cache.stats()["hits"] == 1
+
+
+@pytest.mark.django_db
+def test_menu_cache_invalidated_by_model_changes(client, pizza):
+    url = reverse("pizza-detail", args=[pizza.id])
+    client.get(url)
+
+    ingredient = Ingredient.objects.create(name="Basil")
+    pizza.ingredients.add(ingredient)
+    response = client.get(url)
+    assert [i["name"] for i in response.data["ingredients"]] == ["Basil"]
+
+    Pizza.objects.filter(pk=pizza.pk).get().delete()
+    assert client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_extra_list_reflects_new_extras(client, extras):
+    url = reverse("extra-list")
+    assert len(client.get(url).data["results"]) == 2
+    extras[0].is_available = False
+    extras[0].save()
+    assert len(client.get(url).data["results"]) == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+    assert lru.evictions == 1
+
+
+def test_concurrent_misses_build_once():
+    menu = MenuCache(max_entries=8)
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return "payload"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(menu.get_or_build("k", build)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["payload"] * 8
+    assert menu.stats()["misses"] == 1
+
+
+@pytest.mark.django_db
+def test_metrics_expose_menu_cache_counters(client, pizza):
+    client.get(reverse("pizza-list"))
+    response = client.get(reverse("metrics"))
+    assert response.status_code == 200
+    assert b"usersnack_menu_cache_misses_total 1" in response.content
+
+
+def test_process_local_cache_is_refused_for_several_workers(settings):
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.WEB_CONCURRENCY = 1
+    assert check_shared_cache(None) == []
+
+    settings.WEB_CONCURRENCY = 4
+    assert [error.id for error in check_shared_cache(None)] == ["pizza.E001"]
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://redis:6379/1",
+        }
+    }
+    assert check_shared_cache(None) == []
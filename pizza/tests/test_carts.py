@@ -0,0 +1,127 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.utils.encoders import JSONEncoder
+
+from pizza.models import Cart, DailyPizzaSales, Order, Pizza
+from pizza.serializers import CartSerializer, cart_lines
+
+URL = "/api/v1/cart/"
+
+
+@pytest.fixture
+def funghi():
+    return Pizza.objects.create(name="Funghi", base_price="11.00", quantity_in_stock=5)
+
+
+def cart(*lines):
+    return {"customer_name": "Ada", "delivery_address": "1 Loop Lane", "lines": list(lines)}
+
+
+@pytest.mark.django_db
+def test_cart_places_every_line_at_once(
+    client, pizza, funghi, extras, django_capture_on_commit_callbacks
+):
+    cheese, olives = extras
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            URL,
+            cart(
+                {"pizza": pizza.pk, "extras": [cheese.pk], "quantity": 2},
+                {"pizza": funghi.pk, "quantity": 1},
+                {"pizza": pizza.pk, "extras": [cheese.pk, olives.pk]},
+            ),
+            format="json",
+        )
+
+    assert response.status_code == 201, response.data
+    assert response.data["total_price"] == "48.50"
+    lines = response.data["lines"]
+    assert [(line["pizza"]["name"], line["quantity"]) for line in lines] == [
+        ("Margherita", 2),
+        ("Funghi", 1),
+        ("Margherita", 1),
+    ]
+    assert [len(line["extras"]) for line in lines] == [1, 0, 2]
+    assert {line["cart"] for line in lines} == {response.data["id"]}
+
+    pizza.refresh_from_db()
+    cheese.refresh_from_db()
+    assert (pizza.quantity_in_stock, cheese.quantity_in_stock) == (2, 2)
+    assert DailyPizzaSales.objects.get(pizza=pizza).units == 3
+
+
+@pytest.mark.django_db
+def test_cart_queries_do_not_grow_with_lines(client, pizza, funghi, extras):
+    pizza.quantity_in_stock = funghi.quantity_in_stock = 50
+    pizza.save()
+    funghi.save()
+    line = {"pizza": pizza.pk, "extras": [extras[0].pk]}
+
+    def queries(lines):
+        with CaptureQueriesContext(connection) as context:
+            assert client.post(URL, cart(*lines), format="json").status_code == 201
+        return len(context)
+
+    queries([line])  # loads the price book
+    assert queries([line, {"pizza": funghi.pk}]) == queries(
+        [line, {"pizza": funghi.pk}, line, {"pizza": funghi.pk, "quantity": 3}]
+    )
+
+
+@pytest.mark.django_db
+def test_cart_lines_are_validated_together(client, pizza, funghi, extras):
+    # Each line fits the stock of 5 on its own, not together
+    response = client.post(
+        URL,
+        cart(
+            {"pizza": pizza.pk, "quantity": 3},
+            {"pizza": funghi.pk},
+            {"pizza": pizza.pk, "quantity": 3},
+            {"pizza": funghi.pk, "extras": [999]},
+        ),
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.data["lines"][:2] == [{}, {}]
+    assert "Only 2 pizzas left" in str(response.data["lines"][2]["pizza"])
+    assert "extras" in response.data["lines"][3]
+    assert not Cart.objects.exists()
+    assert not Order.objects.exists()
+    assert Pizza.objects.get(pk=pizza.pk).quantity_in_stock == 5
+
+    assert client.post(URL, cart(), format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_cart_reads_match_serializer(client, pizza, funghi, extras):
+    created = client.post(
+        URL,
+        cart({"pizza": pizza.pk, "extras": [extras[1].pk]}, {"pizza": funghi.pk}),
+        format="json",
+    ).data
+
+    retrieved = client.get(f"{URL}{created['id']}/").data
+    expected = CartSerializer(Cart.objects.prefetch_related(cart_lines()).get()).data
+    assert json.loads(json.dumps(retrieved, cls=JSONEncoder)) == json.loads(
+        json.dumps(expected, cls=JSONEncoder)
+    )
+    assert retrieved == client.get(URL).data["results"][0]
+    assert retrieved["total_price"] == created["total_price"] == "22.50"
+
+
+@pytest.mark.django_db
+def test_single_pizza_orders_still_work(client, pizza):
+    response = client.post(
+        "/api/v1/order/",
+        {"pizza": pizza.pk, "quantity": 1, "customer_name": "Ada", "delivery_address": "A"},
+        format="json",
+    )
+    assert response.status_code == 201
+    order = client.get(f"/api/v1/order/{response.data['id']}/").data
+    assert order["cart"] is None
+    assert Decimal(order["total_price"]) == Decimal("10.00")
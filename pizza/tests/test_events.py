@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+
+from pizza.checks import check_shared_events
+from pizza.events import CacheBroker, InMemoryBroker, order_events
+from pizza.models import Order
+from pizza.signals import order_status_changed
+from pizza.transitions import transition_orders
+
+
+@pytest.fixture
+def order(pizza):
+    order = Order(pizza=pizza, quantity=1, customer_name="Ada", delivery_address="A")
+    order.save()
+    return order
+
+
+def test_broker_delivers_across_threads():
+    broker = InMemoryBroker()
+
+    async def watch():
+        subscription = broker.subscribe([1, 2])
+        publisher = threading.Thread(target=broker.publish, args=(2, "preparing"))
+        publisher.start()
+        event = await subscription.get(timeout=1)
+        publisher.join()
+        assert broker.subscriber_count() == 1
+        subscription.close()
+        return event
+
+    assert asyncio.run(watch()) == {"id": 2, "status": "preparing"}
+    assert broker.subscriber_count() == 0
+
+
+def test_cache_broker_reaches_other_workers(settings):
+    # The tests drive the polls, the poller thread sleeps through them
+    settings.ORDER_EVENTS_POLL_INTERVAL = 60
+    here, elsewhere = CacheBroker(), CacheBroker()
+    elsewhere.publish(1, "confirmed")
+
+    async def watch():
+        subscription = here.subscribe([1, 2])
+        elsewhere.publish(2, "preparing")
+        elsewhere.publish(3, "preparing")
+        assert here.poll() == 2
+        events = [await subscription.get(timeout=1), await subscription.get(timeout=0)]
+
+        # A number taken by a publisher that has not stored its event yet
+        # holds the events after it back, until the grace period is over
+        cache.incr(f"{CacheBroker.key_prefix}:sequence")
+        elsewhere.publish(1, "preparing")
+        assert here.poll() == 0
+        here.missing_grace = 0
+        assert here.poll() == 1
+        events.append(await subscription.get(timeout=1))
+        subscription.close()
+        return events
+
+    assert asyncio.run(watch()) == [
+        {"id": 2, "status": "preparing"},
+        None,
+        {"id": 1, "status": "preparing"},
+    ]
+
+
+def test_in_process_broker_is_refused_for_several_workers(settings):
+    settings.ORDER_EVENTS_BROKER = "pizza.events.InMemoryBroker"
+    settings.WEB_CONCURRENCY = 2
+    assert [error.id for error in check_shared_events(None)] == ["pizza.E002"]
+    settings.ORDER_EVENTS_BROKER = "pizza.events.CacheBroker"
+    assert check_shared_events(None) == []
+
+
+@pytest.mark.django_db
+def test_transition_publishes_on_commit(order, django_capture_on_commit_callbacks):
+    received = []
+
+    def listener(sender, order_ids, status, **kwargs):
+        received.append((order_ids, status))
+
+    order_status_changed.connect(listener)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            transition_orders([order.pk], "confirmed")
+    finally:
+        order_status_changed.disconnect(listener)
+    assert received == [([order.pk], "confirmed")]
+
+
+@pytest.mark.django_db
+def test_event_stream(order):
+    url = f"{reverse('order-events')}?ids={order.pk}"
+
+    async def watch():
+        response = await AsyncClient().get(url)
+        assert response["Content-Type"] == "text/event-stream"
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if len(chunks) == 1:
+                order_events.publish(order.pk, "preparing")
+                order_events.publish(order.pk, "cancelled")
+        return chunks
+
+    chunks = async_to_sync(watch)()
+    events = [json.loads(chunk.split("data: ")[1]) for chunk in chunks]
+    assert [event["status"] for event in events] == ["pending", "preparing", "cancelled"]
+    assert order_events.subscriber_count() == 0
+
+
+@pytest.mark.django_db
+def test_long_poll(order):
+    url = reverse("order-events")
+    client = AsyncClient()
+
+    async def poll(**params):
+        return await client.get(url, {"ids": order.pk, "poll": 1, **params})
+
+    response = async_to_sync(poll)()
+    assert response.json() == {"events": [{"id": order.pk, "status": "pending"}]}
+
+    response = async_to_sync(poll)(known=f"{order.pk}:pending", timeout=0.05)
+    assert response.json() == {"events": []}
+
+    async def poll_until_published():
+        asyncio.get_running_loop().call_later(
+            0.05, order_events.publish, order.pk, "confirmed"
+        )
+        return await poll(known=f"{order.pk}:pending", timeout=5)
+
+    response = async_to_sync(poll_until_published)()
+    assert response.json() == {"events": [{"id": order.pk, "status": "confirmed"}]}
+    assert order_events.subscriber_count() == 0
+
+
+@pytest.mark.django_db
+def test_event_stream_rejects_bad_ids():
+    url = reverse("order-events")
+    client = AsyncClient()
+    assert async_to_sync(client.get)(url, {"ids": "x"}).status_code == 400
+    assert async_to_sync(client.get)(url, {"ids": "9999"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_failed_lookup_does_not_leak_the_subscription(order, monkeypatch):
+    def fail(order_ids):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr("pizza.events._current_statuses", fail)
+    with pytest.raises(RuntimeError):
+        async_to_sync(AsyncClient().get)(reverse("order-events"), {"ids": order.pk})
+    assert order_events.subscriber_count() == 0
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from pizza.models import Order
+
+
+@pytest.fixture
+def orders(pizza, extras):
+    first = Order(pizza=pizza, quantity=2, customer_name="Ada", delivery_address="A")
+    first.save(extras=extras)
+    second = Order(pizza=pizza, customer_name="Bob", delivery_address="B")
+    second.save()
+    return [first, second]
+
+
+@pytest.mark.django_db
+def test_export_ndjson(client, orders, extras):
+    response = client.get(reverse("order-export"), {"type": "ndjson"})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    rows = [
+        json.loads(line) for line in b"".join(response.streaming_content).splitlines()
+    ]
+    assert [row["id"] for row in rows] == [order.pk for order in orders]
+    assert rows[0]["pizza_name"] == "Margherita"
+    assert rows[0]["extras_ids"] == sorted(extra.pk for extra in extras)
+    assert rows[0]["total_price"] == "27.00"
+    assert rows[1]["extras_ids"] == []
+
+
+@pytest.mark.django_db
+def test_export_csv_date_range(client, orders):
+    response = client.get(
+        reverse("order-export"), {"start": "2000-01-01", "end": "2000-12-31"}
+    )
+    content = b"".join(response.streaming_content).decode()
+    assert list(csv.reader(io.StringIO(content))) == [
+        [
+            "id",
+            "pizza_id",
+            "pizza_name",
+            "extras_ids",
+            "quantity",
+            "total_price",
+            "status",
+            "customer_name",
+            "created_at",
+            "updated_at",
+        ]
+    ]
+
+
+@pytest.mark.django_db
+def test_export_rejects_bad_input(client):
+    assert client.get(reverse("order-export"), {"type": "xml"}).status_code == 400
+    assert client.get(reverse("order-export"), {"start": "soon"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_export_orders_command_chunks(orders, django_assert_num_queries):
+    out = io.StringIO()
+    # One query per order table and one for the extras of each chunk
+    with django_assert_num_queries(4):
+        call_command("export_orders", "--chunk-size", "1", stdout=out)
+    rows = list(csv.DictReader(io.StringIO(out.getvalue())))
+    assert [int(row["id"]) for row in rows] == [order.pk for order in orders]
+    assert rows[0]["extras_ids"].count(" ") == 1
@@ -0,0 +1,112 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from pizza.idempotency import idempotency_store
+from pizza.models import IdempotencyKey, Order, Pizza
+
+
+def payload(pizza, **overrides):
+    return {
+        "pizza": pizza.id,
+        "quantity": 1,
+        "customer_name": "John Doe",
+        "delivery_address": "123 Pizza Street",
+        **overrides,
+    }
+
+
+def post(client, data, key="order-1"):
+    return client.post(
+        reverse("order-list"), data=data, format="json", HTTP_IDEMPOTENCY_KEY=key
+    )
+
+
+@pytest.mark.django_db
+def test_retry_replays_original_response(client, pizza, django_assert_num_queries):
+    first = post(client, payload(pizza))
+    assert first.status_code == 201
+    with django_assert_num_queries(0):
+        retry = post(client, payload(pizza))
+    assert retry.status_code == 201
+    assert retry["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    assert Order.objects.count() == 1
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 4
+
+
+@pytest.mark.django_db
+def test_replay_from_table_after_restart(client, pizza):
+    first = post(client, payload(pizza))
+    idempotency_store.clear()
+    retry = post(client, payload(pizza))
+    assert retry.json() == first.json()
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_key_reused_with_other_payload(client, pizza):
+    post(client, payload(pizza))
+    response = post(client, payload(pizza, quantity=2))
+    assert response.status_code == 422
+
+
+@pytest.mark.django_db
+def test_failed_validation_can_be_retried(client, pizza):
+    assert post(client, payload(pizza, quantity=0)).status_code == 400
+    assert not IdempotencyKey.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_requests_with_same_key_run_once():
+    pizza = Pizza.objects.create(name="Hot", base_price=9, quantity_in_stock=10)
+    responses = []
+    barrier = threading.Barrier(6)
+
+    def send():
+        barrier.wait()
+        try:
+            responses.append(post(APIClient(), payload(pizza)))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=send) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Order.objects.count() == 1
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["id"] for response in responses}) == 1
+
+
+@pytest.mark.django_db
+def test_key_abandoned_by_a_dead_worker_is_reclaimed(client, pizza, settings):
+    settings.IDEMPOTENCY_LOCK_TIMEOUT = 1
+    running = IdempotencyKey.objects.create(key="order-1", fingerprint="x")
+    IdempotencyKey.objects.filter(pk=running.pk).update(
+        created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT + 1)
+    )
+    response = post(client, payload(pizza))
+    assert response.status_code == 201
+    assert Order.objects.count() == 1
+    assert IdempotencyKey.objects.get().status_code == 201
+
+
+@pytest.mark.django_db
+def test_purge_idempotency_keys(settings):
+    IdempotencyKey.objects.create(key="fresh", fingerprint="x", status_code=201)
+    stale = IdempotencyKey.objects.create(key="stale", fingerprint="x", status_code=201)
+    IdempotencyKey.objects.filter(pk=stale.pk).update(
+        created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+    )
+    call_command("purge_idempotency_keys")
+    assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["fresh"]
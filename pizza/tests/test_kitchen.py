@@ -0,0 +1,129 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from pizza.bulk import ingest_orders
+from pizza.events import order_events
+from pizza.kitchen import (
+    KitchenQueue,
+    QueuedOrder,
+    kitchen_scheduler,
+    simulate,
+    simulated_orders,
+)
+from pizza.models import Order, Pizza
+from pizza.transitions import transition_orders
+
+URL = "/api/v1/order/next-batch/"
+
+
+def test_next_batch_fills_the_oven_with_one_pizza():
+    queue = KitchenQueue()
+    for order in [
+        QueuedOrder(1, pizza_id=1, quantity=1, created_at=0),
+        QueuedOrder(2, pizza_id=2, quantity=3, created_at=10),
+        QueuedOrder(3, pizza_id=2, quantity=4, created_at=20),
+        QueuedOrder(4, pizza_id=2, quantity=2, created_at=30),
+    ]:
+        queue.add(order)
+
+    # Pizza 2 has the most units waiting, order 4 doesn't fit after 2 and 3
+    batch = queue.next_batch(now=100, capacity=8, max_wait=600)
+    assert (batch.pizza_id, [order.id for order in batch.orders], batch.units) == (2, [2, 3], 7)
+
+    # Order 1 would be late by the end of the next oven run
+    batch = queue.next_batch(now=100, capacity=8, max_wait=600, lead=500)
+    assert [order.id for order in batch.orders] == [1]
+
+    for order_id in (1, 2, 3):
+        queue.remove(order_id)
+    assert queue.next_batch(now=100, capacity=1, max_wait=600).units == 2
+    queue.remove(4)
+    assert len(queue) == 0
+    assert queue.next_batch(now=100, capacity=8, max_wait=600) is None
+
+
+def test_batching_bakes_more_than_fifo():
+    orders = list(simulated_orders(hours=4, per_hour=20, pizzas=8, seed=3))
+    fifo = simulate(orders, "fifo", capacity=8, oven_seconds=480, max_wait=1200)
+    batched = simulate(orders, "batched", capacity=8, oven_seconds=480, max_wait=1200)
+    assert fifo["orders"] == batched["orders"] == len(orders)
+    assert batched["oven_runs"] < fifo["oven_runs"]
+    assert batched["pizzas_per_hour"] > fifo["pizzas_per_hour"]
+    assert batched["wait_p95_min"] < fifo["wait_p95_min"]
+
+
+def test_simulate_kitchen_command():
+    stdout = io.StringIO()
+    call_command("simulate_kitchen", "--hours", "2", stdout=stdout)
+    assert "batched" in stdout.getvalue()
+
+
+def place(pizza, quantity=1):
+    order = Order(pizza=pizza, quantity=quantity, customer_name="Ada", delivery_address="A")
+    order.save()
+    return order
+
+
+@pytest.mark.django_db
+def test_next_batch_claims_orders(client, pizza, django_capture_on_commit_callbacks):
+    pizza.quantity_in_stock = 20
+    pizza.save()
+    other = Pizza.objects.create(name="Funghi", base_price=11, quantity_in_stock=20)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = place(pizza, 2)
+        place(other)
+        second = place(pizza, 3)
+        transition_orders([first.pk], "confirmed")
+        response = client.post(URL)
+
+    assert response.status_code == 200
+    assert response.data["pizza"]["name"] == "Margherita"
+    assert response.data["units"] == 5
+    assert [order["id"] for order in response.data["orders"]] == [first.pk, second.pk]
+    assert set(Order.objects.filter(pizza=pizza).values_list("status", flat=True)) == {
+        "preparing"
+    }
+
+    # Orders placed once the queue is loaded join it without a reload
+    with django_capture_on_commit_callbacks(execute=True):
+        late = place(pizza, 1)
+    assert late.pk in kitchen_scheduler.queue
+
+    with django_capture_on_commit_callbacks(execute=True):
+        transition_orders([late.pk], "cancelled")
+    assert late.pk not in kitchen_scheduler.queue
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(URL)
+    assert response.data["pizza"]["name"] == "Funghi"
+    assert client.post(URL).status_code == 204
+
+
+@pytest.mark.django_db
+def test_orders_claimed_elsewhere_are_skipped(client, pizza):
+    first = place(pizza)
+    kitchen_scheduler.sync()
+    # Another worker claims the order, this one never hears about it
+    Order.objects.filter(pk=first.pk).update(status="preparing")
+    assert client.post(URL).status_code == 204
+    assert first.pk not in kitchen_scheduler.queue
+
+
+@pytest.mark.django_db
+def test_bulk_orders_join_the_queue_on_commit(
+    pizza, monkeypatch, django_capture_on_commit_callbacks
+):
+    published = []
+    monkeypatch.setattr(order_events, "publish", lambda *event: published.append(event))
+    kitchen_scheduler.sync()
+    row = {"pizza": pizza.pk, "customer_name": "Ada", "delivery_address": "A"}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        results = ingest_orders([row, row])
+
+    order_ids = [result["id"] for result in results]
+    assert all(order_id in kitchen_scheduler.queue for order_id in order_ids)
+    assert published == [(order_id, "pending") for order_id in order_ids]
@@ -0,0 +1,108 @@
+import logging
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from pizza.metrics import RequestMetricsMiddleware, request_metrics
+from pizza.models import Extra, Ingredient, Order, Pizza
+
+
+@pytest.fixture
+def busy_menu():
+    ingredients = [Ingredient.objects.create(name=f"Ingredient {i}") for i in range(4)]
+    pizzas = []
+    for i in range(6):
+        pizza = Pizza.objects.create(
+            name=f"Pizza {i}", base_price=10, quantity_in_stock=100
+        )
+        pizza.ingredients.set(ingredients[: i % 4 + 1])
+        pizzas.append(pizza)
+    extras = [
+        Extra.objects.create(name=f"Extra {i}", price=1, quantity_in_stock=100)
+        for i in range(3)
+    ]
+    for i in range(25):
+        order = Order(
+            pizza=pizzas[i % 6], quantity=1, customer_name="Ada", delivery_address="A"
+        )
+        order.save(extras=extras[: i % 3])
+    return pizzas, extras
+
+
+# Queries each endpoint may run on a cold cache, whatever the page holds
+QUERY_BUDGETS = [
+    ("get", lambda menu: reverse("pizza-list"), 3),
+    ("get", lambda menu: reverse("pizza-detail", args=[menu[0][0].pk]), 3),
+    ("get", lambda menu: reverse("extra-list"), 2),
+    ("get", lambda menu: reverse("order-list"), 2),
+    ("get", lambda menu: reverse("order-list") + "?cursor=", 1),
+    ("get", lambda menu: reverse("order-detail", args=[Order.objects.first().pk]), 1),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("method, url, budget", QUERY_BUDGETS)
+def test_endpoint_query_budgets(client, busy_menu, assert_query_budget, method, url, budget):
+    response = getattr(client, method)(url(busy_menu))
+    assert response.status_code == 200
+    assert_query_budget(response, budget)
+
+
+@pytest.mark.django_db
+def test_request_metrics_are_exposed(client, pizza):
+    client.get(reverse("pizza-list"))
+    client.get(reverse("pizza-list"))
+    client.get(reverse("pizza-detail", args=[9999]))
+
+    body = client.get(reverse("metrics")).content.decode()
+    list_labels = 'view="pizza-list",method="GET"'
+    assert f'usersnack_requests_total{{{list_labels},status="200"}} 2' in body
+    assert f'usersnack_request_duration_seconds_bucket{{{list_labels},le="+Inf"}} 2' in body
+    assert f"usersnack_request_duration_seconds_count{{{list_labels}}} 2" in body
+    assert 'view="pizza-detail",method="GET",status="404"' in body
+    assert f"usersnack_request_db_queries_total{{{list_labels}}}" in body
+
+
+@pytest.mark.django_db
+def test_requests_over_budget_are_logged(client, pizza, settings, caplog):
+    settings.REQUEST_QUERY_BUDGET = 1
+    with caplog.at_level(logging.WARNING, logger="pizza.metrics"):
+        response = client.get(reverse("pizza-list"))
+    assert response.wsgi_request.db_queries > 1
+    assert "/pizza/ (pizza-list) over budget" in caplog.text
+
+    caplog.clear()
+    request_metrics.clear()
+    settings.REQUEST_QUERY_BUDGET = 0
+    with caplog.at_level(logging.WARNING, logger="pizza.metrics"):
+        client.get(reverse("pizza-list"))
+    assert not caplog.text
+
+
+def test_metrics_middleware_stays_async_under_asgi():
+    async def view(request):
+        return HttpResponse(status=204)
+
+    middleware = RequestMetricsMiddleware(view)
+    assert iscoroutinefunction(middleware)
+    request = RequestFactory().get("/anywhere/")
+    assert async_to_sync(middleware)(request).status_code == 204
+    assert request.db_queries == 0
+    assert 'view="unmatched",method="GET",status="204"' in "\n".join(request_metrics.render())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_views_count_the_queries_of_their_threads():
+    async def view(request):
+        # A fresh thread with a connection of its own, as under an ASGI server
+        count = sync_to_async(Order.objects.count, thread_sensitive=False)
+        await count()
+        await count()
+        return HttpResponse(status=204)
+
+    request = RequestFactory().get("/anywhere/")
+    async_to_sync(RequestMetricsMiddleware(view))(request)
+    assert request.db_queries == 2
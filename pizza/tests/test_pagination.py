@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from pizza.models import Order
+from pizza.pagination import OrderPagination
+
+
+@pytest.fixture
+def orders(pizza, monkeypatch):
+    monkeypatch.setattr(OrderPagination, "page_size", 2)
+    created = Order.objects.bulk_create(
+        Order(pizza=pizza, customer_name=f"Customer {n}", delivery_address="Here")
+        for n in range(5)
+    )
+    # Two orders share a timestamp so the id has to break the tie
+    now = timezone.now()
+    for order, age in zip(created, [3, 2, 2, 1, 0]):
+        Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=age))
+    return list(Order.objects.all())
+
+
+@pytest.mark.django_db
+def test_keyset_pages_walk_every_order_once(client, orders):
+    seen = []
+    url = reverse("order-list") + "?cursor="
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "count" not in response.data
+        seen += [order["id"] for order in response.data["results"]]
+        url = response.data["next"]
+    assert seen == [order.pk for order in orders]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor(client, orders):
+    response = client.get(reverse("order-list"), {"cursor": "nonsense"})
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_page_numbers_without_count(client, orders):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("order-list"), {"count": "false", "page": 2})
+    assert not any("COUNT(" in query["sql"] for query in queries.captured_queries)
+    assert "count" not in response.data
+    assert [order["id"] for order in response.data["results"]] == [
+        order.pk for order in orders[2:4]
+    ]
+    assert "page=3" in response.data["next"]
+    assert "page" not in response.data["previous"]
+
+
+@pytest.mark.django_db
+def test_exact_count_remains_the_default(client, orders):
+    response = client.get(reverse("order-list"))
+    assert response.data["count"] == 5
@@ -0,0 +1,134 @@
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+
+from pizza.models import Extra, Order, Pizza
+from pizza.pricing import PriceBook, price_book
+
+
+@pytest.mark.django_db
+def test_warm_quote_needs_no_queries(pizza, extras, django_assert_num_queries):
+    book = PriceBook()
+    extra_ids = [extra.id for extra in extras]
+    assert book.quote(pizza.id, extra_ids, 2) == Decimal("27.00")
+    with django_assert_num_queries(0):
+        assert book.quote(pizza.id, reversed(extra_ids), 3) == Decimal("40.50")
+
+
+@pytest.mark.django_db
+def test_quote_follows_price_changes(pizza, extras):
+    book = PriceBook()
+    assert book.quote(pizza.id, [extras[0].id]) == Decimal("12.00")
+    extras[0].price = Decimal("3.00")
+    extras[0].save()
+    assert book.quote(pizza.id, [extras[0].id]) == Decimal("13.00")
+
+
+@pytest.mark.django_db
+def test_quote_skips_unavailable_extras(pizza, extras):
+    book = PriceBook()
+    extras[1].is_available = False
+    extras[1].save()
+    extra_ids = [extra.id for extra in extras]
+    assert book.quote(pizza.id, extra_ids) == Decimal("12.00")
+    assert book.quote(pizza.id, extra_ids, available_only=False) == Decimal("13.50")
+
+
+@pytest.mark.django_db
+def test_calculate_price_uses_warm_price_book(
+    client, pizza, extras, django_assert_num_queries
+):
+    url = reverse("pizza-calculate-price", args=[pizza.id])
+    payload = {"quantity": 1, "extras": [extras[0].id]}
+    client.post(url, data=payload, format="json")
+    # Only the pizza lookup in get_object remains
+    with django_assert_num_queries(1):
+        response = client.post(url, data=payload, format="json")
+    assert response.data["total_price"] == Decimal("12.00")
+
+
+@pytest.mark.django_db
+def test_order_total_uses_price_book(pizza, extras, django_assert_num_queries):
+    order = Order.objects.create(
+        pizza=pizza, quantity=2, customer_name="Ada", delivery_address="1 Loop Rd"
+    )
+    order.extras.set(extras)
+    # Orders placed before snapshots existed are priced from the price book
+    Order.objects.filter(pk=order.pk).update(snapshot=None)
+    order = Order.objects.prefetch_related("extras").get(pk=order.pk)
+    order.calculate_total_price()
+    with django_assert_num_queries(0):
+        assert order.calculate_total_price() == Decimal("27.00")
+
+
+@pytest.mark.django_db
+def test_rows_added_without_a_bump_are_priced(client, pizza, extras, monkeypatch):
+    price_book.load()
+    monkeypatch.setattr(price_book, "reload_interval", 0)
+    # bulk_create sends no signals, like a change made by another process
+    (funghi,) = Pizza.objects.bulk_create(
+        [Pizza(name="Funghi", base_price="11.00", quantity_in_stock=5)]
+    )
+    (ham,) = Extra.objects.bulk_create(
+        [Extra(name="Ham", price="2.50", quantity_in_stock=5)]
+    )
+
+    response = client.post(
+        reverse("pizza-calculate-price", args=[funghi.pk]),
+        data={"quantity": 2, "extras": [ham.pk]},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert response.data["total_price"] == Decimal("27.00")
+
+    response = client.post(
+        "/api/v1/order/",
+        data={
+            "pizza": funghi.pk,
+            "extras": [ham.pk],
+            "customer_name": "Ada",
+            "delivery_address": "1 Loop Rd",
+        },
+        format="json",
+    )
+    assert response.status_code == 201, response.data
+    assert Order.objects.get().total_price == Decimal("13.50")
+
+
+@pytest.mark.django_db
+def test_orders_are_priced_from_the_database(pizza, extras):
+    price_book.load()
+    Pizza.objects.filter(pk=pizza.pk).update(base_price="12.00")
+    pizza.refresh_from_db()
+
+    order = Order(pizza=pizza, customer_name="Ada", delivery_address="1 Loop Rd")
+    order.save(extras=extras[:1])
+    assert order.total_price == Decimal("14.00")
+    assert order.snapshot["pizza"]["base_price"] == "12.00"
+
+
+@pytest.mark.django_db
+def test_unknown_ids_are_remembered_until_the_catalog_changes(
+    pizza, extras, django_assert_num_queries
+):
+    book = PriceBook()
+    book.reload_interval = 0
+    book.load()
+    with django_assert_num_queries(2):
+        assert book.quote(pizza.id, [extras[0].id, 9999]) == Decimal("12.00")
+    with django_assert_num_queries(2):
+        assert book.pizza(8888) is None
+    with django_assert_num_queries(0):
+        assert book.quote(pizza.id, [9999], 2) == Decimal("20.00")
+        assert book.extra(9999) is None
+        with pytest.raises(Pizza.DoesNotExist):
+            book.quote(8888)
+
+    # Without the reload interval elapsed, new misses are remembered unreloaded
+    book.reload_interval = 3600
+    with django_assert_num_queries(0):
+        assert book.extra(7777) is None
+
+    ham = Extra.objects.create(name="Ham", price="2.50", quantity_in_stock=5)
+    assert book.quote(pizza.id, [ham.id]) == Decimal("12.50")
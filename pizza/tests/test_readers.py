@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.utils.encoders import JSONEncoder
+
+from pizza.models import Extra, Ingredient, Order, Pizza
+from pizza.readers import ExtraReader, OrderReader, PizzaDetailReader, PizzaReader
+from pizza.serializers import (
+    ExtraSerializer,
+    OrderSerializer,
+    PizzaDetailSerializer,
+    PizzaSerializer,
+)
+
+
+def as_json(data):
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+@pytest.fixture
+def menu(pizza, extras):
+    tomato, basil, onion = (
+        Ingredient.objects.create(name=name) for name in ("Tomato", "Basil", "Onion")
+    )
+    pizza.ingredients.add(basil, tomato)
+    veggie = Pizza.objects.create(
+        name="Veggie",
+        base_price="12.50",
+        quantity_in_stock=50,
+        image_url="https://example.com/veggie.png",
+    )
+    veggie.ingredients.add(onion, tomato)
+    Pizza.objects.create(name="Plain", base_price="8", quantity_in_stock=50)
+    return Pizza.objects.order_by("id")
+
+
+def place_orders(pizzas, extras, count):
+    for i in range(count):
+        order = Order(
+            pizza=pizzas[i % len(pizzas)],
+            quantity=1,
+            customer_name=f"Customer {i}",
+            delivery_address="A",
+        )
+        order.save(extras=extras[: i % 3])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "reader, serializer_class, queryset",
+    [
+        (PizzaReader, PizzaSerializer, Pizza.objects.prefetch_related("ingredients")),
+        (
+            PizzaDetailReader,
+            PizzaDetailSerializer,
+            Pizza.objects.prefetch_related("ingredients"),
+        ),
+        (ExtraReader, ExtraSerializer, Extra.objects.all()),
+    ],
+)
+def test_menu_readers_match_serializers(menu, reader, serializer_class, queryset):
+    queryset = queryset.order_by("id")
+    rows = list(reader().values(queryset))
+    assert as_json(reader().render(rows)) == as_json(
+        serializer_class(queryset, many=True).data
+    )
+
+
+@pytest.mark.django_db
+def test_order_reader_matches_serializer(menu, extras):
+    place_orders(menu, extras, 6)
+    Order.objects.filter(customer_name="Customer 0").update(total_price=None)
+    queryset = Order.objects.select_related("pizza").prefetch_related("extras")
+    rows = list(OrderReader().values(queryset))
+    assert as_json(OrderReader().render(rows)) == as_json(
+        OrderSerializer(queryset, many=True).data
+    )
+
+
+@pytest.mark.django_db
+def test_order_endpoints_match_serializer(client, menu, extras):
+    place_orders(menu, extras, 3)
+    queryset = Order.objects.all()
+    response = client.get(reverse("order-list"))
+    assert response.json()["results"] == as_json(
+        OrderSerializer(queryset, many=True).data
+    )
+
+    order = queryset[0]
+    response = client.get(reverse("order-detail", args=[order.pk]))
+    assert response.json() == as_json(OrderSerializer(order).data)
+    assert client.get(reverse("order-detail", args=[9999])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_order_list_queries_do_not_grow_with_page_size(client, menu, extras):
+    Pizza.objects.update(quantity_in_stock=100)
+    Extra.objects.update(quantity_in_stock=100)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("order-list"))
+        assert response.status_code == 200
+        return len(queries), len(response.json()["results"])
+
+    place_orders(menu, extras, 2)
+    small_page = count_queries()
+    place_orders(menu, extras, 25)
+    full_page = count_queries()
+    assert (small_page[1], full_page[1]) == (2, 20)
+    assert small_page[0] == full_page[0]
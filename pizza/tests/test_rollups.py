@@ -0,0 +1,180 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from pizza.bulk import ingest_orders
+from pizza.models import DailyExtraSales, DailyPizzaSales, Extra, Order
+from pizza.synthetic import generate_catalog, generate_orders
+from pizza.transitions import transition_orders
+
+
+def rollups():
+    pizzas = list(
+        DailyPizzaSales.objects.order_by("day", "pizza_id").values_list(
+            "day", "pizza_id", "orders", "units", "revenue"
+        )
+    )
+    extras = list(
+        DailyExtraSales.objects.order_by("day", "extra_id").values_list(
+            "day", "extra_id", "units", "revenue"
+        )
+    )
+    return pizzas, extras
+
+
+def place(pizza, extras, quantity):
+    order = Order(
+        pizza=pizza, quantity=quantity, customer_name="Ada", delivery_address="A"
+    )
+    order.save(extras=extras)
+    return order
+
+
+@pytest.mark.django_db
+def test_rollups_follow_created_and_cancelled_orders(
+    pizza, extras, django_capture_on_commit_callbacks
+):
+    today = timezone.localdate()
+    with django_capture_on_commit_callbacks(execute=True):
+        first = place(pizza, extras, 2)
+        place(pizza, extras[:1], 1)
+    cheese, olives = extras
+
+    assert rollups() == (
+        [(today, pizza.pk, 2, 3, Decimal("39.00"))],
+        [(today, cheese.pk, 3, Decimal("6.00")), (today, olives.pk, 2, Decimal("3.00"))],
+    )
+
+    Extra.objects.filter(pk=cheese.pk).update(price="5.00")
+    with django_capture_on_commit_callbacks(execute=True):
+        transition_orders([first.pk], "cancelled")
+    incremental = rollups()
+    assert incremental == (
+        [(today, pizza.pk, 1, 1, Decimal("12.00"))],
+        [(today, cheese.pk, 1, Decimal("2.00")), (today, olives.pk, 0, Decimal("0.00"))],
+    )
+
+    call_command("rebuild_sales_rollups", stdout=io.StringIO())
+    pizzas, extras_rows = rollups()
+    assert pizzas == incremental[0]
+    assert extras_rows == [row for row in incremental[1] if row[2]]
+
+
+@pytest.mark.django_db
+def test_sales_are_recorded_once_the_order_commits(
+    pizza, extras, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks() as callbacks:
+        place(pizza, extras, 1)
+        assert rollups() == ([], [])
+    for callback in callbacks:
+        callback()
+    assert rollups()[0][0][2:] == (1, 1, Decimal("13.50"))
+
+    with pytest.raises(RuntimeError), django_capture_on_commit_callbacks() as callbacks:
+        with transaction.atomic():
+            place(pizza, extras, 1)
+            raise RuntimeError
+    assert callbacks == []
+    assert DailyPizzaSales.objects.get().orders == 1
+
+
+@pytest.mark.django_db
+def test_bulk_orders_are_rolled_up(pizza, extras, django_capture_on_commit_callbacks):
+    rows = [
+        {
+            "pizza": pizza.pk,
+            "extras": [extra.pk for extra in extras],
+            "quantity": 1,
+            "customer_name": "Ada",
+            "delivery_address": "A",
+        }
+    ] * 2
+    with django_capture_on_commit_callbacks(execute=True):
+        ingest_orders(rows)
+    pizzas, extras_rows = rollups()
+    assert pizzas[0][2:] == (2, 2, Decimal("27.00"))
+    assert [row[2:] for row in extras_rows] == [
+        (2, Decimal("4.00")),
+        (2, Decimal("3.00")),
+    ]
+
+
+@pytest.mark.django_db
+def test_rebuild_matches_order_history():
+    pizzas, extras = generate_catalog(pizzas=4, extras=3, ingredients=4, seed=2)
+    list(generate_orders(400, pizzas, extras, days=20, seed=2))
+    DailyPizzaSales.objects.all().delete()
+    call_command("rebuild_sales_rollups", stdout=io.StringIO())
+
+    sold = Order.objects.exclude(status="cancelled")
+    rolled = DailyPizzaSales.objects.all()
+    assert sum(row.orders for row in rolled) == sold.count()
+    assert sum(row.units for row in rolled) == sum(order.quantity for order in sold)
+    assert sum(row.revenue for row in rolled) == sum(order.total_price for order in sold)
+
+
+@pytest.mark.django_db
+def test_rebuild_refuses_days_with_recent_orders(
+    pizza, extras, settings, django_capture_on_commit_callbacks
+):
+    settings.ROLLUP_QUIET_SECONDS = 60
+    with django_capture_on_commit_callbacks(execute=True):
+        place(pizza, extras, 1)
+    DailyPizzaSales.objects.update(orders=5)
+    before = rollups()
+
+    with pytest.raises(CommandError, match="Nothing was rebuilt"):
+        call_command("rebuild_sales_rollups", stdout=io.StringIO())
+    assert rollups() == before
+
+    yesterday = timezone.localdate() - timedelta(days=1)
+    call_command("rebuild_sales_rollups", end=str(yesterday), stdout=io.StringIO())
+    call_command("rebuild_sales_rollups", quiet_seconds=0, stdout=io.StringIO())
+    assert DailyPizzaSales.objects.get().orders == 1
+
+
+@pytest.mark.django_db
+def test_sales_endpoints(
+    client, pizza, extras, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    today = timezone.localdate()
+    with django_capture_on_commit_callbacks(execute=True):
+        place(pizza, extras, 2)
+    DailyPizzaSales.objects.create(
+        day=today - timedelta(days=3), pizza=pizza, orders=1, units=1, revenue=10
+    )
+
+    url = reverse("analytics-pizzas")
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert [row["day"] for row in response.data["results"]] == [
+        str(today - timedelta(days=3)),
+        str(today),
+    ]
+
+    response = client.get(url, {"start": str(today - timedelta(days=1)), "group": "total"})
+    assert response.data["results"] == [
+        {
+            "pizza_id": pizza.pk,
+            "pizza_name": "Margherita",
+            "orders": 1,
+            "units": 2,
+            "revenue": "27.00",
+        }
+    ]
+
+    response = client.get(reverse("analytics-extras"), {"group": "total"})
+    assert [row["extra_name"] for row in response.data["results"]] == ["Cheese", "Olives"]
+    assert response.data["results"][0]["revenue"] == "4.00"
+
+    assert client.get(url, {"start": "yesterday"}).status_code == 400
+    assert client.get(url, {"start": "2020-01-01", "end": "2022-01-01"}).status_code == 400
+    assert client.get(url, {"group": "week"}).status_code == 400
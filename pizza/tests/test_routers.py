@@ -0,0 +1,102 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from pizza.models import DailyPizzaSales, Pizza
+from pizza.routers import (
+    STICKY_COOKIE,
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    _replica_reads,
+)
+
+# Transactional, the test transaction would keep every read on the primary
+DATABASES = ["default", "replica"]
+
+
+@pytest.fixture
+def replica(settings):
+    settings.READ_REPLICAS = ["replica"]
+    settings.REPLICA_STICKY_SECONDS = 5
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_safe_reads_go_to_the_replica(client, replica, pizza):
+    replicated = Pizza.objects.using("replica").create(name="Replicated", base_price=9)
+    DailyPizzaSales.objects.using("replica").create(
+        day=timezone.localdate(), pizza=replicated, orders=1, units=1, revenue=9
+    )
+    response = client.get(reverse("analytics-pizzas"))
+    assert [row["pizza_name"] for row in response.data["results"]] == ["Replicated"]
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_menu_cache_is_filled_from_the_primary(client, replica, pizza):
+    # The replica lags behind the change that bumped the catalog version
+    Pizza.objects.using("replica").create(name="Stale", base_price=9)
+    response = client.get(reverse("pizza-list"))
+    assert [row["name"] for row in response.data["results"]] == ["Margherita"]
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_client_reads_its_writes_from_the_primary(client, replica, pizza):
+    response = client.post(
+        reverse("order-list"),
+        data={"pizza": pizza.pk, "customer_name": "Ada", "delivery_address": "A"},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.cookies
+    detail = reverse("order-detail", args=[response.data["id"]])
+
+    assert client.get(detail).status_code == 200
+
+    # Once the sticky window is over the order is read from the replica,
+    # which has not received it in this test
+    client.cookies[STICKY_COOKIE] = "0"
+    assert client.get(detail).status_code == 404
+
+
+@pytest.mark.django_db(transaction=True, databases=DATABASES)
+def test_router_keeps_transactions_and_commands_on_the_primary(replica):
+    router = ReplicaRouter()
+    assert router.db_for_read(Pizza) == "default"
+
+    token = _replica_reads.set(True)
+    try:
+        assert router.db_for_read(Pizza) == "replica"
+        with transaction.atomic():
+            assert router.db_for_read(Pizza) == "default"
+    finally:
+        _replica_reads.reset(token)
+    assert router.db_for_write(Pizza) == "default"
+
+
+@pytest.mark.django_db
+def test_no_replicas_no_sticky_cookie(client, pizza):
+    response = client.post(
+        reverse("order-list"),
+        data={"pizza": pizza.pk, "customer_name": "Ada", "delivery_address": "A"},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert STICKY_COOKIE not in response.cookies
+
+
+def test_routing_middleware_stays_async_under_asgi(replica):
+    async def view(request):
+        # Reads the async view hands to a thread still see the request's routing
+        database = await sync_to_async(ReplicaRouter().db_for_read)(Pizza)
+        return HttpResponse(database)
+
+    middleware = ReplicaRoutingMiddleware(view)
+    assert iscoroutinefunction(middleware)
+    response = async_to_sync(middleware)(RequestFactory().get("/"))
+    assert response.content == b"replica"
+    response = async_to_sync(middleware)(RequestFactory().post("/"))
+    assert response.content == b"default"
+    assert STICKY_COOKIE in response.cookies
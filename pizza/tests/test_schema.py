@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+# Literal paths, reverse() adds FORCE_SCRIPT_NAME once any request has run
+SCHEMA_JSON = "/swagger.json"
+SCHEMA_YAML = "/swagger.yaml"
+
+
+@pytest.fixture
+def schema_dir(settings, tmp_path):
+    settings.OPENAPI_SCHEMA_DIR = str(tmp_path)
+    # The test settings build on dev, which generates the schema live
+    settings.OPENAPI_LIVE_SCHEMA = False
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_generated_schema_is_served_with_etag(client, schema_dir, django_assert_num_queries):
+    call_command("generate_schema", stdout=io.StringIO())
+    url = SCHEMA_JSON
+
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/json"
+    schema = json.loads(response.content)
+    assert schema["info"]["title"] == "UserSnack API"
+    assert any(path.startswith("/pizza") for path in schema["paths"])
+
+    etag = response["ETag"]
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+
+    yaml = client.get(SCHEMA_YAML)
+    assert yaml.status_code == 200
+    assert yaml.content.startswith(b"swagger:")
+
+    # A regenerated artifact is picked up and gets a new ETag
+    (schema_dir / "openapi.json").write_bytes(b'{"swagger": "2.0", "paths": {}}')
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_live_schema_in_dev_ignores_the_artifact(client, settings, schema_dir):
+    url = SCHEMA_JSON
+
+    settings.OPENAPI_LIVE_SCHEMA = False
+    assert client.get(url).status_code == 404
+
+    settings.OPENAPI_LIVE_SCHEMA = True
+    response = client.get(url)
+    assert response.status_code == 200
+    assert json.loads(response.content)["info"]["title"] == "UserSnack API"
+
+    # A stale artifact left behind does not take precedence
+    (schema_dir / "openapi.json").write_bytes(b'{"swagger": "2.0", "paths": {}}')
+    response = client.get(url)
+    assert json.loads(response.content)["info"]["title"] == "UserSnack API"
+
+
+@pytest.mark.django_db
+def test_docs_point_at_the_static_schema(client, schema_dir):
+    response = client.get("/swagger/")
+    assert response.status_code == 200
+    assert "/usersnack/swagger.json" in response.content.decode()
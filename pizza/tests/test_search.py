@@ -0,0 +1,111 @@
+import pytest
+from django.urls import reverse
+
+from pizza.cache import menu_cache
+from pizza.models import Ingredient, Pizza
+from pizza.search import invalidate_search, parse_query, search_index
+
+
+@pytest.fixture
+def menu():
+    onion, basil, cheese = (
+        Ingredient.objects.create(name=name) for name in ("Red Onion", "Basil", "Cheese")
+    )
+    pizzas = {
+        "margherita": Pizza.objects.create(
+            name="Margherita", base_price=10, description="Classic with basil"
+        ),
+        "veggie": Pizza.objects.create(
+            name="Veggie Supreme", base_price=11, description="Loaded with vegetables"
+        ),
+        "basil": Pizza.objects.create(name="Basil Dream", base_price=12),
+    }
+    pizzas["margherita"].ingredients.set([basil, cheese])
+    pizzas["veggie"].ingredients.set([onion, cheese])
+    pizzas["basil"].ingredients.set([basil])
+    return pizzas
+
+
+def names(response):
+    return [pizza["name"] for pizza in response.data["results"]]
+
+
+def test_parse_query():
+    assert parse_query("Veggie no onion -olives") == (["veggie"], ["onion", "olives"])
+
+
+@pytest.mark.django_db
+def test_search_ranks_names_above_descriptions(client, menu):
+    response = client.get(reverse("pizza-list"), {"search": "basil"})
+    assert names(response) == ["Basil Dream", "Margherita"]
+
+
+@pytest.mark.django_db
+def test_search_matches_ingredients_and_prefixes(client, menu):
+    assert names(client.get(reverse("pizza-list"), {"search": "chee"})) == [
+        "Margherita",
+        "Veggie Supreme",
+    ]
+
+
+@pytest.mark.django_db
+def test_ingredient_filters(client, menu):
+    url = reverse("pizza-list")
+    assert names(client.get(url, {"search": "cheese no onion"})) == ["Margherita"]
+    assert names(client.get(url, {"ingredients": "basil,cheese"})) == ["Margherita"]
+    assert names(client.get(url, {"exclude_ingredients": "basil"})) == ["Veggie Supreme"]
+
+
+@pytest.mark.django_db
+def test_index_follows_model_changes(menu, django_capture_on_commit_callbacks):
+    search_index.build()
+    with django_capture_on_commit_callbacks(execute=True):
+        menu["veggie"].name = "Garden Party"
+        menu["veggie"].save()
+        menu["basil"].ingredients.add(Ingredient.objects.get(name="Red Onion"))
+        Ingredient.objects.filter(name="Cheese").get().delete()
+        menu["margherita"].delete()
+
+    assert search_index.search("garden") == [menu["veggie"].pk]
+    assert search_index.search("onion") == [menu["veggie"].pk, menu["basil"].pk]
+    assert search_index.search("margherita") == []
+    assert search_index.search("cheese") == []
+
+
+@pytest.mark.django_db
+def test_index_follows_changes_made_elsewhere(menu):
+    search_index.build()
+    # Saved without this process's signals, then bumped by the other process
+    Pizza.objects.filter(pk=menu["veggie"].pk).update(name="Garden Party")
+    Pizza.objects.bulk_create([Pizza(name="Gardenia", base_price=9)])
+    assert search_index.search("garden") == []
+
+    invalidate_search()
+    assert len(search_index.search("garden")) == 2
+
+
+@pytest.mark.django_db
+def test_price_and_stock_changes_keep_the_index(menu, django_assert_num_queries):
+    search_index.build()
+    veggie = menu["veggie"]
+    veggie.base_price = 15
+    veggie.is_available = False
+    veggie.save()
+    # Selling out bumps the catalog version, not the search version
+    Pizza.objects.filter(pk=menu["basil"].pk).update(quantity_in_stock=0, is_available=False)
+    menu_cache.bump()
+
+    with django_assert_num_queries(0):
+        assert search_index.search("veggie") == [veggie.pk]
+
+    veggie.description = "Garden fresh"
+    veggie.save()
+    assert search_index.search("garden") == [veggie.pk]
+
+
+@pytest.mark.django_db
+def test_autocomplete(client, menu, django_assert_num_queries):
+    client.get(reverse("pizza-autocomplete"), {"q": "x"})
+    with django_assert_num_queries(1):
+        response = client.get(reverse("pizza-autocomplete"), {"q": "ve"})
+    assert response.data == [{"id": menu["veggie"].pk, "name": "Veggie Supreme"}]
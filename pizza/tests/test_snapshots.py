@@ -0,0 +1,110 @@
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.utils.encoders import JSONEncoder
+
+from pizza.models import Extra, Order, Pizza
+from pizza.readers import OrderReader
+from pizza.serializers import OrderSerializer
+from pizza.synthetic import generate_orders
+
+URL = "/api/v1/order/"
+
+
+def as_json(data):
+    return json.loads(json.dumps(data, cls=JSONEncoder))
+
+
+def place_order(pizza, extras, quantity=2):
+    order = Order(pizza=pizza, quantity=quantity, customer_name="Ada", delivery_address="A")
+    order.save(extras=extras)
+    return order
+
+
+@pytest.mark.django_db
+def test_order_keeps_its_prices_after_the_menu_changes(client, pizza, extras):
+    order = place_order(pizza, extras)
+    assert order.snapshot == {
+        "pizza": {"id": pizza.pk, "name": "Margherita", "base_price": "10.00"},
+        "extras": [
+            {"id": extras[0].pk, "name": "Cheese", "price": "2.00"},
+            {"id": extras[1].pk, "name": "Olives", "price": "1.50"},
+        ],
+        "unit_price": "13.50",
+        "total_price": "27.00",
+    }
+    before = client.get(f"{URL}{order.pk}/").json()
+
+    Pizza.objects.filter(pk=pizza.pk).update(name="Margherita XL", base_price="14.00")
+    Extra.objects.filter(pk=extras[0].pk).update(price="3.00")
+
+    after = client.get(f"{URL}{order.pk}/").json()
+    assert after == before
+    assert (after["unit_price"], after["total_price"]) == ("13.50", "27.00")
+    assert client.get(URL).json()["results"] == [after]
+    assert Order.objects.get(pk=order.pk).calculate_total_price() == Decimal("27.00")
+
+
+@pytest.mark.django_db
+def test_order_reads_do_not_join(client, pizza, extras):
+    for _ in range(3):
+        place_order(pizza, extras, quantity=1)
+    order = Order.objects.first()
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(URL).status_code == 200
+        assert client.get(f"{URL}{order.pk}/").status_code == 200
+    assert queries.captured_queries
+    assert not any("JOIN" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_bulk_orders_store_snapshots(client, pizza, extras):
+    payload = {
+        "orders": [
+            {
+                "pizza": pizza.pk,
+                "extras": [extras[1].pk],
+                "customer_name": "Ada",
+                "delivery_address": "A",
+            }
+        ]
+    }
+    response = client.post(f"{URL}bulk/", data=payload, format="json")
+    assert response.status_code == 201, response.data
+    order = Order.objects.get()
+    assert order.snapshot["total_price"] == "11.50"
+    assert order.total_price == Decimal("11.50")
+
+
+@pytest.mark.django_db
+def test_orders_without_snapshot_are_read_and_backfilled(pizza, extras):
+    for quantity in (1, 1, 3):
+        place_order(pizza, extras[:1], quantity)
+    Order.objects.update(snapshot=None)
+    Order.objects.filter(quantity=3).update(total_price="31.00")
+
+    queryset = Order.objects.all()
+    rows = list(OrderReader().values(queryset))
+    expected = as_json(OrderSerializer(queryset, many=True).data)
+    assert as_json(OrderReader().render(rows)) == expected
+    assert [order["total_price"] for order in expected] == ["31.00", "12.00", "12.00"]
+
+    out = io.StringIO()
+    call_command("backfill_order_snapshots", batch_size=2, stdout=out)
+    assert "2 orders updated\n3 orders updated" in out.getvalue()
+    assert not Order.objects.filter(snapshot__isnull=True).exists()
+    assert as_json(OrderSerializer(queryset, many=True).data) == expected
+
+
+@pytest.mark.django_db
+def test_generated_orders_carry_snapshots(pizza, extras):
+    assert list(generate_orders(20, [pizza], extras, seed=1))[-1] == 20
+    for order in Order.objects.all():
+        assert order.snapshot["pizza"]["name"] == "Margherita"
+        assert Decimal(order.snapshot["total_price"]) == order.total_price
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from pizza.cache import menu_cache
+from pizza.startup import ImportRecord, by_package, parse_importtime, warm_up
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils.version
+import time:       300 |        420 |   django.utils
+import time:       500 |        920 | django
+import time:        80 |         80 | pizza.models
+"""
+
+
+def test_parse_importtime():
+    records = list(parse_importtime(IMPORTTIME.splitlines() + ["unrelated output"]))
+    assert records == [
+        ImportRecord("django.utils.version", 2, 120, 120),
+        ImportRecord("django.utils", 1, 300, 420),
+        ImportRecord("django", 0, 500, 920),
+        ImportRecord("pizza.models", 0, 80, 80),
+    ]
+    assert by_package(records) == [("django", 920), ("pizza", 80)]
+
+
+@pytest.mark.django_db(databases=["default", "replica"])
+def test_warm_up_fills_the_menu_cache(client, pizza, extras, django_assert_num_queries):
+    warm_up()
+    assert menu_cache.stats()["entries"] == 2
+
+    with django_assert_num_queries(0):
+        response = client.get("/api/v1/pizza/", HTTP_HOST="127.0.0.1")
+    assert response.status_code == 200
+    assert menu_cache.stats()["hits"] == 1
+
+
+def test_profile_startup_command():
+    stdout = io.StringIO()
+    call_command("profile_startup", "--limit", "5", "--path", "", stdout=stdout)
+    output = stdout.getvalue()
+    assert "django" in output
+    assert "urls:" in output
+    assert "Imported" in output
@@ -0,0 +1,173 @@
+import io
+import threading
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.urls import reverse
+
+from pizza.exceptions import InsufficientStock
+from pizza.models import Extra, Order, Pizza, StockShard
+from pizza.stock import reserve_stock, reshard
+
+
+def order_payload(pizza, extras=(), quantity=1):
+    return {
+        "pizza": pizza.id,
+        "extras": [extra.id for extra in extras],
+        "quantity": quantity,
+        "customer_name": "John Doe",
+        "delivery_address": "123 Pizza Street",
+    }
+
+
+@pytest.mark.django_db
+def test_order_reserves_stock_once(client, pizza, extras):
+    response = client.post(
+        reverse("order-list"), data=order_payload(pizza, extras, 2), format="json"
+    )
+    assert response.status_code == 201
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 3
+    assert list(Extra.objects.values_list("quantity_in_stock", flat=True)) == [3, 3]
+
+    order = Order.objects.get(pk=response.data["id"])
+    assert order.total_price == 27
+    assert set(order.extras.all()) == set(extras)
+
+
+@pytest.mark.django_db
+def test_order_sells_out_in_same_write(client, pizza, extras):
+    response = client.post(
+        reverse("order-list"), data=order_payload(pizza, extras[:1], 5), format="json"
+    )
+    assert response.status_code == 201
+    pizza.refresh_from_db()
+    extras[0].refresh_from_db()
+    assert (pizza.quantity_in_stock, pizza.is_available) == (0, False)
+    assert (extras[0].quantity_in_stock, extras[0].is_available) == (0, False)
+    assert Extra.objects.get(pk=extras[1].pk).is_available
+
+
+@pytest.mark.django_db
+def test_reservation_is_all_or_nothing(pizza, extras):
+    extras[1].quantity_in_stock = 1
+    extras[1].save()
+    with pytest.raises(InsufficientStock, match="Olives"):
+        reserve_stock(Extra, {extras[0].pk: 2, extras[1].pk: 2})
+    assert list(Extra.objects.values_list("quantity_in_stock", flat=True)) == [5, 1]
+
+
+@pytest.mark.django_db
+def test_updating_an_order_leaves_stock_alone(client, pizza):
+    response = client.post(
+        reverse("order-list"), data=order_payload(pizza), format="json"
+    )
+    url = reverse("order-detail", args=[response.data["id"]])
+    client.patch(url, data={"status": "confirmed"}, format="json")
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_orders_never_oversell():
+    pizza = Pizza.objects.create(name="Hot", base_price=9, quantity_in_stock=5)
+    placed, refused = [], []
+    barrier = threading.Barrier(12)
+
+    def place_order():
+        barrier.wait()
+        try:
+            Order(
+                pizza=pizza, quantity=1, customer_name="Rush", delivery_address="Here"
+            ).save()
+            placed.append(1)
+        except InsufficientStock:
+            refused.append(1)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=place_order) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    pizza.refresh_from_db()
+    assert (len(placed), len(refused)) == (5, 7)
+    assert Order.objects.count() == 5
+    assert (pizza.quantity_in_stock, pizza.is_available) == (0, False)
+
+
+@pytest.fixture
+def sharded_pizza(settings, pizza):
+    settings.STOCK_SHARDING = True
+    return reshard(pizza, 3)
+
+
+def shard_quantities(pizza):
+    return list(
+        StockShard.objects.filter(product_id=pizza.pk, kind="pizza")
+        .order_by("index")
+        .values_list("quantity", flat=True)
+    )
+
+
+@pytest.mark.django_db
+def test_reshard_spreads_stock(sharded_pizza):
+    assert shard_quantities(sharded_pizza) == [2, 2, 1]
+    assert sharded_pizza.quantity_in_stock == 0
+    assert reshard(sharded_pizza, 0).quantity_in_stock == 5
+
+
+@pytest.mark.django_db
+def test_sharded_order_takes_from_one_shard(client, sharded_pizza):
+    response = client.post(
+        reverse("order-list"), data=order_payload(sharded_pizza), format="json"
+    )
+    assert response.status_code == 201
+    assert sorted(shard_quantities(sharded_pizza)) in ([1, 1, 2], [0, 2, 2])
+
+
+@pytest.mark.django_db
+def test_sharded_order_spans_shards_and_sells_out(client, sharded_pizza):
+    reserve_stock(Pizza, {sharded_pizza.pk: 4})
+    assert sum(shard_quantities(sharded_pizza)) == 1
+    with pytest.raises(InsufficientStock):
+        reserve_stock(Pizza, {sharded_pizza.pk: 2})
+    reserve_stock(Pizza, {sharded_pizza.pk: 1})
+    sharded_pizza.refresh_from_db()
+    assert not sharded_pizza.is_available
+
+
+@pytest.mark.django_db
+def test_rebalance_stock_evens_drained_shards(sharded_pizza):
+    StockShard.objects.filter(product_id=sharded_pizza.pk, index=0).update(quantity=0)
+    StockShard.objects.filter(product_id=sharded_pizza.pk, index=1).update(quantity=6)
+    call_command("rebalance_stock")
+    assert shard_quantities(sharded_pizza) == [3, 2, 2]
+
+
+@pytest.mark.django_db
+def test_stock_stays_put_without_sharding(settings, pizza):
+    settings.STOCK_SHARDING = False
+    with pytest.raises(CommandError, match="STOCK_SHARDING"):
+        call_command("shard_stock", "pizza", str(pizza.pk), "--shards", "3")
+    with pytest.raises(CommandError, match="STOCK_SHARDING"):
+        call_command("rebalance_stock")
+    with pytest.raises(ImproperlyConfigured):
+        reshard(pizza, 3)
+    pizza.refresh_from_db()
+    assert (pizza.quantity_in_stock, pizza.stock_shards) == (5, 0)
+    assert not StockShard.objects.exists()
+
+
+@pytest.mark.django_db
+def test_shards_merge_back_once_sharding_is_off(settings, sharded_pizza):
+    settings.STOCK_SHARDING = False
+    out = io.StringIO()
+    call_command("shard_stock", "pizza", str(sharded_pizza.pk), "--shards", "0", stdout=out)
+    sharded_pizza.refresh_from_db()
+    assert (sharded_pizza.quantity_in_stock, sharded_pizza.stock_shards) == (5, 0)
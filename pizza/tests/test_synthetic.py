@@ -0,0 +1,98 @@
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from pizza.cache import menu_cache
+from pizza.models import Extra, Ingredient, Order, Pizza
+from pizza.synthetic import generate_catalog, generate_orders, iter_fixture, load_fixture
+
+FIXTURE = {
+    "ingredients": [{"name": "Dough"}, {"name": "Basil"}],
+    "pizzas": [
+        {"name": "Margherita", "base_price": 12.99, "ingredients": ["Dough", "Basil"]},
+        {"name": "Mystery", "base_price": 9.5, "ingredients": ["Dough", "Unknown"]},
+    ],
+    "extras": [],
+    "other": [1, [2, 3]],
+}
+
+
+def test_iter_fixture_streams_items_in_small_chunks():
+    items = list(iter_fixture(io.StringIO(json.dumps(FIXTURE, indent=2)), chunk_size=7))
+    expected = [(section, item) for section, rows in FIXTURE.items() for item in rows]
+    assert items == expected
+    assert list(iter_fixture(io.StringIO("{}"))) == []
+    with pytest.raises(ValueError):
+        list(iter_fixture(io.StringIO('{"pizzas": [{"name": "x"}')))
+
+
+@pytest.mark.django_db
+def test_load_fixture_inserts_new_rows_once():
+    Ingredient.objects.create(name="Basil")
+
+    created, missing = load_fixture(iter_fixture(io.StringIO(json.dumps(FIXTURE))))
+    assert created == {"ingredients": 1, "pizzas": 2, "extras": 0}
+    assert missing == ["Unknown"]
+    margherita = Pizza.objects.get(name="Margherita")
+    assert sorted(margherita.ingredients.values_list("name", flat=True)) == [
+        "Basil",
+        "Dough",
+    ]
+
+    created, _ = load_fixture(iter_fixture(io.StringIO(json.dumps(FIXTURE))))
+    assert created == {"ingredients": 0, "pizzas": 0, "extras": 0}
+
+
+@pytest.mark.django_db
+def test_generate_orders_keeps_historical_timestamps():
+    pizzas, extras = generate_catalog(pizzas=5, extras=4, ingredients=6, seed=1)
+    progress = list(generate_orders(500, pizzas, extras, days=30, batch_size=200, seed=1))
+    assert progress == [200, 400, 500]
+
+    assert Order.objects.count() == 500
+    oldest = Order.objects.order_by("created_at").first()
+    assert oldest.created_at < timezone.now() - timedelta(days=1)
+    assert oldest.updated_at >= oldest.created_at
+
+    # The most popular pizza gets the most orders
+    counts = {pizza.pk: Order.objects.filter(pizza=pizza).count() for pizza in pizzas}
+    assert max(counts, key=counts.get) == pizzas[0].pk
+
+    order = Order.objects.filter(extras__isnull=False).distinct().first()
+    expected = (
+        order.pizza.base_price + sum(extra.price for extra in order.extras.all())
+    ) * order.quantity
+    assert order.total_price == expected
+
+    # Auto timestamps are back once the generator is done
+    assert Order._meta.get_field("created_at").auto_now_add
+
+
+@pytest.mark.django_db
+def test_populate_data_generate():
+    call_command(
+        "populate_data",
+        generate=True,
+        pizzas=3,
+        extras=2,
+        ingredients=4,
+        orders=50,
+        seed=3,
+        stdout=io.StringIO(),
+    )
+    assert (Pizza.objects.count(), Extra.objects.count()) == (3, 2)
+    assert Order.objects.count() == 50
+
+
+@pytest.mark.django_db
+def test_populate_data_bulk_invalidates_the_catalog(tmp_path):
+    fixture = tmp_path / "fixture.json"
+    fixture.write_text(json.dumps(FIXTURE))
+    version = menu_cache.version
+    call_command("populate_data", fixture=str(fixture), bulk=True, stdout=io.StringIO())
+    assert Pizza.objects.count() == 2
+    assert menu_cache.version != version
@@ -0,0 +1,73 @@
+import pytest
+from django.urls import reverse
+
+from pizza.models import Extra, Order
+from pizza.transitions import can_transition
+
+
+@pytest.fixture
+def orders(pizza, extras):
+    placed = []
+    for quantity in (1, 2):
+        order = Order(
+            pizza=pizza, quantity=quantity, customer_name="Ada", delivery_address="A"
+        )
+        order.save(extras=extras[:1])
+        placed.append(order)
+    return placed
+
+
+def test_state_machine():
+    assert can_transition("pending", "confirmed")
+    assert can_transition("confirmed", "cancelled")
+    assert not can_transition("baking", "cancelled")
+    assert not can_transition("pending", "delivered")
+
+
+@pytest.mark.django_db
+def test_bulk_transition(client, orders, django_assert_max_num_queries):
+    Order.objects.filter(pk=orders[1].pk).update(status="confirmed")
+    ids = [order.pk for order in orders] + [9999]
+    with django_assert_max_num_queries(6):
+        response = client.post(
+            reverse("order-transition"),
+            data={"ids": ids, "status": "preparing"},
+            format="json",
+        )
+    assert response.data["updated"] == [orders[1].pk]
+    assert set(response.data["rejected"]) == {orders[0].pk, 9999}
+    assert Order.objects.get(pk=orders[1].pk).status == "preparing"
+
+
+@pytest.mark.django_db
+def test_cancel_restocks(client, pizza, extras, orders):
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 2
+    response = client.post(
+        reverse("order-transition"),
+        data={"ids": [order.pk for order in orders], "status": "cancelled"},
+        format="json",
+    )
+    assert len(response.data["updated"]) == 2
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 5
+    assert Extra.objects.get(pk=extras[0].pk).quantity_in_stock == 5
+
+
+@pytest.mark.django_db
+def test_cancel_makes_sold_out_pizza_available(client, pizza):
+    order = Order(pizza=pizza, quantity=5, customer_name="Ada", delivery_address="A")
+    order.save()
+    pizza.refresh_from_db()
+    assert not pizza.is_available
+    url = reverse("order-detail", args=[order.pk])
+    assert client.patch(url, {"status": "cancelled"}, format="json").status_code == 200
+    pizza.refresh_from_db()
+    assert (pizza.quantity_in_stock, pizza.is_available) == (5, True)
+
+
+@pytest.mark.django_db
+def test_patch_rejects_invalid_transition(client, orders):
+    url = reverse("order-detail", args=[orders[0].pk])
+    response = client.patch(url, {"status": "delivered"}, format="json")
+    assert response.status_code == 400
@@ -1,31 +1,6 @@
 import pytest
 from django.urls import reverse
-from rest_framework.test import APIClient
-from pizza.models import Pizza, Extra, Order
-
-
-@pytest.fixture
-def client():
-    return APIClient()
-
-
-@pytest.fixture
-def pizza():
-    return Pizza.objects.create(
-        name="Margherita", base_price=10.0, quantity_in_stock=5, is_available=True
-    )
-
-
-@pytest.fixture
-def extras():
-    return [
-        Extra.objects.create(
-            name="Cheese", price=2.0, quantity_in_stock=5, is_available=True
-        ),
-        Extra.objects.create(
-            name="Olives", price=1.5, quantity_in_stock=5, is_available=True
-        ),
-    ]
+from pizza.models import Pizza, Order
 
 
 @pytest.mark.django_db
@@ -102,3 +77,37 @@ def test_create_order(client, pizza, extras):
     order = Order.objects.get(pk=response.data["id"])
     expected_price = pizza.base_price + extras[0].price
     assert order.total_price == expected_price
+
+
+@pytest.mark.django_db
+def test_batch_quote(client, pizza, extras, django_assert_max_num_queries):
+    other = Pizza.objects.create(
+        name="Diavola", base_price=12.0, quantity_in_stock=5, is_available=True
+    )
+    payload = {
+        "lines": [
+            {"pizza_id": pizza.id, "extras": [extras[0].id, 9999], "quantity": 2},
+            {"pizza_id": other.id, "extras": [e.id for e in extras]},
+            {"pizza_id": pizza.id, "quantity": 0},
+            {"pizza_id": 9999},
+            {"pizza_id": other.id, "extras": [9999, 9998], "quantity": 0},
+            {"pizza_id": 9998, "extras": [9999]},
+        ]
+    }
+    # One query for the pizzas and one for the extras, whatever the cart size
+    # and however many ids are unknown
+    with django_assert_max_num_queries(2):
+        response = client.post(reverse("pizza-quote"), data=payload, format="json")
+    with django_assert_max_num_queries(0):
+        assert client.post(reverse("pizza-quote"), data=payload, format="json").data == (
+            response.data
+        )
+    assert response.status_code == 200
+    lines = response.data["lines"]
+    assert lines[0]["total_price"] == pytest.approx(24.0)
+    assert lines[1]["total_price"] == pytest.approx(15.5)
+    assert "Quantity must be at least 1" in lines[2]["errors"]["quantity"]
+    assert "pizza_id" in lines[3]["errors"]
+    assert "quantity" in lines[4]["errors"]
+    assert "pizza_id" in lines[5]["errors"]
+    assert response.data["total_price"] == pytest.approx(39.5)
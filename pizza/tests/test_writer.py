@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+from django.urls import reverse
+
+from pizza.checks import check_group_commit_threads
+from pizza.exceptions import InsufficientStock
+from pizza.models import Order, Pizza
+from pizza.writer import GroupCommitWriter
+
+
+def new_order(pizza, quantity=1):
+    order = Order(
+        pizza=pizza, quantity=quantity, customer_name="Ada", delivery_address="Here"
+    )
+    order.save()
+    return order
+
+
+@pytest.mark.django_db(transaction=True)
+def test_writes_are_grouped_and_fail_independently():
+    pizza = Pizza.objects.create(name="Hot", base_price=9, quantity_in_stock=3)
+    # The group closes on its third write, long before max_wait
+    writer = GroupCommitWriter(max_batch=3, max_wait=60)
+    futures = [
+        writer.submit(new_order, pizza),
+        writer.submit(new_order, pizza, 5),
+        writer.submit(new_order, pizza),
+    ]
+
+    assert futures[0].result().pk
+    with pytest.raises(InsufficientStock):
+        futures[1].result()
+    assert futures[2].result().pk
+    assert writer.groups == 1
+    assert Order.objects.count() == 2
+    pizza.refresh_from_db()
+    assert pizza.quantity_in_stock == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_order_create_through_writer(client, settings):
+    settings.ORDER_GROUP_COMMIT = True
+    pizza = Pizza.objects.create(name="Hot", base_price=9, quantity_in_stock=3)
+    payload = {
+        "pizza": pizza.id,
+        "quantity": 1,
+        "customer_name": "Ada",
+        "delivery_address": "Here",
+    }
+    response = client.post(reverse("order-list"), data=payload, format="json")
+    assert response.status_code == 201
+    assert Order.objects.filter(pk=response.data["id"]).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stalled_writer_answers_503(client, settings, monkeypatch):
+    settings.ORDER_GROUP_COMMIT = True
+    settings.ORDER_GROUP_COMMIT_TIMEOUT = 0.1
+    writer = GroupCommitWriter(max_batch=1, max_wait=0)
+    monkeypatch.setattr("pizza.views.order_writer", writer)
+    pizza = Pizza.objects.create(name="Hot", base_price=9, quantity_in_stock=3)
+    # The stalled batch holds the database's write lock from here on
+    stalled = threading.Event()
+    blocker = writer.submit(stalled.wait)
+
+    payload = {"pizza": pizza.id, "customer_name": "Ada", "delivery_address": "Here"}
+    response = client.post(reverse("order-list"), data=payload, format="json")
+    assert response.status_code == 503
+
+    stalled.set()
+    blocker.result()
+    # The request's write was called off before it started
+    writer.submit(lambda: None).result()
+    assert not Order.objects.exists()
+
+
+def test_group_commit_wants_request_threads(settings):
+    settings.ORDER_GROUP_COMMIT, settings.WEB_THREADS = False, 1
+    settings.WEB_WORKER_CLASS = "sync"
+    assert check_group_commit_threads(None) == []
+    settings.ORDER_GROUP_COMMIT = True
+    assert [warning.id for warning in check_group_commit_threads(None)] == ["pizza.W001"]
+    settings.WEB_THREADS = 4
+    assert check_group_commit_threads(None) == []
+    settings.WEB_WORKER_CLASS, settings.WEB_THREADS = "uvicorn.workers.UvicornWorker", 1
+    assert check_group_commit_threads(None) == []
@@ -0,0 +1,91 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from pizza.choices import DeliveryStatus
+from pizza.models import Extra, Order, Pizza
+from pizza.rollups import record_sales, sales_of
+from pizza.signals import order_status_changed
+from pizza.stock import release_stock
+
+# Statuses each status may move to
+TRANSITIONS = {
+    DeliveryStatus.PENDING: {DeliveryStatus.CONFIRMED, DeliveryStatus.CANCELLED},
+    DeliveryStatus.CONFIRMED: {DeliveryStatus.PREPARING, DeliveryStatus.CANCELLED},
+    DeliveryStatus.PREPARING: {DeliveryStatus.BAKING},
+    DeliveryStatus.BAKING: {DeliveryStatus.READY},
+    DeliveryStatus.READY: {DeliveryStatus.DELIVERED},
+    DeliveryStatus.DELIVERED: set(),
+    DeliveryStatus.CANCELLED: set(),
+}
+TERMINAL_STATUSES = {status for status, targets in TRANSITIONS.items() if not targets}
+
+
+def can_transition(source, target):
+    return target in TRANSITIONS.get(source, ())
+
+
+def transition_orders(order_ids, target):
+    """Move the orders in ``order_ids`` to the ``target`` status.
+
+    Orders are updated with one UPDATE per source status, bypassing
+    ``Order.save``. Cancelled orders give their pizza and extras back in one
+    aggregated update per model and are taken off the sales rollups.
+
+    Returns ``(updated, rejected)``: the ids that moved, and a dict of id ->
+    reason for those that could not.
+    """
+    order_ids = list(dict.fromkeys(order_ids))
+    rejected = {}
+    by_status = defaultdict(list)
+    with transaction.atomic():
+        current = dict(
+            Order.objects.select_for_update()
+            .filter(pk__in=order_ids)
+            .values_list("pk", "status")
+        )
+        for pk in order_ids:
+            if pk not in current:
+                rejected[pk] = "Order not found."
+            elif not can_transition(current[pk], target):
+                rejected[pk] = f"Cannot move a {current[pk]} order to {target}."
+            else:
+                by_status[current[pk]].append(pk)
+
+        now = timezone.now()
+        for source, pks in by_status.items():
+            Order.objects.filter(pk__in=pks, status=source).update(
+                status=target, updated_at=now
+            )
+
+        updated = [pk for pks in by_status.values() for pk in pks]
+        if target == DeliveryStatus.CANCELLED and updated:
+            restock(updated)
+            record_sales(sales_of(updated), sign=-1)
+        if updated:
+            transaction.on_commit(
+                lambda: order_status_changed.send(
+                    sender=Order, order_ids=updated, status=target
+                )
+            )
+    return updated, rejected
+
+
+def restock(order_ids):
+    """Return the stock held by ``order_ids`` to their pizzas and extras."""
+    pizza_units = (
+        Order.objects.filter(pk__in=order_ids)
+        .values("pizza_id")
+        .annotate(units=Sum("quantity"))
+        .values_list("pizza_id", "units")
+    )
+    extra_units = (
+        Order.extras.through.objects.filter(order_id__in=order_ids)
+        .values("extra_id")
+        .annotate(units=Sum("order__quantity"))
+        .values_list("extra_id", "units")
+    )
+    release_stock(Pizza, dict(pizza_units))
+    release_stock(Extra, dict(extra_units))
@@ -1,12 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from pizza.views import PizzaViewSet, ExtraViewSet, OrderViewSet
+from pizza.events import order_events_view
+from pizza.metrics import metrics_view
+from pizza.views import (
+    CartViewSet,
+    ExtraViewSet,
+    OrderViewSet,
+    PizzaViewSet,
+    SalesViewSet,
+)
 
 router = DefaultRouter()
 router.register(r"pizza", PizzaViewSet)
 router.register(r"extra", ExtraViewSet)
 router.register(r"order", OrderViewSet)
+router.register(r"cart", CartViewSet)
+router.register(r"analytics", SalesViewSet, basename="analytics")
 
 urlpatterns = [
+    path("metrics/", metrics_view, name="metrics"),
+    path("order/events/", order_events_view, name="order-events"),
     path("", include(router.urls)),
 ]
@@ -1,25 +1,96 @@
-from django.db.models import Q
-from rest_framework import viewsets, status
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+from django.db.models import Case, IntegerField, Value, When
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, viewsets, status
 
 from django_filters import rest_framework
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from drf_yasg.utils import swagger_auto_schema
+from drf_yasg.utils import no_body, swagger_auto_schema
 from drf_yasg import openapi
 
-from pizza.models import Pizza, Extra, Order
+from pizza.bulk import ingest_orders
+from pizza.cache import menu_cache
+from pizza.exceptions import WriterUnavailable
+from pizza.export import FORMATS, export_querysets, iter_order_rows, parse_bound
+from pizza.idempotency import IdempotentCreateMixin
+from pizza.kitchen import kitchen_scheduler
+from pizza.models import (
+    ArchivedOrder,
+    Cart,
+    Pizza,
+    Extra,
+    Order,
+    DailyPizzaSales,
+    DailyExtraSales,
+)
+from pizza.pagination import OrderPagination
+from pizza.pricing import line_price, price_book
+from pizza.readers import (
+    ArchivedOrderReader,
+    CartReader,
+    ExtraReader,
+    OrderReader,
+    PizzaDetailReader,
+    PizzaReader,
+    RowReadMixin,
+)
+from pizza.routers import use_primary
+from pizza.rollups import MAX_REPORT_DAYS, sales_report
+from pizza.search import search_index
+from pizza.transitions import transition_orders
 from pizza.serializers import (
+    BatchQuoteSerializer,
+    BulkOrderSerializer,
+    CartCreateSerializer,
+    CartSerializer,
+    QuoteLineSerializer,
     CalculateOrderAmountSerializer,
     PizzaSerializer,
     PizzaDetailSerializer,
     ExtraSerializer,
+    ExtraSalesSerializer,
+    KitchenBatchSerializer,
     OrderCreateSerializer,
     OrderSerializer,
+    OrderTransitionSerializer,
+    PizzaSalesSerializer,
 )
+from pizza.writer import order_writer
+
+
+class MenuCacheMixin:
+    """
+    Serve list and retrieve payloads from the per-worker menu cache
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, view, request, *args, **kwargs):
+        key = (self.basename, self.action, request.build_absolute_uri())
+
+        def build():
+            # A replica may not have the change that bumped the version yet
+            with use_primary():
+                return view(request, *args, **kwargs).data
+
+        return Response(menu_cache.get_or_build(key, build))
 
 
-class PizzaViewSet(viewsets.ReadOnlyModelViewSet):
+class PizzaViewSet(MenuCacheMixin, RowReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Pizza.objects.filter(is_available=True).prefetch_related("ingredients")
+    readers = {"list": PizzaReader, "retrieve": PizzaDetailReader}
     filter_backends = [rest_framework.DjangoFilterBackend]
     filterset_fields = ("name",)
 
@@ -28,11 +99,50 @@ class PizzaViewSet(viewsets.ReadOnlyModelViewSet):
 
     def get_queryset(self):
         queryset = self.queryset
-        search = self.request.query_params.get("search")
-        if search:
-            queryset = queryset.filter(Q(name__icontains=search))
+        if self.action == "calculate_price":
+            # Quotes only need the pizza row, prices come from the price book
+            queryset = queryset.prefetch_related(None)
+        if self.action == "list":
+            params = self.request.query_params
+            search = params.get("search", "")
+            include = params.get("ingredients", "").split(",")
+            exclude = params.get("exclude_ingredients", "").split(",")
+            if search or any(include) or any(exclude):
+                queryset = self._ranked(
+                    queryset, search_index.search(search, include, exclude)
+                )
         return queryset
 
+    def _ranked(self, queryset, pizza_ids):
+        """Restrict ``queryset`` to ``pizza_ids``, keeping their order."""
+        if not pizza_ids:
+            return queryset.none()
+        return queryset.filter(pk__in=pizza_ids).order_by(
+            Case(
+                *(When(pk=pk, then=Value(rank)) for rank, pk in enumerate(pizza_ids)),
+                output_field=IntegerField(),
+            )
+        )
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter("q", openapi.IN_QUERY, type=openapi.TYPE_STRING)
+        ],
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def autocomplete(self, request):
+        """
+        Suggest available pizzas whose name, description or ingredients
+        start with the typed text
+        """
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            return Response([])
+        pizza_ids = search_index.search(query)[:10]
+        suggestions = self._ranked(self.queryset.prefetch_related(None), pizza_ids)
+        return Response(list(suggestions.values("id", "name")))
+
     @swagger_auto_schema(
         method="post",
         request_body=CalculateOrderAmountSerializer,
@@ -57,14 +167,15 @@ class PizzaViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        total_price = pizza.base_price * quantity
+        try:
+            extras_ids = [int(extra_id) for extra_id in extras_ids]
+        except (ValueError, TypeError):
+            return Response(
+                {"error": "Invalid extras"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        if extras_ids:
-            extras = Extra.objects.filter(
-                id__in=set(extras_ids), is_available=True
-            ).only("price")
-            extras_price = sum(extra.price for extra in extras) * quantity
-            total_price += extras_price
+        total_price = price_book.quote(pizza.id, extras_ids, quantity)
 
         return Response(
             {
@@ -77,30 +188,305 @@ class PizzaViewSet(viewsets.ReadOnlyModelViewSet):
             }
         )
 
+    @swagger_auto_schema(
+        method="post",
+        request_body=BatchQuoteSerializer,
+        responses={200: BatchQuoteSerializer},
+    )
+    @action(detail=False, methods=["post"])
+    def quote(self, request):
+        """
+        Price many cart lines at once, reporting errors per line
+        """
+        serializer = BatchQuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        checked = [QuoteLineSerializer(data=data) for data in serializer.validated_data["lines"]]
+        valid = [line.validated_data for line in checked if line.is_valid()]
+        # Every id of the cart is looked up at once, costing one reload at most
+        pizzas, extras = price_book.lookup(
+            [data["pizza_id"] for data in valid],
+            [pk for data in valid for pk in data.get("extras", [])],
+        )
+
+        lines = []
+        total_price = Decimal("0.00")
+        for line in checked:
+            if line.errors:
+                lines.append({"pizza_id": line.initial_data.get("pizza_id"), "errors": line.errors})
+                continue
+
+            pizza_id = line.validated_data["pizza_id"]
+            extras_ids = line.validated_data.get("extras", [])
+            quantity = line.validated_data["quantity"]
+            pizza = pizzas.get(pizza_id)
+            if pizza is None or not pizza.is_available:
+                lines.append(
+                    {"pizza_id": pizza_id, "errors": {"pizza_id": ["Pizza not found."]}}
+                )
+                continue
+
+            line_total = line_price(pizza, extras, extras_ids, quantity)
+            total_price += line_total
+            lines.append(
+                {
+                    "pizza_id": pizza_id,
+                    "pizza_name": pizza.name,
+                    "base_price": pizza.base_price,
+                    "quantity": quantity,
+                    "extras_ids": extras_ids,
+                    "total_price": line_total,
+                }
+            )
+
+        return Response({"lines": lines, "total_price": total_price})
+
 
-class ExtraViewSet(viewsets.ReadOnlyModelViewSet):
+class ExtraViewSet(MenuCacheMixin, RowReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for listing available extras
     """
 
     queryset = Extra.objects.filter(is_available=True)
+    readers = {"list": ExtraReader, "retrieve": ExtraReader}
     serializer_class = ExtraSerializer
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(IdempotentCreateMixin, RowReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for creating and managing orders
     """
 
-    queryset = Order.objects.select_related("pizza").prefetch_related("extras")
+    queryset = Order.objects.all()
+    readers = {"list": OrderReader, "retrieve": OrderReader}
+    pagination_class = OrderPagination
 
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
         return OrderSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return an order, looking in the archive for orders moved there
+        """
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            reader = ArchivedOrderReader()
+            row = get_object_or_404(
+                reader.values(ArchivedOrder.objects.all()), pk=self.kwargs["pk"]
+            )
+            return Response(reader.render([row])[0])
+
     def perform_create(self, serializer):
-        order = serializer.save()
-        # Recalculate total price after saving with extras
-        order.total_price = order.calculate_total_price()
-        order.save(update_fields=["total_price"])
+        if settings.ORDER_GROUP_COMMIT:
+            # Commit together with other concurrent orders, see pizza/writer.py
+            future = order_writer.submit(serializer.save)
+            try:
+                future.result(timeout=settings.ORDER_GROUP_COMMIT_TIMEOUT)
+            except FutureTimeoutError:
+                # Only a write that hasn't started can be called off, one
+                # already running may still commit after the 503
+                future.cancel()
+                raise WriterUnavailable()
+        else:
+            serializer.save()
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            openapi.Parameter(
+                "type", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(FORMATS)
+            ),
+            openapi.Parameter("start", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter("end", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """
+        Stream every order created between start and end as CSV or NDJSON
+        """
+        export_type = request.query_params.get("type", "csv")
+        if export_type not in FORMATS:
+            return Response(
+                {"error": f"type must be one of {', '.join(FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = parse_bound(request.query_params.get("start"))
+            end = parse_bound(request.query_params.get("end"), end=True)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        render, content_type = FORMATS[export_type]
+        response = StreamingHttpResponse(
+            render(iter_order_rows(export_querysets(start, end))),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="orders.{export_type}"'
+        return response
+
+    @swagger_auto_schema(method="post", request_body=OrderTransitionSerializer)
+    @action(detail=False, methods=["post"])
+    def transition(self, request):
+        """
+        Move many orders to a new status, cancelled orders are restocked
+        """
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated, rejected = transition_orders(
+            serializer.validated_data["ids"], serializer.validated_data["status"]
+        )
+        return Response({"updated": updated, "rejected": rejected})
+
+    @swagger_auto_schema(method="post", request_body=BulkOrderSerializer)
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Create a batch of orders, reporting success or failure per order
+        """
+        serializer = BulkOrderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        atomic = serializer.validated_data["atomic"]
+        results = ingest_orders(serializer.validated_data["orders"], atomic=atomic)
+
+        created = sum(1 for result in results if result["id"])
+        rejected = atomic and created < len(results)
+        return Response(
+            {"created": created, "results": results},
+            status=status.HTTP_400_BAD_REQUEST if rejected else status.HTTP_201_CREATED,
+        )
+
+    @swagger_auto_schema(
+        method="post",
+        request_body=no_body,
+        responses={200: KitchenBatchSerializer, 204: "No order is waiting"},
+    )
+    @action(detail=False, methods=["post"], url_path="next-batch")
+    def next_batch(self, request):
+        """
+        Claim the next oven batch of one pizza, moving its orders to preparing
+        """
+        batch = kitchen_scheduler.claim_next_batch()
+        if batch is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        orders = self.get_queryset().filter(pk__in=[order.id for order in batch.orders])
+        pizza = Pizza.objects.prefetch_related("ingredients").get(pk=batch.pizza_id)
+        serializer = KitchenBatchSerializer(
+            {"pizza": pizza, "units": batch.units, "orders": orders.order_by("created_at", "id")}
+        )
+        return Response(serializer.data)
+
+
+class CartViewSet(
+    IdempotentCreateMixin,
+    RowReadMixin,
+    mixins.CreateModelMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    """
+    ViewSet for orders of several pizzas placed in a single request
+    """
+
+    queryset = Cart.objects.all()
+    readers = {"list": CartReader, "retrieve": CartReader}
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return CartCreateSerializer
+        return CartSerializer
+
+    @swagger_auto_schema(request_body=CartCreateSerializer, responses={201: CartSerializer})
+    def create(self, request, *args, **kwargs):
+        """
+        Place every line of the cart in one transaction, or none of them
+        """
+        return super().create(request, *args, **kwargs)
+
+
+SALES_REPORT_PARAMETERS = [
+    openapi.Parameter(
+        "start",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        description="First day, 30 days before end by default",
+    ),
+    openapi.Parameter(
+        "end",
+        openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        format=openapi.FORMAT_DATE,
+        description="Last day, today by default",
+    ),
+    openapi.Parameter(
+        "group", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["day", "total"]
+    ),
+]
+
+
+class SalesViewSet(viewsets.ViewSet):
+    """
+    Daily sales per pizza and per extra, read from the sales rollups
+    """
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=SALES_REPORT_PARAMETERS,
+        responses={200: PizzaSalesSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def pizzas(self, request):
+        """
+        Orders, units and revenue (extras included) per pizza
+        """
+        return self._report(request, DailyPizzaSales, "pizza", PizzaSalesSerializer)
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=SALES_REPORT_PARAMETERS,
+        responses={200: ExtraSalesSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"])
+    def extras(self, request):
+        """
+        Units and revenue per extra
+        """
+        return self._report(request, DailyExtraSales, "extra", ExtraSalesSerializer)
+
+    def _report(self, request, model, product, serializer_class):
+        params = request.query_params
+        group = params.get("group", "day")
+        try:
+            end = parse_date(params["end"]) if "end" in params else timezone.localdate()
+            start = (
+                parse_date(params["start"])
+                if "start" in params
+                else end - timedelta(days=29)
+            )
+            if start is None or end is None:
+                raise ValueError("Dates must be formatted as YYYY-MM-DD")
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if start > end or (end - start).days >= MAX_REPORT_DAYS:
+            return Response(
+                {"error": f"start must be before end and at most {MAX_REPORT_DAYS} days apart"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if group not in ("day", "total"):
+            return Response(
+                {"error": "group must be day or total"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = sales_report(model, product, start, end, by_day=group == "day")
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "results": serializer_class(rows, many=True).data,
+            }
+        )
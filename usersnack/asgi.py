@@ -2,6 +2,7 @@
 ASGI config for usersnack project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served by gunicorn's uvicorn workers, see gunicorn.conf.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -11,6 +12,10 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "usersnack.settings")
+from decouple import config
+
+DJANGO_SETTINGS_MODULE = config("DJANGO_SETTINGS_MODULE", default="django-insecure")
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", DJANGO_SETTINGS_MODULE)
 
 application = get_asgi_application()
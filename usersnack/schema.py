@@ -0,0 +1,114 @@
+import functools
+import hashlib
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import permissions
+
+API_URL = "https://api.ile-wa.com/usersnack"
+
+# Artifact file name, content type and drf_yasg codec per schema format
+SCHEMA_FORMATS = {
+    "json": ("openapi.json", "application/json", "OpenAPICodecJson"),
+    "yaml": ("openapi.yaml", "application/yaml", "OpenAPICodecYaml"),
+}
+
+_artifacts = {}
+
+
+# drf_yasg's generators, inspectors and renderers are only needed to build the
+# schema or render the docs pages, so they are imported on first use rather
+# than by every worker at boot.
+
+
+@functools.cache
+def api_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="UserSnack API",
+        default_version="v1",
+        description="API powering the new usersnack app",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="contact@UserSnack.local"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+@functools.cache
+def schema_view():
+    from drf_yasg.views import get_schema_view
+
+    return get_schema_view(
+        api_info(),
+        public=True,
+        url=API_URL,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+
+@functools.cache
+def _docs_view(renderer):
+    return schema_view().with_ui(renderer, cache_timeout=0)
+
+
+def docs_view(renderer):
+    """Return a view rendering the ``renderer`` docs page, built on first request."""
+
+    def view(request, *args, **kwargs):
+        return _docs_view(renderer)(request, *args, **kwargs)
+
+    return view
+
+
+def generate_schema():
+    """Introspect the API once and return the encoded schema per format."""
+    from drf_yasg import codecs
+
+    generator = schema_view().generator_class(api_info(), url=API_URL)
+    schema = generator.get_schema(request=None, public=True)
+    return {
+        name: getattr(codecs, codec)(validators=[]).encode(schema)
+        for name, (_, _, codec) in SCHEMA_FORMATS.items()
+    }
+
+
+def schema_path(name):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / SCHEMA_FORMATS[name][0]
+
+
+def load_artifact(name):
+    """Return ``(content, etag)`` of a generated schema, read once per change."""
+    path = schema_path(name)
+    modified = os.stat(path).st_mtime_ns
+    cached = _artifacts.get(path)
+    if cached is None or cached[0] != modified:
+        content = path.read_bytes()
+        etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+        cached = _artifacts[path] = (modified, content, etag)
+    return cached[1], cached[2]
+
+
+def static_schema_view(request, format):
+    """Serve the schema written by ``manage.py generate_schema``.
+
+    Settings with ``OPENAPI_LIVE_SCHEMA`` (dev) generate the schema on each
+    request instead, so a stale artifact never hides the code being edited.
+    """
+    name = format.lstrip(".")
+    if getattr(settings, "OPENAPI_LIVE_SCHEMA", False):
+        return schema_view().without_ui(cache_timeout=0)(request, format=f".{name}")
+    try:
+        content, etag = load_artifact(name)
+    except FileNotFoundError:
+        raise Http404("The API schema has not been generated, run generate_schema")
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type=SCHEMA_FORMATS[name][1])
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
@@ -1,7 +1,7 @@
 from pathlib import Path
 import os
 
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,6 +23,8 @@ INSTALLED_APPS = SYSTEM_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 
 MIDDLEWARE = [
+    "pizza.metrics.RequestMetricsMiddleware",
+    "pizza.routers.ReplicaRoutingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -64,6 +66,14 @@ DATABASES = {
     }
 }
 
+# Read replicas as comma separated database URLs, see pizza/routers.py
+for index, url in enumerate(config("READ_REPLICA_URLS", default="", cast=Csv())):
+    DATABASES[f"replica_{index}"] = dj_database_url.parse(url)
+READ_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica")]
+DATABASE_ROUTERS = ["pizza.routers.ReplicaRouter"]
+# Seconds a client keeps reading from the primary after a write
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=5, cast=int)
+
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
 USE_I18N = True
@@ -82,6 +92,91 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 FORCE_SCRIPT_NAME = "/usersnack"
+
+# The default cache holds the catalog version every worker and management
+# command checks its menu and price caches against, see pizza/cache.py. It
+# must be shared between processes, the local memory fallback only suits a
+# single process and is refused for more workers by pizza/checks.py
+CACHE_URL = config("CACHE_URL", default="")
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+        if CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+# Gunicorn worker processes, see gunicorn.conf.py
+WEB_CONCURRENCY = config("WEB_CONCURRENCY", default=1, cast=int)
+# Gunicorn worker class, "sync" serves usersnack.wsgi instead of the ASGI app
+WEB_WORKER_CLASS = config("WEB_WORKER_CLASS", default="uvicorn.workers.UvicornWorker")
+# Request threads of each "sync" gunicorn worker
+WEB_THREADS = config("WEB_THREADS", default=1, cast=int)
+
+# Per-worker menu and price caches, see pizza/cache.py and pizza/pricing.py
+MENU_CACHE_MAX_ENTRIES = config("MENU_CACHE_MAX_ENTRIES", default=512, cast=int)
+PRICE_BOOK_MAX_QUOTES = config("PRICE_BOOK_MAX_QUOTES", default=1024, cast=int)
+
+# Read and reserve the stock of products with stock_shards > 0 through
+# StockShard rows, see pizza/stock.py
+STOCK_SHARDING = config("STOCK_SHARDING", default=False, cast=bool)
+
+# Seconds without order changes on the days being rebuilt that
+# rebuild_sales_rollups requires, see pizza/rollups.py
+ROLLUP_QUIET_SECONDS = config("ROLLUP_QUIET_SECONDS", default=60, cast=int)
+
+# Commit order creates in small groups from a writer thread, see pizza/writer.py.
+# Only worth it with concurrent requests per worker (ASGI, or WEB_THREADS)
+ORDER_GROUP_COMMIT = config("ORDER_GROUP_COMMIT", default=False, cast=bool)
+ORDER_GROUP_COMMIT_MAX_BATCH = config("ORDER_GROUP_COMMIT_MAX_BATCH", default=32, cast=int)
+ORDER_GROUP_COMMIT_MAX_WAIT_MS = config("ORDER_GROUP_COMMIT_MAX_WAIT_MS", default=5, cast=float)
+# Seconds a request waits for its write before answering 503
+ORDER_GROUP_COMMIT_TIMEOUT = config("ORDER_GROUP_COMMIT_TIMEOUT", default=10, cast=float)
+
+# Responses replayed for repeated Idempotency-Key headers, see pizza/idempotency.py
+IDEMPOTENCY_KEY_TTL = config("IDEMPOTENCY_KEY_TTL", default=24 * 60 * 60, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config("IDEMPOTENCY_LOCK_TIMEOUT", default=30, cast=int)
+
+# Set to False to skip COUNT(*) on the order list unless ?count=true is sent
+ORDER_LIST_EXACT_COUNT = config("ORDER_LIST_EXACT_COUNT", default=True, cast=bool)
+
+# Publish/subscribe hub behind the order status event stream. Events must
+# reach the streams of every worker, so more than one needs the CacheBroker
+ORDER_EVENTS_BROKER = config(
+    "ORDER_EVENTS_BROKER",
+    default="pizza.events.CacheBroker" if CACHE_URL else "pizza.events.InMemoryBroker",
+)
+# Seconds between the CacheBroker's reads of new events, their delivery delay
+ORDER_EVENTS_POLL_INTERVAL = config("ORDER_EVENTS_POLL_INTERVAL", default=0.2, cast=float)
+# Seconds between keep-alive comments on an idle event stream
+ORDER_EVENTS_KEEPALIVE = config("ORDER_EVENTS_KEEPALIVE", default=15, cast=int)
+
+# Log requests over this many queries or milliseconds, 0 disables the check
+REQUEST_QUERY_BUDGET = config("REQUEST_QUERY_BUDGET", default=0, cast=int)
+REQUEST_TIME_BUDGET_MS = config("REQUEST_TIME_BUDGET_MS", default=0, cast=float)
+
+# Pre-generated OpenAPI schema served by the docs, see usersnack/schema.py.
+# Build it with ``manage.py generate_schema``
+OPENAPI_SCHEMA_DIR = config("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "openapi"))
+# Generate the schema per request, ignoring any artifact (dev only)
+OPENAPI_LIVE_SCHEMA = False
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+# Open connections and fill the menu and price caches in each gunicorn worker
+# before it accepts traffic, see gunicorn.conf.py and pizza/startup.py
+WORKER_WARM_UP = config("WORKER_WARM_UP", default=False, cast=bool)
+
+# Kitchen batching, see pizza/kitchen.py. Pizzas per oven run, the length of
+# a run and the longest an order should wait for its run, both in seconds
+KITCHEN_OVEN_CAPACITY = config("KITCHEN_OVEN_CAPACITY", default=8, cast=int)
+KITCHEN_OVEN_SECONDS = config("KITCHEN_OVEN_SECONDS", default=8 * 60, cast=int)
+KITCHEN_MAX_WAIT = config("KITCHEN_MAX_WAIT", default=20 * 60, cast=int)
+# Seconds between full reloads of a worker's kitchen queue from the database
+KITCHEN_QUEUE_RESYNC = config("KITCHEN_QUEUE_RESYNC", default=60, cast=int)
+
+# Delivered and cancelled orders older than this move to the archive tables
+# when archive_orders runs, see pizza/archive.py
+ORDER_ARCHIVE_AFTER_DAYS = config("ORDER_ARCHIVE_AFTER_DAYS", default=90, cast=int)
+ORDER_ARCHIVE_BATCH_SIZE = config("ORDER_ARCHIVE_BATCH_SIZE", default=1000, cast=int)
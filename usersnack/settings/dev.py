@@ -8,3 +8,5 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Static files
 STATIC_URL = "/static/"
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
+
+OPENAPI_LIVE_SCHEMA = True
@@ -0,0 +1,16 @@
+from usersnack.settings.dev import *
+
+# A second database standing in for a read replica. Tests opt in to
+# replica reads by setting READ_REPLICAS, see pizza/tests/test_routers.py
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["replica"] = {**DATABASES["default"], "NAME": BASE_DIR / "replica.sqlite3"}
+    # A file rather than memory, so the threads of the concurrency tests get
+    # connections of their own and really contend for the stock rows. Writers
+    # queue for the lock up front instead of failing with "database is locked"
+    DATABASES["default"]["TEST"] = {"NAME": BASE_DIR / "test_db.sqlite3"}
+    DATABASES["default"]["OPTIONS"] = {"transaction_mode": "IMMEDIATE"}
+else:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"NAME": "test_replica"}}
+READ_REPLICAS = []
+# Tests rebuild the sales rollups right after placing their orders
+ROLLUP_QUIET_SECONDS = 0